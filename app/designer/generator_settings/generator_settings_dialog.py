@@ -1,4 +1,5 @@
 # python native modules
+import os
 
 # third-party modules
 from PyQt5.QtWidgets import *
@@ -23,6 +24,10 @@ from labtool.oscilloscope.base.oscilloscope import TimebaseMode
 
 class GeneratorSettingsDialog(QDialog, Ui_GeneratorSettings):
 
+    # Directory of the checkpoint files, one for each algorithm, so measuring with one of them does not
+    # overwrite the unfinished run of another, which can be resumed when its setup is measured again
+    checkpoint_directory = os.path.expanduser("~")
+
     def __init__(self, *args, **kwargs):
         super(GeneratorSettingsDialog, self).__init__(*args, **kwargs)
         self.setupUi(self)
@@ -58,9 +63,19 @@ class GeneratorSettingsDialog(QDialog, Ui_GeneratorSettings):
     ######################
     # GUI Dialog Outputs #
     ######################
-    def make_preferences_setup(self) -> dict:
-        """ Returns the setup object of the preferences """
-        return self.preferences_setup
+    def make_preferences_setup(self, algorithm_class=None) -> dict:
+        """ Returns the setup object of the preferences, with the checkpoint file of the given algorithm """
+        preferences_setup = dict(self.preferences_setup)
+        if algorithm_class is not None:
+            preferences_setup["checkpoint-file"] = self.make_checkpoint_file(algorithm_class)
+        return preferences_setup
+
+    def make_checkpoint_file(self, algorithm_class) -> str:
+        """ Returns the path of the checkpoint file of the given algorithm """
+        return os.path.join(
+            self.checkpoint_directory,
+            ".labtool-checkpoint-{}.jsonl".format(algorithm_class.__name__.lower())
+        )
 
     def make_generator_setup(self) -> dict:
         """ Returns the setup object of the generator """
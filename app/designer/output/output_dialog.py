@@ -107,11 +107,20 @@ class OutputDialog(QDialog, Ui_Dialog):
     ######################################
     # GUI Output Dialog Internal Methods #
     ######################################
-    def start(self):
-        """ Starts the algorithm process """
+    def start(self, resume: bool = True):
+        """ Starts the algorithm process, offering to resume an unfinished run of the same measurement """
         if self.worker is None:
             self.worker = Worker(self.algorithm)
 
+            if resume and self.algorithm.can_resume():
+                answer = QMessageBox.question(
+                    self,
+                    "Resume measurement",
+                    "An unfinished run of this measurement was found. Do you want to resume it?"
+                )
+                if answer == QMessageBox.Yes:
+                    self.algorithm.resume()
+
             self.worker.signals.progress.connect(self.set_progress)
             self.worker.signals.result.connect(self.set_results)
             self.worker.signals.log.connect(self.set_status)
@@ -119,15 +128,17 @@ class OutputDialog(QDialog, Ui_Dialog):
             self.pool.start(self.worker)
 
     def stop(self):
-        """ Stops the algorithm process """
+        """ Stops the algorithm process, waiting for the step running on the worker thread to return,
+        so the algorithm is not reset while it is still accessing the instruments """
         if self.worker is not None:
             self.worker.stop()
+            self.pool.waitForDone()
             self.worker = None
 
     def reset(self):
         """ Resets the algorithm process """
         self.stop()
-        self.start()
+        self.start(resume=False)
 
     ###########################
     # GUI Output Dialog Slots #
@@ -1,7 +1,12 @@
 # python native modules
+import logging
 
 # third-party modules
 from PyQt5.QtWidgets import *
+from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QRunnable
+from PyQt5.QtCore import QThreadPool
+from PyQt5.QtCore import pyqtSignal
 
 # labtool project modules
 from app.designer.window.window import Ui_LabToolWindow
@@ -13,6 +18,7 @@ from app.designer.output.output_dialog import OutputDialog
 
 from labtool.algorithm.bode_algorithm import BodeAlgorithm
 from labtool.algorithm.impedance_algorithm import ImpedanceAlgorithm
+from labtool.algorithm.base.sweep_estimator import SweepEstimator
 
 from labtool.base.instrument import InstrumentType
 from labtool.tool import LabTool
@@ -25,6 +31,43 @@ from labtool.oscilloscope.rigol.rigol_ds4014 import RigolDS4014
 from labtool.generator.agilent.agilent_33220a import Agilent33220A
 
 
+logger = logging.getLogger(__name__)
+
+
+class EstimateSignals(QObject):
+    """ Defines the signals available from a running estimate worker.
+
+    Supported signals are:
+        + status: str status message with the estimated duration of the measurement
+    """
+    status = pyqtSignal(str)
+
+
+class EstimateWorker(QRunnable):
+    """ Estimates the duration of a measurement on a worker thread, so the dry run of the sweep
+    does not block the user interface. The status message is emitted when it is done.
+    """
+
+    def __init__(self, estimator: SweepEstimator):
+        super(EstimateWorker, self).__init__()
+        self.estimator = estimator
+        self.signals = EstimateSignals()
+
+    def run(self):
+        try:
+            estimate = self.estimator.estimate()
+        except (ValueError, KeyError, ArithmeticError):
+            # Setups the estimate does not support leave the status empty, the measurement reports them
+            logger.warning("The duration of the measurement could not be estimated", exc_info=True)
+            return
+        self.signals.status.emit(
+            "Estimated measuring time is {:.0f} seconds, sending {} commands.".format(
+                estimate["total-time"],
+                estimate["total-commands"]
+            )
+        )
+
+
 class MainWindow(QMainWindow, Ui_LabToolWindow):
 
     def __init__(self, *args, **kwargs):
@@ -42,6 +85,7 @@ class MainWindow(QMainWindow, Ui_LabToolWindow):
         self.connected_devices = []
         self.oscilloscope = None
         self.generator = None
+        self.estimate_pool = QThreadPool()
 
         # Children Dialogs
         self.oscilloscope_settings_dialog = OscilloscopeSettingsDialog()
@@ -166,6 +210,25 @@ class MainWindow(QMainWindow, Ui_LabToolWindow):
     def on_generator_settings(self):
         self.generator_settings_dialog.exec()
 
+    def start_estimate(self, dialog: OutputDialog, algorithm_class, requirements: dict):
+        """ Estimates the duration of the measurement on a worker thread, showing it as the status
+        of the output dialog once it is done, so it does not delay the measurement """
+        estimator = SweepEstimator(
+            algorithm_class,
+            type(self.oscilloscope),
+            type(self.generator),
+            requirements,
+            self.oscilloscope_settings_dialog.make_channel_setup(),
+            self.oscilloscope_settings_dialog.make_trigger_setup(),
+            self.oscilloscope_settings_dialog.make_acquire_setup(),
+            self.oscilloscope_settings_dialog.make_timebase_setup(),
+            self.generator_settings_dialog.make_generator_setup(),
+            self.generator_settings_dialog.make_preferences_setup()
+        )
+        worker = EstimateWorker(estimator)
+        worker.signals.status.connect(dialog.set_status)
+        self.estimate_pool.start(worker)
+
     def on_bode(self):
         if self.bode_dialog.exec():
             algorithm = BodeAlgorithm(
@@ -177,10 +240,11 @@ class MainWindow(QMainWindow, Ui_LabToolWindow):
                 self.oscilloscope_settings_dialog.make_acquire_setup(),
                 self.oscilloscope_settings_dialog.make_timebase_setup(),
                 self.generator_settings_dialog.make_generator_setup(),
-                self.generator_settings_dialog.make_preferences_setup()
+                self.generator_settings_dialog.make_preferences_setup(BodeAlgorithm)
             )
 
             dialog = OutputDialog(algorithm)
+            self.start_estimate(dialog, BodeAlgorithm, self.bode_dialog.make_requirements())
             dialog.exec()
 
     def on_impedance(self):
@@ -194,10 +258,11 @@ class MainWindow(QMainWindow, Ui_LabToolWindow):
                 self.oscilloscope_settings_dialog.make_acquire_setup(),
                 self.oscilloscope_settings_dialog.make_timebase_setup(),
                 self.generator_settings_dialog.make_generator_setup(),
-                self.generator_settings_dialog.make_preferences_setup()
+                self.generator_settings_dialog.make_preferences_setup(ImpedanceAlgorithm)
             )
 
             dialog = OutputDialog(algorithm)
+            self.start_estimate(dialog, ImpedanceAlgorithm, self.impedance_dialog.make_requirements())
             dialog.exec()
 
 
@@ -0,0 +1,60 @@
+# python native modules
+import json
+import os
+
+from math import log10
+
+# third-party modules
+
+# labtool project modules
+from labtool.oscilloscope.base.oscilloscope import Oscilloscope
+
+
+class AutoscaleCache(object):
+    """ Persistent cache of the autoscale settings found at each frequency, used to seed repeated
+    sweeps of the same kind of system. Entries are keyed by a setup signature, made of the channels,
+    their probe and coupling, the generator amplitude and a frequency bin, and they store the vertical
+    range of each channel and the timebase range. """
+
+    # Frequency bins used in the signature, per decade
+    bins_per_decade = 20
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.entries = {}
+
+        if os.path.exists(filepath):
+            with open(filepath, "r") as file:
+                self.entries = json.load(file)
+
+    @staticmethod
+    def make_signature(channels: list, channel_setup: dict, generator_setup: dict, frequency: float) -> str:
+        """ Returns the setup signature of the given channels measured at the given frequency """
+        return "{}|probe={}|coupling={}|amplitude={}|bin={}".format(
+            ",".join([str(Oscilloscope.source_to_channel(channel)) for channel in channels]),
+            channel_setup.get("probe"),
+            channel_setup["coupling"].value if "coupling" in channel_setup.keys() else None,
+            generator_setup.get("amplitude"),
+            round(log10(frequency) * AutoscaleCache.bins_per_decade)
+        )
+
+    def get(self, signature: str) -> dict:
+        """ Returns the cached entry of the signature, or None if there is not one.
+            [Return] {
+                "ranges": { channel_number: vertical_range },
+                "timebase-range": timebase_range
+            }
+            """
+        return self.entries.get(signature)
+
+    def store(self, signature: str, ranges: dict, timebase_range: float):
+        """ Stores the vertical range of each channel number and the timebase range of the signature """
+        self.entries[signature] = {
+            "ranges": {str(channel): value for channel, value in ranges.items()},
+            "timebase-range": timebase_range
+        }
+
+    def save(self):
+        """ Writes the cache to its file """
+        with open(self.filepath, "w") as file:
+            json.dump(self.entries, file, indent=4)
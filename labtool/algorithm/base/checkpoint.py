@@ -0,0 +1,86 @@
+# python native modules
+from enum import Enum
+
+import hashlib
+import json
+import os
+
+# third-party modules
+
+# labtool project modules
+
+
+class Checkpoint(object):
+    """ Checkpoint file of a running measurement, where each completed point is appended as a JSON line
+    and flushed to disk at once, so the points survive a crash or a stopped run. The first line holds
+    the hash of the setup, so only a run with the same setup can resume from it, and a finished mark
+    is written when the measurement is done, after which it can not be resumed anymore. """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.file = None
+
+    @staticmethod
+    def make_hash(*setups) -> str:
+        """ Returns the hash of the given setup dictionaries """
+        def encode(value):
+            if isinstance(value, Enum):
+                return value.value
+            if hasattr(value, "item"):
+                return value.item()
+            return str(value)
+        return hashlib.sha1(json.dumps(setups, sort_keys=True, default=encode).encode()).hexdigest()
+
+    def load(self, setup_hash: str) -> list:
+        """ Returns the records of an unfinished run with the given setup hash, or an empty list if the
+        file does not exist, was made with another setup or was finished. A last line partially written
+        by a crash is ignored. """
+        if not os.path.exists(self.filepath):
+            return []
+
+        records = []
+        with open(self.filepath, "r") as file:
+            lines = file.read().splitlines()
+        for index, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+
+            if index == 0:
+                if record.get("setup-hash") != setup_hash:
+                    return []
+            elif record.get("finished", False):
+                return []
+            else:
+                records.append(record)
+        return records
+
+    def start(self, setup_hash: str, resume: bool = False):
+        """ Opens the checkpoint file, keeping its records when resuming, otherwise a new one is written """
+        records = self.load(setup_hash) if resume else []
+        self.file = open(self.filepath, "w")
+        self.write({"setup-hash": setup_hash})
+        for record in records:
+            self.write(record)
+
+    def append(self, record: dict):
+        """ Appends a completed record """
+        if self.file is not None:
+            self.write(record)
+
+    def finish(self):
+        """ Marks the run as finished and closes the file """
+        if self.file is not None:
+            self.write({"finished": True})
+            self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, default=lambda value: value.item()) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
@@ -1,10 +1,15 @@
 # python native modules
+from time import sleep
 
 # third-party modules
 from PyQt5.QtCore import pyqtSignal
 
 # labtool project modules
+from labtool.algorithm.base.checkpoint import Checkpoint
+from labtool.algorithm.base.timing_model import TimingModel
+
 from labtool.oscilloscope.base.oscilloscope import Oscilloscope
+from labtool.oscilloscope.base.oscilloscope import Sources
 from labtool.generator.base.generator import Generator
 
 
@@ -12,8 +17,14 @@ class MeasureAlgorithm(object):
     """ Base class of a MeasureAlgorithm. Defines the way all algorithms
     are instantiated, by receiving the same data to connect with devices
     and set up values.
+        [Preferences]
+            + checkpoint-file: File path where completed points are saved while measuring, to resume
+                an unfinished run with the same setup
     """
 
+    # Margin of the vertical range over the signal peak to peak value
+    vertical_margin = 0.1
+
     def __init__(self,
                  oscilloscope: Oscilloscope,
                  generator: Generator,
@@ -43,6 +54,19 @@ class MeasureAlgorithm(object):
         self.result = None
         self.finished = False
 
+        # Instrument settings, tracked to avoid sending them again, and timing of the waits
+        self.timing_model = TimingModel(self.preferences_setup)
+        self.timebase_range = None
+        self.timebase_position = None
+        self.channel_ranges = {}
+        self.default_timeout = None
+
+        # Checkpoint of the completed points
+        self.checkpoint = None
+        self.resumed = False
+        if self.preferences_setup.get("checkpoint-file") is not None:
+            self.checkpoint = Checkpoint(self.preferences_setup["checkpoint-file"])
+
     def progress(self, progress: int):
         if self.progress_callback is not None:
             self.progress_callback.emit(progress)
@@ -54,14 +78,182 @@ class MeasureAlgorithm(object):
     def finish(self):
         self.finished = True
 
+    def wait(self, seconds: float):
+        """ Waits the given time for the instruments or the system under test, every wait of the
+        algorithms goes through here so a dry run can account for it without sleeping """
+        sleep(seconds)
+
+    ############################
+    # INSTRUMENT SETUP HELPERS #
+    ############################
+
+    def set_timebase_range(self, time_range: float):
+        """ Sets the timebase range of the oscilloscope, keeping track of it for the timing model.
+        Nothing is sent when it does not change. """
+        if time_range != self.timebase_range:
+            self.oscilloscope.set_timebase_range(time_range)
+            self.timebase_range = time_range
+
+    def set_timebase_position(self, position: float):
+        """ Sets the timebase position of the oscilloscope, nothing is sent when it does not change """
+        if position != self.timebase_position:
+            self.oscilloscope.set_timebase_position(position)
+            self.timebase_position = position
+
+    def set_timeout(self, timeout: float):
+        """ Sets the timeout of the oscilloscope's queries, keeping the one it had before the measurement
+        so it can be restored when done """
+        if self.default_timeout is None:
+            self.default_timeout = self.oscilloscope.get_timeout()
+        self.oscilloscope.set_timeout(timeout)
+
+    def restore_timeout(self):
+        """ Restores the timeout the oscilloscope had before the measurement """
+        if self.default_timeout is not None:
+            self.oscilloscope.set_timeout(self.default_timeout)
+            self.default_timeout = None
+
+    def set_channel_range(self, source: Sources, channel_range: float):
+        """ Sets the vertical range of the channel, nothing is sent when it does not change """
+        if self.channel_ranges.get(source) != channel_range:
+            self.oscilloscope.set_range(Oscilloscope.source_to_channel(source), channel_range)
+            self.channel_ranges[source] = channel_range
+
+    def is_vertical_scaled(self, source: Sources, channel_vpp: float) -> bool:
+        """ Returns whether the signal of the source fits in the given channel range, without being
+        smaller than half the range the vertical autoscale would have chosen for it. """
+        signal_vpp = float(self.oscilloscope.measure_vpp(source))
+        return channel_vpp / (1 + self.vertical_margin) / 2 < signal_vpp < channel_vpp
+
+    def vertical_scale(self, source: Sources):
+        """ Auto scaling the vertical axis of the Oscilloscope for the given source """
+        margin = self.vertical_margin
+        pattern = [1, 2, 5, 10, 20, 50]
+        current = 0
+        scale_complete = False
+        while not scale_complete:
+            signal_vpp = max(
+                float(self.oscilloscope.measure_vpp(source)),
+                float(self.oscilloscope.measure_vmax(source)),
+                float(self.oscilloscope.measure_vmin(source))
+            )
+            channel_vpp = float(self.oscilloscope.get_range(Oscilloscope.source_to_channel(source)))
+            if signal_vpp < channel_vpp:
+                signal_vpp = float(self.oscilloscope.measure_vpp(source))
+                self.channel_ranges.pop(source, None)
+                self.set_channel_range(source, signal_vpp * (1 + margin))
+                scale_complete = True
+            else:
+                self.oscilloscope.set_scale(Oscilloscope.source_to_channel(source), pattern[current])
+                current += 1
+
+    def vertical_offset_scale(self, source: Sources):
+        """ Auto scaling the vertical axis of the Oscilloscope for the given source, centering the channel
+        offset at the middle of the signal, so its DC level is kept inside the range """
+        channel = Oscilloscope.source_to_channel(source)
+        pattern = [1, 2, 5, 10, 20, 50]
+        current = 0
+        self.oscilloscope.set_offset(channel, 0)
+        while True:
+            signal_max = float(self.oscilloscope.measure_vmax(source))
+            signal_min = float(self.oscilloscope.measure_vmin(source))
+            channel_vpp = float(self.oscilloscope.get_range(channel))
+            if max(abs(signal_max), abs(signal_min)) < channel_vpp / 2 or current >= len(pattern):
+                break
+            self.oscilloscope.set_scale(channel, pattern[current])
+            self.channel_ranges.pop(source, None)
+            current += 1
+
+        self.oscilloscope.set_offset(channel, (signal_max + signal_min) / 2)
+        self.set_channel_range(source, (signal_max - signal_min) * (1 + self.vertical_margin))
+
+    def fetch_statistics(self, measurements: list, count: int) -> list:
+        """ Returns the statistics of the given measurements, as (measure, source, reference_source) tuples,
+        computed by the oscilloscope over the given number of acquisitions and fetched with a single query.
+        Measurements are grouped only when they do not fit the oscilloscope's maximum at once.
+        Statistics not completed before the timeout are flagged with an infinite mean, as the invalid
+        values of the oscilloscope, so they are not taken as valid.
+            [Return] Returns the results of Oscilloscope.get_measure_results(), in the given order.
+            """
+        timeout = self.timing_model.timeout(1 / self.timebase_range, self.timebase_range, count)
+        group_size = self.oscilloscope.max_measurements
+
+        results = []
+        for index in range(0, len(measurements), group_size):
+            group = measurements[index:index + group_size]
+            self.oscilloscope.clear_measurements()
+            for measure, source, reference_source in group:
+                self.oscilloscope.add_measurement(measure, source, reference_source)
+            group_results = self.oscilloscope.fetch_measure_statistics(count, timeout)[:len(group)]
+            group_results += [{"mean": float("inf"), "std-dev": float("inf"), "count": 0} for _ in group[len(group_results):]]
+
+            for result in group_results:
+                if result["count"] < count:
+                    self.log("Statistics completed over {} of {} acquisitions".format(result["count"], count))
+                    result["mean"] = float("inf")
+            results += group_results
+        return results
+
+    ######################
+    # CHECKPOINT HELPERS #
+    ######################
+
+    def make_setup_hash(self) -> str:
+        """ Returns the hash identifying the setup of the measurement """
+        preferences_setup = {
+            key: value for key, value in self.preferences_setup.items() if key != "checkpoint-file"
+        }
+        return Checkpoint.make_hash(
+            type(self).__name__,
+            self.requirements,
+            self.channel_setup,
+            self.trigger_setup,
+            self.acquire_setup,
+            self.timebase_setup,
+            self.generator_setup,
+            preferences_setup
+        )
+
+    def can_resume(self) -> bool:
+        """ Returns whether the checkpoint has points of an unfinished run with the same setup """
+        return self.checkpoint is not None and len(self.checkpoint.load(self.make_setup_hash())) > 0
+
+    def resume(self):
+        """ Restores the points of the unfinished run saved in the checkpoint, to continue from them.
+        It must be called after reset(). """
+        self.restore(self.checkpoint.load(self.make_setup_hash()))
+        self.resumed = True
+
+    def start_checkpoint(self):
+        """ Starts saving the completed points, keeping the previous ones when resuming """
+        if self.checkpoint is not None:
+            self.checkpoint.start(self.make_setup_hash(), self.resumed)
+
+    def save_checkpoint(self, record: dict):
+        """ Saves a completed point to the checkpoint """
+        if self.checkpoint is not None:
+            self.checkpoint.append(record)
+
+    def finish_checkpoint(self):
+        """ Marks the checkpoint as finished, it can not be resumed anymore """
+        if self.checkpoint is not None:
+            self.checkpoint.finish()
+
+    def restore(self, records: list):
+        raise NotImplementedError
+
     def __call__(self, *args, **kwargs):
-        raise NotImplemented
+        raise NotImplementedError
 
     def what(self) -> str:
-        raise NotImplemented
+        raise NotImplementedError
+
+    def get_phase(self) -> str:
+        """ Returns the name of the current phase of the measurement, the state of its FSM """
+        return "Measuring"
 
     def reset(self):
-        raise NotImplemented
+        raise NotImplementedError
 
     def get_result(self):
-        raise NotImplemented
+        raise NotImplementedError
@@ -0,0 +1,70 @@
+# python native modules
+from threading import Thread
+from queue import Queue
+from queue import Empty
+
+# third-party modules
+
+# labtool project modules
+
+
+class PipelineExecutor(object):
+    """ Runs the host side processing of the measured steps on a worker thread, so the algorithm
+    can set up the instruments for the next step while the previous one is still being processed.
+    Both queues are bounded by the given depth, submitting blocks while the worker is that many
+    steps behind, so the memory used by raw data does not grow with the sweep.
+    The processing function must not access the instruments.
+    """
+
+    def __init__(self, function, depth: int = 2):
+        self.function = function
+        self.pending = Queue(maxsize=depth)
+        self.processed = Queue()
+        self.error = None
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """ Processes submitted steps until the stop mark is received """
+        while True:
+            arguments = self.pending.get()
+            if arguments is None:
+                break
+            if self.error is None:
+                try:
+                    self.processed.put(self.function(*arguments))
+                except Exception as error:
+                    self.error = error
+
+    def submit(self, *arguments):
+        """ Queues the arguments of the processing function, blocking while the queue is full """
+        self.raise_error()
+        self.pending.put(arguments)
+
+    def collect(self) -> list:
+        """ Returns the results already processed, without waiting for the pending ones """
+        self.raise_error()
+        results = []
+        while True:
+            try:
+                results.append(self.processed.get_nowait())
+            except Empty:
+                return results
+
+    def join(self) -> list:
+        """ Waits for every pending step, stops the worker thread and returns the remaining results """
+        self.stop()
+        return self.collect()
+
+    def stop(self):
+        """ Stops the worker thread once the pending steps are processed, their results are kept
+        and can still be collected """
+        if self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+
+    def raise_error(self):
+        """ Raises in the caller's thread the error raised by the processing function, if any """
+        if self.error is not None:
+            raise self.error
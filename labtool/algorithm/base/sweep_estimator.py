@@ -0,0 +1,199 @@
+# python native modules
+from math import floor
+
+# third-party modules
+import numpy
+
+# labtool project modules
+from labtool.algorithm.bode_algorithm import BodeStates
+
+from labtool.tool import MeasureMode
+
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+
+
+class SweepEstimator(object):
+    """ Estimates the wall time and the number of commands of a measurement, usually a bode sweep,
+    before running it.
+    The algorithm runs with the same setup dictionaries against dry run instances of the instrument
+    classes, which account every command with their latency model, while waits are accounted instead
+    of slept. Costs are split in phases, named by the states of the algorithm.
+
+    Readings of a dry run are not real, so invalid points are never measured again, the autoscale
+    cache, the checkpoint and the live fit are not used, and adaptive averaging is estimated with its
+    smallest average count.
+
+    In budget mode, the settle time, the averaging and the number of samples are reduced, in that order,
+    until the estimated time fits the given time limit.
+    """
+
+    # Lower limits of the settings reduced to fit a time budget
+    min_samples = 10
+    min_settle_periods = 3
+    min_stable_time = 0.05
+
+    def __init__(self,
+                 algorithm_class,
+                 oscilloscope_class,
+                 generator_class,
+                 requirements: dict,
+                 channel_setup: dict,
+                 trigger_setup: dict,
+                 acquire_setup: dict,
+                 timebase_setup: dict,
+                 generator_setup: dict,
+                 preferences_setup: dict):
+        self.algorithm_class = algorithm_class
+        self.oscilloscope_class = oscilloscope_class
+        self.generator_class = generator_class
+        self.requirements = requirements
+        self.channel_setup = channel_setup
+        self.trigger_setup = trigger_setup
+        self.acquire_setup = acquire_setup
+        self.timebase_setup = timebase_setup
+        self.generator_setup = generator_setup
+        self.preferences_setup = preferences_setup
+
+    def estimate(self, acquire_setup: dict = None, preferences_setup: dict = None) -> dict:
+        """ Estimates the sweep with the given acquire and preferences setups, by default the ones of the estimator.
+            [Return] Returns a dictionary with the estimated time, in seconds, and number of commands.
+                return = {
+                    "total-time": value_of_time,
+                    "total-commands": value_of_commands,
+                    "phases": {
+                        phase_name: {"time": value_of_time, "commands": value_of_commands}
+                    }
+                }
+                """
+        acquire_setup = dict(self.acquire_setup if acquire_setup is None else acquire_setup)
+        preferences_setup = dict(self.preferences_setup if preferences_setup is None else preferences_setup)
+        preferences_setup["retry-budget"] = 0
+        preferences_setup["pipelined"] = False
+        preferences_setup.pop("autoscale-cache", None)
+        preferences_setup.pop("checkpoint-file", None)
+        preferences_setup.pop("live-fit-order", None)
+
+        oscilloscope = self.oscilloscope_class.dry_run()
+        generator = self.generator_class.dry_run()
+        resources = [oscilloscope.resource, generator.resource]
+        waits = {}
+
+        algorithm = self.algorithm_class(
+            oscilloscope,
+            generator,
+            dict(self.requirements),
+            self.channel_setup,
+            self.trigger_setup,
+            acquire_setup,
+            self.timebase_setup,
+            self.generator_setup,
+            preferences_setup
+        )
+
+        def wait(seconds: float):
+            waits[algorithm.get_phase()] = waits.get(algorithm.get_phase(), 0) + seconds
+        algorithm.wait = wait
+
+        with numpy.errstate(all="ignore"):
+            while not algorithm.finished:
+                phase = algorithm.get_phase()
+                for resource in resources:
+                    resource.phase = phase
+
+                # Digitized acquisitions block the next query until they are completed,
+                # and so do statistics until they are computed over their acquisitions
+                digitized = preferences_setup.get("frozen-frame", False)
+                digitized |= preferences_setup.get("measure-mode", MeasureMode.Scope) is not MeasureMode.Scope
+                digitized |= bool(preferences_setup.get("statistics-count"))
+                if digitized and getattr(algorithm, "bode_state", None) is BodeStates.DOWNLOAD_DATA:
+                    average_count = 1
+                    if acquire_setup.get("acquire-mode", AcquireMode.Normal) is AcquireMode.Average:
+                        average_count = acquire_setup.get("average-count", 1)
+                    if preferences_setup.get("measure-mode", MeasureMode.Scope) is MeasureMode.Scope:
+                        average_count *= preferences_setup.get("statistics-count") or 1
+                    wait(algorithm.timing_model.acquisition_time(
+                        algorithm.bode_plan[algorithm.bode_step],
+                        algorithm.timebase_range,
+                        average_count
+                    ))
+
+                algorithm()
+
+        phases = {}
+        for phase, seconds in waits.items():
+            phases[phase] = {"time": seconds, "commands": 0}
+        for resource in resources:
+            for phase, cost in resource.costs.items():
+                phase_cost = phases.setdefault(phase, {"time": 0, "commands": 0})
+                phase_cost["time"] += cost["time"]
+                phase_cost["commands"] += cost["commands"]
+
+        return {
+            "total-time": sum([cost["time"] for cost in phases.values()]),
+            "total-commands": sum([cost["commands"] for cost in phases.values()]),
+            "phases": phases
+        }
+
+    def fit_budget(self, time_limit: float) -> dict:
+        """ Reduces the settings of the sweep until its estimated time fits the given time limit, in seconds.
+            [Return] Returns a dictionary with the reduced setups, the estimate and whether it fits the limit.
+                return = {
+                    "acquire-setup": reduced_acquire_setup,
+                    "preferences-setup": reduced_preferences_setup,
+                    "estimate": estimate_of_the_reduced_setups,
+                    "fits": estimated_time_fits_the_limit
+                }
+                """
+        acquire_setup = dict(self.acquire_setup)
+        preferences_setup = dict(self.preferences_setup)
+
+        estimate = self.estimate(acquire_setup, preferences_setup)
+        while estimate["total-time"] > time_limit:
+            if not self.reduce(acquire_setup, preferences_setup, estimate, time_limit):
+                break
+            estimate = self.estimate(acquire_setup, preferences_setup)
+
+        return {
+            "acquire-setup": acquire_setup,
+            "preferences-setup": preferences_setup,
+            "estimate": estimate,
+            "fits": estimate["total-time"] <= time_limit
+        }
+
+    def reduce(self, acquire_setup: dict, preferences_setup: dict, estimate: dict, time_limit: float) -> bool:
+        """ Reduces one of the settings of the sweep, returns False when none can be reduced """
+        if preferences_setup.get("adaptive-timing", False):
+            settle_periods = preferences_setup.get("settle-periods", 10)
+            if settle_periods > self.min_settle_periods:
+                preferences_setup["settle-periods"] = max(settle_periods // 2, self.min_settle_periods)
+                return True
+        elif preferences_setup["stable-time"] > self.min_stable_time:
+            preferences_setup["stable-time"] = max(preferences_setup["stable-time"] / 2, self.min_stable_time)
+            return True
+
+        if acquire_setup.get("acquire-mode", AcquireMode.Normal) is AcquireMode.Average:
+            average_count = acquire_setup.get("average-count", 1) // 2
+            if average_count > 1:
+                acquire_setup["average-count"] = average_count
+            else:
+                acquire_setup.pop("average-count", None)
+                acquire_setup["acquire-mode"] = AcquireMode.Normal
+            return True
+        if preferences_setup.get("adaptive-averaging", False) and preferences_setup.get("max-average-count", 256) > 1:
+            preferences_setup["max-average-count"] = preferences_setup.get("max-average-count", 256) // 2
+            return True
+
+        # Samples are reduced at once, assuming the cost of each point is the same
+        samples = preferences_setup["samples"]
+        if samples > self.min_samples:
+            fixed_time = sum([
+                cost["time"] for phase, cost in estimate["phases"].items()
+                if phase not in [BodeStates.STEP_SETUP.value, BodeStates.DOWNLOAD_DATA.value]
+            ])
+            point_time = max(estimate["total-time"] - fixed_time, 1e-9) / samples
+            preferences_setup["samples"] = max(
+                min(int(floor((time_limit - fixed_time) / point_time)), samples - 1),
+                self.min_samples
+            )
+            return True
+        return False
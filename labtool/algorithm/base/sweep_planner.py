@@ -0,0 +1,126 @@
+# python native modules
+from math import ceil, floor, log10
+
+# third-party modules
+
+# labtool project modules
+from labtool.tool import SweepOrder
+
+
+class SweepPlanner(object):
+    """ Plans the order in which the points of a sweep are measured. The Sequential order goes
+    from the start to the stop frequency, the CoarseToFine order interleaves the points so the
+    whole band is previewed early and refined later, and the MinimumCost order groups the points
+    sharing the same instrument settings to minimize the reconfiguration cost.
+
+    The cost model charges timebase-cost seconds, by default 0.1, when the timebase range changes,
+    and range-cost seconds, by default 0.05, for each channel whose vertical range changes. Timebase
+    ranges are rounded up to the 1-2-5 sequence, and vertical ranges to the 1-2-5 sequence of volts per
+    division, so close frequencies and signals share them. Vertical ranges are predicted from previous
+    sweeps when known, otherwise they are expected to change every point, and as the timebase ranges of
+    a sorted sweep never come back, the plan is then the Sequential order.
+    """
+
+    # Vertical divisions of the oscilloscope's screen
+    vertical_divisions = 8
+
+    # Largest ratio between a rounded up value and the original one, from 2 to 5 in the 1-2-5 sequence
+    quantization_ratio = 2.5
+
+    def __init__(self, preferences_setup: dict):
+        self.order = preferences_setup.get("sweep-order", SweepOrder.Sequential)
+        self.timebase_cost = preferences_setup.get("timebase-cost", 0.1)
+        self.range_cost = preferences_setup.get("range-cost", 0.05)
+
+    @property
+    def quantized(self) -> bool:
+        """ Returns whether timebase ranges should be rounded to the 1-2-5 sequence """
+        return self.order is SweepOrder.MinimumCost
+
+    @staticmethod
+    def quantize_timebase(time_range: float) -> float:
+        """ Rounds up the timebase range to the closest value of the 1-2-5 sequence """
+        return round_up_125(time_range)
+
+    @staticmethod
+    def quantize_range(channel_range: float) -> float:
+        """ Rounds up the vertical range to the closest one with a volts per division value of the 1-2-5 sequence """
+        divisions = SweepPlanner.vertical_divisions
+        return divisions * round_up_125(channel_range / divisions)
+
+    def transition_cost(self, current: tuple, following: tuple) -> float:
+        """ Returns the cost of changing the settings, given as (timebase_range, vertical_ranges) """
+        cost = self.timebase_cost if current[0] != following[0] else 0
+        if current[1] is None or following[1] is None:
+            return cost + self.range_cost * len(following[1] or current[1] or [None])
+        return cost + self.range_cost * sum([a != b for a, b in zip(current[1], following[1])])
+
+    def plan_cost(self, settings: list, order: list) -> float:
+        """ Returns the total reconfiguration cost of measuring the points in the given order """
+        return sum([self.transition_cost(settings[a], settings[b]) for a, b in zip(order[:-1], order[1:])])
+
+    def plan(self, frequencies: list, periods: float = 2, predicted_ranges: list = None) -> list:
+        """ Returns the list of indexes of the frequencies in the order they should be measured.
+            [Options]
+                + periods: Periods of each frequency shown in the timebase range
+                + predicted_ranges: Tuple of vertical ranges expected at each frequency, or None if unknown
+                """
+        count = len(frequencies)
+        if self.order is SweepOrder.CoarseToFine:
+            return coarse_to_fine(count)
+        if self.order is not SweepOrder.MinimumCost:
+            return list(range(count))
+
+        if predicted_ranges is None:
+            predicted_ranges = [None] * count
+        settings = [
+            (
+                self.quantize_timebase(periods / frequency),
+                tuple(map(self.quantize_range, predicted_range)) if predicted_range is not None else None
+            )
+            for frequency, predicted_range in zip(frequencies, predicted_ranges)
+        ]
+
+        # Grouping the points sharing the same settings, and ordering the groups greedily,
+        # always following with the cheapest group to move to
+        groups = {}
+        for index in sorted(range(count), key=lambda i: frequencies[i]):
+            groups.setdefault(settings[index], []).append(index)
+
+        pending = list(groups.keys())
+        current = settings[min(range(count), key=lambda i: frequencies[i])]
+        order = []
+        while pending:
+            following = min(pending, key=lambda group: self.transition_cost(current, group))
+            order.extend(groups[following])
+            pending.remove(following)
+            current = following
+
+        sequential = list(range(count))
+        return order if self.plan_cost(settings, order) < self.plan_cost(settings, sequential) else sequential
+
+
+#############
+# Functions #
+#############
+
+def round_up_125(value: float) -> float:
+    """ Rounds up the value to the closest one of the 1-2-5 sequence """
+    decade = 10 ** floor(log10(value))
+    for step in [1, 2, 5, 10]:
+        if value <= step * decade * (1 + 1e-9):
+            return step * decade
+
+
+def coarse_to_fine(count: int) -> list:
+    """ Returns the indexes of count points ordered from coarse to fine, starting by both ends
+    and halving the spacing between measured points on each pass. """
+    if count < 3:
+        return list(range(count))
+
+    order = [0, count - 1]
+    step = 2 ** ceil(log10(count - 1) / log10(2))
+    while step > 1:
+        step //= 2
+        order.extend([index for index in range(step, count - 1, step) if index not in order])
+    return order
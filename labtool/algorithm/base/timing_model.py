@@ -0,0 +1,42 @@
+# python native modules
+
+# third-party modules
+
+# labtool project modules
+
+
+class TimingModel(object):
+    """ Timing model of a frequency sweep, computing the minimum waiting times of each point
+    from the excitation period, instead of using the same constant time for every frequency.
+        [Preferences]
+            + adaptive-timing: Enables the model, otherwise stable-time is always used to settle
+            + stable-time: Settle time used when the model is disabled, by default 0.1 seconds
+            + settle-periods: Excitation periods waited to settle, by default 10
+            + dut-time-constant: Hint of the slowest time constant of the system, by default 0
+            + settle-time-constants: Time constants waited to settle, by default 5 (less than 1% error)
+            + rearm-time: Dead time of the oscilloscope between acquisitions, by default 0
+            """
+
+    def __init__(self, preferences_setup: dict):
+        self.adaptive = preferences_setup.get("adaptive-timing", False)
+        self.stable_time = preferences_setup.get("stable-time", 0.1)
+        self.settle_periods = preferences_setup.get("settle-periods", 10)
+        self.time_constant = preferences_setup.get("dut-time-constant", 0)
+        self.settle_time_constants = preferences_setup.get("settle-time-constants", 5)
+        self.rearm_time = preferences_setup.get("rearm-time", 0)
+
+    def settle_time(self, frequency: float) -> float:
+        """ Returns the time waited after changing the excitation frequency, before measuring """
+        if not self.adaptive:
+            return self.stable_time
+        return max(self.settle_periods / frequency, self.settle_time_constants * self.time_constant)
+
+    def acquisition_time(self, frequency: float, timebase_range: float, average_count: int = 1) -> float:
+        """ Returns the time needed to complete the acquisition of a new, optionally averaged, waveform.
+        Each acquisition lasts the longest of the timebase range and the trigger period, which is
+        the excitation period. """
+        return average_count * (max(timebase_range, 1 / frequency) + self.rearm_time)
+
+    def timeout(self, frequency: float, timebase_range: float, average_count: int = 1) -> float:
+        """ Returns the timeout of queries waiting for an acquisition, with margin over its expected time """
+        return 2 * self.acquisition_time(frequency, timebase_range, average_count) + 2
@@ -1,21 +1,39 @@
 # python native modules
 from enum import Enum
-from time import sleep
-from numpy import logspace, log10
+from numpy import logspace, log10, degrees, radians, exp, ceil, log2, std, mean, sqrt, array, isfinite, logical_and, ptp
 
 # third-party modules
 
 # labtool project modules
 from labtool.algorithm.base.measure_algorithm import MeasureAlgorithm
+from labtool.algorithm.base.autoscale_cache import AutoscaleCache
+from labtool.algorithm.base.sweep_planner import SweepPlanner
+from labtool.algorithm.base.pipeline import PipelineExecutor
+
+from labtool.analysis.sine_fit import sine_fit
+from labtool.analysis.sine_fit import sine_fit_uncertainty
+from labtool.analysis.sine_fit import single_bin_dft
+from labtool.analysis.sine_fit import wrap_phase
+from labtool.analysis.vector_fitting import vector_fit
+from labtool.analysis.vector_fitting import required_points
+from labtool.analysis.vector_fitting import LiveVectorFit
+from labtool.analysis.phase import unwrap_phase
+from labtool.analysis.phase import group_delay
+from labtool.analysis.phase import refine_frequencies
 
 from labtool.tool import LabTool
 from labtool.tool import BodeScale
+from labtool.tool import MeasureMode
 
 from labtool.base.instrument import InstrumentType
 
 from labtool.generator.base.generator import Waveform
 from labtool.generator.base.generator import OutputLoad
 from labtool.generator.base.generator import OutputMode
+from labtool.generator.base.generator import SyncMode
+from labtool.generator.base.generator import BurstMode
+from labtool.generator.base.generator import BurstState
+from labtool.generator.base.generator import TriggerSource
 
 from labtool.oscilloscope.base.oscilloscope import Sources
 from labtool.oscilloscope.base.oscilloscope import Coupling
@@ -25,9 +43,21 @@ from labtool.oscilloscope.base.oscilloscope import TriggerSlope
 from labtool.oscilloscope.base.oscilloscope import Sources
 from labtool.oscilloscope.base.oscilloscope import Oscilloscope
 from labtool.oscilloscope.base.oscilloscope import AcquireMode
+from labtool.oscilloscope.base.oscilloscope import Measure
 from labtool.oscilloscope.base.oscilloscope import TimebaseMode
 
 
+################################
+# Bode module exceptions       #
+################################
+
+class BurstAcquisitionError(Exception):
+    def __init__(self):
+        super(BurstAcquisitionError, self).__init__(
+            "The oscilloscope could not be armed, or did not capture the burst, in a single acquisition"
+        )
+
+
 class BodeStates(Enum):
     """ Internal states for defining a Bode simple FSM
     when working with the oscilloscope and the generator. """
@@ -38,6 +68,60 @@ class BodeStates(Enum):
 
 
 class BodeAlgorithm(MeasureAlgorithm):
+    """ Measures the bode plot of the system point by point, exciting it with a sine at each frequency
+    of the sweep, and measuring the input and up to three output channels with the oscilloscope.
+        [Requirements]
+            + input-channel: Source measuring the input of the system
+            + output-channel: Source measuring the output of the system, or output-channels with a list
+                of up to three of them
+        [Preferences]
+            + start-frequency, stop-frequency, samples, scale: Frequencies of the sweep, with its BodeScale
+            + measure-mode: MeasureMode of each point, by default Scope, using the oscilloscope's measurement
+                queries, while SineFit and DFT download the waveforms and estimate the values on the host
+            + frozen-frame: Digitizes the channels once in Scope mode, so every query reads the same acquisition
+            + statistics-count: When set, Scope mode uses the mean of the oscilloscope's statistics over this
+                number of acquisitions, and adds their spread as the gain and phase noise of each point
+            + waveform-points: Number of points downloaded for each channel, by default 1000
+            + waveform-periods: Periods shown in the timebase range by the waveform modes, by default 4
+            + burst-cycles: When set, the waveform modes acquire each point from a burst of that number of
+                cycles, fired by the bus with the oscilloscope armed for a single acquisition, and triggered
+                by the generator's Sync output on the External input. Vertical ranges are kept from point to
+                point, and only scaled again when a burst does not fit them
+            + burst-skip-cycles: Periods at the start of each burst left out while the system settles, by default 2
+            + adaptive-averaging: Chooses the average count of each point from its estimated noise, by default False
+            + gain-uncertainty, phase-uncertainty: Targets of the adaptive averaging, relative and in degrees,
+                by default 1% and 1 degree
+            + noise-interval: Points between noise estimates of the adaptive averaging, by default 5
+            + noise-readings: Readings whose spread estimates the noise in Scope mode, by default 4
+            + max-average-count: Highest average count, and bursts fired per capture, by default 256
+            + retry-budget: Times an invalid or outlier point is measured again, by default 2
+            + max-phase-jump, max-gain-jump: Steps from the closest measured point, in degrees and dB, beyond
+                which a point is an outlier, by default 90 and 20
+            + max-phase-step: Steps of the phase between neighbours, in degrees, by default 90, beyond which
+                unwrapping is ambiguous, widened by three times their uncertainty
+            + unwrap-uncertainty: Phase uncertainty of points without phase-noise, by default 1 degree
+            + phase-refinements: Rounds measuring the points between ambiguous phase steps, by default 0
+            + sweep-order, timebase-cost, range-cost: Order of the points, see SweepPlanner
+            + autoscale-cache: File path where the vertical ranges of each setup are cached
+            + pipelined: Processes each point of the waveform modes on a worker thread, while the next one is
+                measured, by default False. Points are only validated once processed, so invalid ones are
+                measured again at the end of the sweep, instead of in place. Scope mode is never pipelined,
+                the oscilloscope computes its values and there is no host processing to overlap
+            + pipeline-depth: Points processed behind the measured one, by default 2
+            + live-fit-order: When set, a rational model of that order is fitted to the points while they
+                arrive, and kept in live_fit.fit
+            + live-fit-interval: Points between updates of the live fit, by default 5, which is updated with
+                every point once the sweep is done
+            """
+
+    # Measured values of each output channel, in multi-output measurements
+    channel_fields = ["output-vpp", "bode-module", "bode-phase"]
+
+    # Sync output level used to trigger the oscilloscope, in burst gated measurements
+    sync_level = 1.5
+
+    # Attempts to arm the oscilloscope for the single acquisition of a burst
+    arm_attempts = 3
 
     def __init__(self, *args, **kwargs):
         super(BodeAlgorithm, self).__init__(*args, **kwargs)
@@ -45,6 +129,46 @@ class BodeAlgorithm(MeasureAlgorithm):
         self.bode_state = BodeStates.INITIAL_SETUP
         self.bode_measures = []
         self.bode_step = 0
+        self.bode_retries = 0
+        self.bode_plan = []
+        self.bode_deferred = {}
+        self.bode_refinements = 0
+        self.pipeline = None
+        self.noise_estimate = None
+        self.noise_points = 0
+
+        self.sweep_planner = SweepPlanner(self.preferences_setup)
+
+        self.autoscale_cache = None
+        if self.preferences_setup.get("autoscale-cache") is not None:
+            self.autoscale_cache = AutoscaleCache(self.preferences_setup["autoscale-cache"])
+
+        self.live_fit = None
+        if self.preferences_setup.get("live-fit-order") is not None:
+            self.live_fit = LiveVectorFit(
+                self.preferences_setup["live-fit-order"],
+                interval=self.preferences_setup.get("live-fit-interval", 5)
+            )
+
+    def get_output_channels(self) -> list:
+        """ Returns the list of output channels measured against the input channel. The first one
+        is the main output channel, given by output-channel, unless a list of up to three channels
+        is given by output-channels. """
+        if "output-channels" in self.requirements.keys():
+            output_channels = list(self.requirements["output-channels"])
+        else:
+            output_channels = [self.requirements["output-channel"]]
+
+        if not 0 < len(output_channels) <= 3:
+            raise ValueError("Between one and three output channels can be measured against the input channel.")
+        if self.requirements["input-channel"] in output_channels or len(set(output_channels)) != len(output_channels):
+            raise ValueError("Output channels must be different from each other and from the input channel.")
+        return output_channels
+
+    @staticmethod
+    def channel_field(field: str, source: Sources) -> str:
+        """ Returns the name of the field used for the given output channel in multi-output measurements """
+        return "{}-ch{}".format(field, Oscilloscope.source_to_channel(source))
 
     def compute_frequency(self, step: int):
         min_frequency = self.preferences_setup["start-frequency"]
@@ -62,44 +186,555 @@ class BodeAlgorithm(MeasureAlgorithm):
 
         return result
 
+    def is_scope_mode(self) -> bool:
+        """ Returns whether the points are measured with the oscilloscope's measurement queries,
+        the default measure-mode, instead of from downloaded waveforms """
+        return self.preferences_setup.get("measure-mode", MeasureMode.Scope) is MeasureMode.Scope
+
+    def is_burst_gated(self) -> bool:
+        """ Returns whether the waveforms are acquired from generator bursts, when the burst-cycles
+        preference is set, which is only used by the waveform measure modes """
+        return self.preferences_setup.get("burst-cycles") is not None and not self.is_scope_mode()
+
+    def waveform_periods(self) -> int:
+        """ Returns the periods shown in the timebase range by waveform measurements, the cycles of
+        each burst when gated, or the waveform-periods preference, by default 4 """
+        if self.is_burst_gated():
+            return self.preferences_setup["burst-cycles"]
+        return self.preferences_setup.get("waveform-periods", 4)
+
+    def is_horizontal_scaled(self) -> bool:
+        """ Returns whether the horizontal axis shows enough of the signals to measure their phase """
+        current_phase = float(
+            self.oscilloscope.measure_phase(
+                self.get_output_channels()[0],
+                self.requirements["input-channel"]
+            )
+        )
+        return -180 < current_phase < 180
+
     def horizontal_scale(self, frequency: float):
         """ Auto scaling the horizontal axis of the Oscilloscope for the given source """
         periods = 3
-        scale_complete = False
-        while not scale_complete:
-            current_phase = float(
-                self.oscilloscope.measure_phase(
-                    self.requirements["output-channel"],
-                    self.requirements["input-channel"]
-                )
+        while not self.is_horizontal_scaled():
+            self.set_timebase_range(periods / frequency)
+            periods += 1
+
+    def set_timebase_range(self, time_range: float):
+        """ Sets the timebase range of the oscilloscope, rounded up to the 1-2-5 sequence
+        when the sweep is planned to share settings """
+        if self.sweep_planner.quantized:
+            time_range = SweepPlanner.quantize_timebase(time_range)
+        super(BodeAlgorithm, self).set_timebase_range(time_range)
+
+    def set_channel_range(self, source: Sources, channel_range: float):
+        """ Sets the vertical range of the channel, rounded up to the 1-2-5 sequence of volts per division
+        when the sweep is planned to share settings """
+        if self.sweep_planner.quantized:
+            channel_range = SweepPlanner.quantize_range(channel_range)
+        super(BodeAlgorithm, self).set_channel_range(source, channel_range)
+
+    def is_vertical_scaled(self, source: Sources, channel_vpp: float) -> bool:
+        """ Returns whether the signal of the source fits in the given channel range, as MeasureAlgorithm
+        does, accepting the ranges rounded up to the 1-2-5 sequence when the sweep is planned to share settings """
+        if not self.sweep_planner.quantized:
+            return super(BodeAlgorithm, self).is_vertical_scaled(source, channel_vpp)
+        signal_vpp = float(self.oscilloscope.measure_vpp(source))
+        return channel_vpp / (1 + self.vertical_margin) / SweepPlanner.quantization_ratio < signal_vpp < channel_vpp
+
+    def compute_plan(self) -> list:
+        """ Returns the frequencies of the sweep in the order they are measured, planned by the
+        sweep-order preference. Vertical ranges are predicted from the autoscale cache, when used. """
+        frequencies = [self.compute_frequency(step) for step in range(self.preferences_setup["samples"])]
+        periods = 2 if self.is_scope_mode() else self.waveform_periods()
+
+        predicted_ranges = None
+        if self.autoscale_cache is not None:
+            sources = [self.requirements["input-channel"]] + self.get_output_channels()
+            predicted_ranges = []
+            for frequency in frequencies:
+                signature = AutoscaleCache.make_signature(sources, self.channel_setup, self.generator_setup, frequency)
+                entry = self.autoscale_cache.get(signature)
+                predicted_ranges.append(tuple(entry["ranges"].values()) if entry is not None else None)
+
+        return [frequencies[index] for index in self.sweep_planner.plan(frequencies, periods, predicted_ranges)]
+
+    def scale_step(self, frequency: float):
+        """ Auto scaling both axes of the Oscilloscope for all the channels at the given frequency.
+        When the autoscale-cache preference has a file path, the ranges cached for the same setup
+        are applied and verified first, searching them again only when the verification fails. """
+        sources = [self.requirements["input-channel"]] + self.get_output_channels()
+
+        signature = None
+        if self.autoscale_cache is not None:
+            signature = AutoscaleCache.make_signature(sources, self.channel_setup, self.generator_setup, frequency)
+            entry = self.autoscale_cache.get(signature)
+            if entry is not None:
+                for source in sources:
+                    self.set_channel_range(source, entry["ranges"][str(Oscilloscope.source_to_channel(source))])
+
+                if all([self.is_vertical_scaled(source, self.channel_ranges[source]) for source in sources]):
+                    if not self.is_scope_mode():
+                        self.set_timebase_range(self.waveform_periods() / frequency)
+                        return
+
+                    self.set_timebase_range(entry["timebase-range"])
+                    if self.is_horizontal_scaled():
+                        return
+
+        for source in sources:
+            self.vertical_scale(source)
+        if self.is_scope_mode():
+            self.horizontal_scale(frequency)
+        else:
+            self.set_timebase_range(self.waveform_periods() / frequency)
+
+        if signature is not None:
+            self.autoscale_cache.store(
+                signature,
+                {Oscilloscope.source_to_channel(source): self.channel_ranges[source] for source in sources},
+                self.timebase_range
             )
 
-            if -180 < current_phase < 180:
-                scale_complete = True
-            else:
-                self.oscilloscope.set_timebase_range(periods / frequency)
-                periods += 1
-
-    def vertical_scale(self, source: Sources):
-        """ Auto scaling the vertical axis of the Oscilloscope for the given source """
-        margin = 0.1
-        pattern = [1, 2, 5, 10, 20, 50]
-        current = 0
-        scale_complete = False
-        while not scale_complete:
-            signal_vpp = max(
-                float(self.oscilloscope.measure_vpp(source)),
-                float(self.oscilloscope.measure_vmax(source)),
-                float(self.oscilloscope.measure_vmin(source))
+    def measure_scope(self) -> list:
+        """ Measures the bode values of each output channel using the oscilloscope's measurement queries.
+        When the frozen-frame preference is enabled, all channels are digitized once and every query
+        is run against that stopped acquisition, so values are consistent and no re-acquisition
+        happens between queries. When the statistics-count preference is set, measure_statistics() is used. """
+        if self.preferences_setup.get("statistics-count"):
+            return self.measure_statistics()
+
+        input_channel = self.requirements["input-channel"]
+        frozen_frame = self.preferences_setup.get("frozen-frame", False)
+        if frozen_frame:
+            self.oscilloscope.digitize(input_channel, *self.get_output_channels())
+            self.oscilloscope.operation_complete()
+
+        input_vpp = float(self.oscilloscope.measure_vpp(input_channel))
+        measures = [
+            {
+                "input-vpp": input_vpp,
+                "output-vpp": float(self.oscilloscope.measure_vpp(output_channel)),
+                "bode-module": float(self.oscilloscope.measure_vratio(output_channel, input_channel)),
+                "bode-phase": float(self.oscilloscope.measure_phase(output_channel, input_channel))
+            }
+            for output_channel in self.get_output_channels()
+        ]
+
+        if frozen_frame:
+            self.oscilloscope.run()
+        return measures
+
+    def measure_statistics(self) -> list:
+        """ Measures the bode values of each output channel from the statistics the oscilloscope keeps
+        for its active measurements over statistics-count acquisitions, see fetch_statistics().
+        The module is the ratio of the Vpp of the channels, so a single output channel needs only three
+        measurements, which fit the oscilloscope at once.
+            [Return] Returns the same list of measure_scope(), with the mean values, adding to each channel
+                its "gain-noise" (relative) and "phase-noise" (degrees), the standard deviation of a single reading.
+                """
+        input_channel = self.requirements["input-channel"]
+        output_channels = self.get_output_channels()
+        measurements = [(Measure.Vpp, input_channel, None)]
+        for output_channel in output_channels:
+            measurements.append((Measure.Vpp, output_channel, None))
+            measurements.append((Measure.Phase, output_channel, input_channel))
+
+        results = self.fetch_statistics(measurements, self.preferences_setup["statistics-count"])
+        input_vpp = results[0]
+
+        measures = []
+        for index in range(len(output_channels)):
+            output_vpp, phase = results[1 + 2 * index:3 + 2 * index]
+            module = float("inf")
+            gain_noise = float("inf")
+            if isfinite(input_vpp["mean"]) and isfinite(output_vpp["mean"]) and min(input_vpp["mean"], output_vpp["mean"]) > 0:
+                module = output_vpp["mean"] / input_vpp["mean"]
+                gain_noise = sqrt(
+                    (output_vpp["std-dev"] / output_vpp["mean"]) ** 2 + (input_vpp["std-dev"] / input_vpp["mean"]) ** 2
+                )
+            measures.append(
+                {
+                    "input-vpp": input_vpp["mean"],
+                    "output-vpp": output_vpp["mean"],
+                    "bode-module": module,
+                    "bode-phase": phase["mean"],
+                    "gain-noise": gain_noise,
+                    "phase-noise": phase["std-dev"]
+                }
             )
-            channel_vpp = float(self.oscilloscope.get_range(Oscilloscope.source_to_channel(source)))
-            if signal_vpp < channel_vpp:
-                signal_vpp = float(self.oscilloscope.measure_vpp(source))
-                self.oscilloscope.set_range(Oscilloscope.source_to_channel(source), signal_vpp * (1 + margin))
-                scale_complete = True
+        return measures
+
+    def setup_burst(self):
+        """ Sets up the generator to output a burst of burst-cycles cycles on each bus trigger, and the
+        oscilloscope to trigger on the generator's Sync output, which must be connected to the External
+        trigger input. The output is continuous until the bursts are enabled. """
+        self.generator.set_burst_mode(BurstMode.Triggered)
+        self.generator.set_burst_cycles(self.preferences_setup["burst-cycles"])
+        self.generator.set_trigger_source(TriggerSource.Bus)
+        self.generator.set_sync_mode(SyncMode.ON)
+        self.oscilloscope.setup_trigger(
+            **{
+                "trigger-mode": TriggerMode.Edge,
+                "trigger-sweep": TriggerSweep.Normal,
+                "trigger-edge-source": Sources.External,
+                "trigger-edge-slope": TriggerSlope.Positive,
+                "trigger-edge-level": self.sync_level
+            }
+        )
+
+    def restore_burst(self):
+        """ Restores the continuous output of the generator, triggered by itself, and the trigger setup
+        of the oscilloscope, on the input channel unless given by the trigger setup """
+        self.generator.set_burst_state(BurstState.OFF)
+        self.generator.set_trigger_source(TriggerSource.Immediate)
+        self.set_timebase_position(0)
+        self.oscilloscope.setup_trigger(
+            **{
+                "trigger-mode": TriggerMode.Edge,
+                "trigger-sweep": TriggerSweep.Auto,
+                "trigger-edge-source": self.requirements["input-channel"],
+                **self.trigger_setup
+            }
+        )
+
+    def arm_single(self, timeout: float) -> bool:
+        """ Arms the oscilloscope for a single acquisition, waiting up to the given timeout, in seconds,
+        and stopping it to try again, up to arm_attempts times.
+            [Return] Returns whether the oscilloscope was armed.
+            """
+        for _ in range(self.arm_attempts):
+            if self.oscilloscope.arm_single(timeout):
+                return True
+            self.oscilloscope.stop()
+        return False
+
+    def acquire_burst(self):
+        """ Arms the oscilloscope for a single acquisition, up to arm_attempts times, and fires bursts
+        until it is captured, a single one unless averaging, up to max-average-count bursts, by default 256.
+        The output is back to continuous afterwards, so the channels can be scaled.
+        Raises BurstAcquisitionError when the oscilloscope is not armed or the burst is not captured. """
+        acquisition_time = self.timing_model.acquisition_time(1 / self.timebase_range, self.timebase_range)
+        timeout = self.timing_model.timeout(1 / self.timebase_range, self.timebase_range)
+
+        self.generator.set_burst_state(BurstState.ON)
+        captured = False
+        if self.arm_single(timeout):
+            for _ in range(self.preferences_setup.get("max-average-count", 256)):
+                self.generator.trigger()
+                captured = self.oscilloscope.wait_single(acquisition_time)
+                if captured:
+                    break
+        self.generator.set_burst_state(BurstState.OFF)
+
+        if not captured:
+            self.oscilloscope.run()
+            self.restore_timeout()
+            raise BurstAcquisitionError
+
+    def is_burst_scaled(self, frequency: float, time, voltages) -> bool:
+        """ Returns whether the analysed periods of the burst fit the current range of every channel,
+        without being smaller than half the range the vertical autoscale would have chosen for them """
+        sources = [self.requirements["input-channel"]] + self.get_output_channels()
+        time, voltages = self.gate_waveforms(frequency, time, voltages)
+        for source, waveform in zip(sources, voltages):
+            channel_vpp = self.channel_ranges.get(source)
+            if channel_vpp is None or not channel_vpp / (1 + self.vertical_margin) / 2 < ptp(waveform) < channel_vpp:
+                return False
+        return True
+
+    def gate_waveforms(self, frequency: float, time, voltages):
+        """ Returns the waveforms in the analysed periods of the burst, after the burst-skip-cycles
+        first periods, by default 2, left out while the system settles. The whole waveforms are
+        returned when they are not burst gated. """
+        if not self.is_burst_gated():
+            return time, voltages
+        gate = logical_and(
+            time >= self.preferences_setup.get("burst-skip-cycles", 2) / frequency,
+            time < self.preferences_setup["burst-cycles"] / frequency
+        )
+        return time[gate], voltages[:, gate]
+
+    def acquire_waveforms(self, frequency: float, acquire_setup: dict = None):
+        """ Digitizes the input and output channels at once and downloads their waveforms,
+        from a single acquisition of a burst when burst gated. Bursts keep the vertical ranges
+        of the previous point, which are only scaled again, with the continuous output, when the
+        burst does not fit them, restoring the given acquire setup before acquiring it again. """
+        sources = [self.requirements["input-channel"]] + self.get_output_channels()
+        points = self.preferences_setup.get("waveform-points", 1000)
+        if not self.is_burst_gated():
+            self.oscilloscope.digitize(*sources)
+            time, voltages = self.oscilloscope.download_waveforms(sources, points)
+            self.oscilloscope.run()
+            return time, voltages
+
+        self.acquire_burst()
+        time, voltages = self.oscilloscope.download_waveforms(sources, points)
+        self.oscilloscope.run()
+        if not self.is_burst_scaled(frequency, time, voltages):
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+            self.scale_step(frequency)
+            if acquire_setup is not None:
+                self.oscilloscope.setup_acquire(**acquire_setup)
+            self.acquire_burst()
+            time, voltages = self.oscilloscope.download_waveforms(sources, points)
+            self.oscilloscope.run()
+        return time, voltages
+
+    def measure_waveform(self, frequency: float) -> list:
+        """ Measures the bode values of each output channel by downloading the waveforms of all channels,
+        acquired at once, and estimating the amplitude and phase of each sine on the host at the known frequency. """
+        return self.process_waveform(frequency, *self.acquire_waveforms(frequency))
+
+    def process_waveform(self, frequency: float, time, voltages) -> list:
+        """ Estimates the bode values of each output channel from the downloaded waveforms """
+        sources = [self.requirements["input-channel"]] + self.get_output_channels()
+        time, voltages = self.gate_waveforms(frequency, time, voltages)
+
+        if self.preferences_setup["measure-mode"] is MeasureMode.SineFit:
+            amplitude, phase = sine_fit(time, voltages, frequency)[:2]
+        else:
+            amplitude, phase = single_bin_dft(time, voltages, frequency)
+
+        return [
+            {
+                "input-vpp": 2 * amplitude[0],
+                "output-vpp": 2 * amplitude[index],
+                "bode-module": amplitude[index] / amplitude[0],
+                "bode-phase": wrap_phase(degrees(phase[index] - phase[0]))
+            }
+            for index in range(1, len(sources))
+        ]
+
+    def estimate_noise(self, frequency: float):
+        """ Estimates the standard deviation of a single, non averaged, reading of the bode module
+        (relative to its value) and phase (degrees), keeping the worst one among output channels.
+        Scope measurements repeat noise-readings readings, by default 4, each one digitizing a new
+        acquisition, or use the spread of the oscilloscope's statistics when the statistics-count
+        preference is set. Waveform measurements use the residual of a sine fit of a single acquisition. """
+        if self.is_scope_mode() and self.preferences_setup.get("statistics-count"):
+            measures = self.measure_statistics()
+            gain_noise = [measure["gain-noise"] for measure in measures]
+            phase_noise = [measure["phase-noise"] for measure in measures]
+        elif self.is_scope_mode():
+            # Free running readings could be taken from the same acquisition, so each one is digitized,
+            # which measure_scope already does with the frozen-frame preference
+            frozen_frame = self.preferences_setup.get("frozen-frame", False)
+            sources = [self.requirements["input-channel"]] + self.get_output_channels()
+            readings = []
+            for _ in range(self.preferences_setup.get("noise-readings", 4)):
+                if not frozen_frame:
+                    self.oscilloscope.digitize(*sources)
+                    self.oscilloscope.operation_complete()
+                readings.append(self.measure_scope())
+            if not frozen_frame:
+                self.oscilloscope.run()
+            modules = array([[measure["bode-module"] for measure in reading] for reading in readings])
+            phases = array([[measure["bode-phase"] for measure in reading] for reading in readings])
+            gain_noise = std(modules, axis=0, ddof=1) / mean(modules, axis=0)
+            phase_noise = std(wrap_phase(phases - phases[0]), axis=0, ddof=1)
+        else:
+            time, voltages = self.gate_waveforms(frequency, *self.acquire_waveforms(frequency))
+            amplitude, _, _, residual = sine_fit(time, voltages, frequency)
+            uncertainty = sine_fit_uncertainty(amplitude, residual, len(time))
+            gain_noise = sqrt(uncertainty[1:] ** 2 + uncertainty[0] ** 2)
+            phase_noise = degrees(gain_noise)
+        return max(gain_noise), max(phase_noise)
+
+    def compute_average_count(self, gain_noise: float, phase_noise: float) -> int:
+        """ Returns the smallest power of two average count meeting the gain-uncertainty (relative, by default 1%)
+        and phase-uncertainty (degrees, by default 1) targets, assuming the noise of averaged readings
+        falls with the square root of the count, and limited by max-average-count, by default 256. """
+        ratio = max(
+            gain_noise / self.preferences_setup.get("gain-uncertainty", 0.01),
+            phase_noise / self.preferences_setup.get("phase-uncertainty", 1.0)
+        )
+        max_count = self.preferences_setup.get("max-average-count", 256)
+        if not ratio > 1:
+            return 1
+        if not ratio < sqrt(max_count):
+            return max_count
+        return int(2 ** ceil(log2(ratio ** 2)))
+
+    def adaptive_acquire_setup(self, frequency: float) -> dict:
+        """ Returns the acquire setup with the average count needed at the given frequency. The noise is
+        estimated at the first point, and again every noise-interval points, by default 5, the points in
+        between reuse the last estimate. """
+        if self.noise_estimate is None or self.noise_points >= self.preferences_setup.get("noise-interval", 5):
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+            self.noise_estimate = self.estimate_noise(frequency)
+            self.noise_points = 0
+        self.noise_points += 1
+
+        count = self.compute_average_count(*self.noise_estimate)
+        if count > 1:
+            return {"acquire-mode": AcquireMode.Average, "average-count": count}
+        return {"acquire-mode": AcquireMode.Normal}
+
+    def escalate_acquire_setup(self, acquire_setup: dict) -> dict:
+        """ Returns the acquire setup used to re-measure a point, doubling the average count
+        on each retry, limited by max-average-count, by default 256 """
+        count = 1
+        if acquire_setup.get("acquire-mode") is AcquireMode.Average:
+            count = acquire_setup.get("average-count", 1)
+        count = min(count * 2 ** self.bode_retries, self.preferences_setup.get("max-average-count", 256))
+        return {"acquire-mode": AcquireMode.Average, "average-count": count}
+
+    def find_neighbour(self, frequency: float, field: str) -> dict:
+        """ Returns the already measured point closest in frequency to the given one, with a valid
+        value in the given field, or None if there is not one. """
+        neighbours = [
+            bode_measure for bode_measure in self.bode_measures
+            if field in bode_measure.keys() and isfinite(bode_measure[field]) and abs(bode_measure[field]) < 1e3
+        ]
+        if not neighbours:
+            return None
+        return min(neighbours, key=lambda bode_measure: abs(log10(bode_measure["frequency"] / frequency)))
+
+    def is_valid_measure(self, bode_measure: dict) -> bool:
+        """ Validates the bode values of every output channel of a new point, verifying they are not
+        the invalid values returned by the oscilloscope, and that their phase and gain do not jump
+        more than max-phase-jump degrees, by default 90, and max-gain-jump dB, by default 20,
+        from the closest point already measured. """
+        for index, output_channel in enumerate(self.get_output_channels()):
+            module_field = "bode-module" if index == 0 else self.channel_field("bode-module", output_channel)
+            phase_field = "bode-phase" if index == 0 else self.channel_field("bode-phase", output_channel)
+            module = bode_measure[module_field]
+            phase = bode_measure[phase_field]
+
+            if not (isfinite(module) and isfinite(phase)) or module > 1e3 or abs(phase) > 1e3 or module <= 0:
+                return False
+
+            neighbour = self.find_neighbour(bode_measure["frequency"], phase_field)
+            if neighbour is not None:
+                if abs(wrap_phase(phase - neighbour[phase_field])) > self.preferences_setup.get("max-phase-jump", 90):
+                    return False
+                if neighbour[module_field] > 0:
+                    if abs(20 * log10(module / neighbour[module_field])) > self.preferences_setup.get("max-gain-jump", 20):
+                        return False
+        return True
+
+    def acquire_step(self, frequency: float, acquire_setup: dict):
+        """ Acquires the point at the given frequency with the given acquire setup, returning
+        the raw data of the point, which is turned into its bode values by process_step. """
+        self.oscilloscope.setup_acquire(**acquire_setup)
+
+        average_count = 1
+        if acquire_setup.get("acquire-mode", AcquireMode.Normal) is AcquireMode.Average:
+            average_count = acquire_setup.get("average-count", 1)
+        if self.timing_model.adaptive:
+            self.set_timeout(self.timing_model.timeout(frequency, self.timebase_range, average_count))
+
+        if self.is_scope_mode():
+            # Free running measurements need the averaging buffer filled with new acquisitions,
+            # digitized ones and statistics wait for their acquisitions by themselves
+            free_running = not (self.preferences_setup.get("frozen-frame") or self.preferences_setup.get("statistics-count"))
+            if self.timing_model.adaptive and free_running:
+                self.wait(self.timing_model.acquisition_time(frequency, self.timebase_range, average_count))
+            return self.measure_scope()
+        return self.acquire_waveforms(frequency, acquire_setup)
+
+    def process_step(self, frequency: float, data, acquire_setup: dict) -> dict:
+        """ Returns the bode point of the given frequency from the raw data returned by acquire_step.
+        It does not access the instruments, so it can run on the pipeline's worker thread. """
+        if self.is_scope_mode():
+            measures = data
+        else:
+            measures = self.process_waveform(frequency, *data)
+
+        bode_measure = {
+            "frequency": frequency,
+            "input-vpp": measures[0]["input-vpp"],
+            "output-vpp": measures[0]["output-vpp"],
+            "bode-module": measures[0]["bode-module"],
+            "bode-phase": measures[0]["bode-phase"]
+        }
+        for output_channel, measure in zip(self.get_output_channels()[1:], measures[1:]):
+            for field in self.channel_fields:
+                bode_measure[self.channel_field(field, output_channel)] = measure[field]
+        if self.preferences_setup.get("adaptive-averaging", False):
+            bode_measure["average-count"] = acquire_setup.get("average-count", 1)
+        if "phase-noise" in measures[0].keys():
+            bode_measure["gain-noise"] = measures[0]["gain-noise"]
+            bode_measure["phase-noise"] = measures[0]["phase-noise"]
+        return bode_measure
+
+    def collect_steps(self, bode_measures: list):
+        """ Validates the points processed by the pipeline, deferring the invalid ones to the end
+        of the sweep plan until their retry-budget, by default 2, is spent """
+        for bode_measure in bode_measures:
+            frequency = bode_measure["frequency"]
+            retries = self.bode_deferred.get(frequency, 0)
+            if retries < self.preferences_setup.get("retry-budget", 2) and not self.is_valid_measure(bode_measure):
+                self.bode_deferred[frequency] = retries + 1
+                self.bode_plan.append(frequency)
+                self.log("Measuring again the point at {:.2f} Hz, retry {}".format(frequency, retries + 1))
             else:
-                self.oscilloscope.set_scale(Oscilloscope.source_to_channel(source), pattern[current])
-                current += 1
+                self.add_measure(bode_measure)
+
+    def add_measure(self, bode_measure: dict):
+        """ Adds a completed point to the measures, saving it to the checkpoint """
+        self.bode_measures.append(bode_measure)
+        self.save_checkpoint({"step": self.bode_step, "measure": bode_measure})
+        self.update_live_fit(bode_measure)
+
+    def restore(self, records: list):
+        """ Restores the points of an unfinished run, their frequencies are not measured again """
+        self.bode_measures = [record["measure"] for record in records]
+        for bode_measure in self.bode_measures:
+            self.update_live_fit(bode_measure)
+
+    def update_live_fit(self, bode_measure: dict):
+        """ Adds a valid point to the live fit of the transfer function, when enabled """
+        if self.live_fit is not None and bode_measure["bode-module"] < 1e3 and bode_measure["bode-phase"] < 1e3:
+            self.live_fit.add(
+                bode_measure["frequency"],
+                bode_measure["bode-module"] * exp(1j * radians(bode_measure["bode-phase"]))
+            )
+
+    def fit_transfer_function(self, order: int, constant: bool = True, accuracy: float = None, source: Sources = None) -> dict:
+        """ Fits a stable rational model of the given order to the result, or to the result of the
+        given output channel, using vector fitting.
+            [Return] Returns the dictionary of vector_fit, with the poles, zeros, gain and fit error of the
+                model. When an accuracy is given, the number of points needed to reach it with the same
+                order is added as "required-points", None if it can not be reached.
+                """
+        result = self.result if source is None else self.get_channel_result(source)
+        frequency = array([bode_measure["frequency"] for bode_measure in result])
+        response = array([bode_measure["bode-module"] for bode_measure in result]) * exp(
+            1j * radians([bode_measure["bode-phase"] for bode_measure in result])
+        )
+
+        fit = vector_fit(frequency, response, order, constant=constant)
+        if accuracy is not None:
+            fit["required-points"] = required_points(frequency, response, order, accuracy, constant=constant)
+        return fit
+
+    def is_pipelined(self) -> bool:
+        """ Returns whether points are processed on the pipeline's worker thread, only the waveform
+        measure modes have host processing, in Scope mode the oscilloscope computes the bode values """
+        return self.preferences_setup.get("pipelined", False) and not self.is_scope_mode()
+
+    def start_pipeline(self):
+        """ Starts the worker thread processing the points, when pipelined """
+        if self.is_pipelined():
+            self.pipeline = PipelineExecutor(self.process_step, self.preferences_setup.get("pipeline-depth", 2))
+
+    def next_step(self):
+        """ Moves to the next point of the sweep plan, waiting for the pipeline at the end of it,
+        which can still add deferred points to the plan """
+        self.bode_step += 1
+        if self.bode_step >= len(self.bode_plan) and self.pipeline is not None:
+            self.collect_steps(self.pipeline.join())
+            if self.bode_step < len(self.bode_plan):
+                self.start_pipeline()
+
+        if self.bode_step >= len(self.bode_plan):
+            self.pipeline = None
+            self.bode_state = BodeStates.DONE
+            self.progress(100)
+        else:
+            self.bode_state = BodeStates.STEP_SETUP
 
     def __call__(self):
         """ Runs an automatic bode measuring using the given Oscilloscope and Generator.
@@ -115,9 +750,29 @@ class BodeAlgorithm(MeasureAlgorithm):
                             "bode-phase": value_of_bode_phase
                         }
                     ]
+                When measuring several output channels, the values of the first one use the
+                same fields, and the output-vpp, bode-module and bode-phase values of the other
+                ones are added with the channel number as suffix, as in "bode-module-ch3".
+                When the adaptive-averaging preference is enabled, the average count used at each
+                frequency is added as "average-count".
+                When the statistics-count preference is set, the relative standard deviation of the module
+                and the standard deviation of the phase, in degrees, are added as "gain-noise" and "phase-noise".
+                The phase unwrapped from the lowest frequency, as "bode-phase-unwrapped", and the group
+                delay derived from it, as "group-delay" in seconds, are added to every point.
+                When the checkpoint-file preference is set, a resumed run only measures the frequencies
+                missing from it.
         """
         if self.bode_state is BodeStates.INITIAL_SETUP:
             self.progress(0)
+            self.start_checkpoint()
+
+            # Points restored from a checkpoint are not measured again
+            measured = [bode_measure["frequency"] for bode_measure in self.bode_measures]
+            self.bode_plan = [frequency for frequency in self.compute_plan() if frequency not in measured]
+            if not self.bode_plan:
+                self.bode_state = BodeStates.DONE
+                return
+            self.start_pipeline()
 
             self.oscilloscope.set_delay(self.preferences_setup["delay"])
             self.oscilloscope.reset()
@@ -125,68 +780,148 @@ class BodeAlgorithm(MeasureAlgorithm):
 
             self.oscilloscope.setup_timebase(**self.timebase_setup)
             self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["input-channel"]), **self.channel_setup)
-            self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["output-channel"]), **self.channel_setup)
+            for output_channel in self.get_output_channels():
+                self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(output_channel), **self.channel_setup)
             self.oscilloscope.setup_trigger(**self.trigger_setup)
 
             self.generator.reset()
             self.generator.set_waveform(Waveform.Sine)
-            self.generator.set_frequency(self.compute_frequency(self.bode_step))
+            self.generator.set_frequency(self.bode_plan[self.bode_step])
             self.generator.set_output_load(None, OutputLoad.HighZ)
             self.generator.set_amplitude(self.generator_setup["amplitude"])
             self.generator.set_output_mode(OutputMode.ON)
+            if self.is_burst_gated():
+                self.setup_burst()
 
             self.bode_state = BodeStates.STEP_SETUP
 
         elif self.bode_state is BodeStates.STEP_SETUP:
-            self.progress(self.bode_step * 100 / self.preferences_setup["samples"])
-
-            self.generator.set_frequency(self.compute_frequency(self.bode_step))
-            self.oscilloscope.set_timebase_range(2 / self.compute_frequency(self.bode_step))
-            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
-
-            self.vertical_scale(self.requirements["input-channel"])
-            self.vertical_scale(self.requirements["output-channel"])
-            self.horizontal_scale(self.compute_frequency(self.bode_step))
-
-            sleep(self.preferences_setup["stable-time"])
+            self.progress(self.bode_step * 100 / len(self.bode_plan))
+
+            frequency = self.bode_plan[self.bode_step]
+            self.generator.set_frequency(frequency)
+
+            # Bursts start when the oscilloscope is armed, so they do not wait for the system to settle,
+            # and the vertical ranges are only scaled at the first point, or when a burst does not fit them
+            if self.is_burst_gated():
+                self.set_timebase_range(self.waveform_periods() / frequency)
+                self.set_timebase_position(self.timebase_range / 2)
+                if not self.channel_ranges:
+                    self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+                    self.scale_step(frequency)
+            else:
+                self.set_timebase_range(2 / frequency)
+                self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+                self.scale_step(frequency)
+                self.wait(self.timing_model.settle_time(frequency))
             self.bode_state = BodeStates.DOWNLOAD_DATA
 
         elif self.bode_state is BodeStates.DOWNLOAD_DATA:
-            self.oscilloscope.setup_acquire(**self.acquire_setup)
-
-            input_vpp = float(self.oscilloscope.measure_vpp(self.requirements["input-channel"]))
-            output_vpp = float(self.oscilloscope.measure_vpp(self.requirements["output-channel"]))
-            ratio = float(self.oscilloscope.measure_vratio(self.requirements["output-channel"], self.requirements["input-channel"]))
-            phase = float(self.oscilloscope.measure_phase(self.requirements["output-channel"], self.requirements["input-channel"]))
-            self.bode_measures.append(
-                {
-                    "frequency": self.compute_frequency(self.bode_step),
-                    "input-vpp": input_vpp,
-                    "output-vpp": output_vpp,
-                    "bode-module": ratio,
-                    "bode-phase": phase
-                }
-            )
-
-            self.bode_step += 1
-            if self.bode_step >= self.preferences_setup["samples"]:
-                self.bode_state = BodeStates.DONE
-                self.progress(100)
+            frequency = self.bode_plan[self.bode_step]
+            if self.pipeline is not None:
+                self.bode_retries = self.bode_deferred.get(frequency, 0)
+            if self.preferences_setup.get("adaptive-averaging", False):
+                acquire_setup = self.adaptive_acquire_setup(frequency)
             else:
-                self.bode_state = BodeStates.STEP_SETUP
+                acquire_setup = self.acquire_setup
+            if self.bode_retries:
+                acquire_setup = self.escalate_acquire_setup(acquire_setup)
+            data = self.acquire_step(frequency, acquire_setup)
+
+            if self.pipeline is not None:
+                # The point is processed while the next one is being set up, and only validated
+                # when collected, so invalid points are measured again at the end of the sweep
+                self.pipeline.submit(frequency, data, acquire_setup)
+                self.collect_steps(self.pipeline.collect())
+                self.next_step()
+            else:
+                bode_measure = self.process_step(frequency, data, acquire_setup)
+
+                # Invalid or outlier points are measured again in place, rescaling the oscilloscope
+                # and escalating the averaging, until the retry-budget, by default 2, is spent
+                if self.bode_retries < self.preferences_setup.get("retry-budget", 2) and not self.is_valid_measure(bode_measure):
+                    self.bode_retries += 1
+                    self.log("Measuring again the point at {:.2f} Hz, retry {}".format(frequency, self.bode_retries))
+                    self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+                    self.scale_step(frequency)
+                else:
+                    self.bode_retries = 0
+                    self.add_measure(bode_measure)
+                    self.next_step()
 
         elif self.bode_state is BodeStates.DONE:
+            self.bode_measures.sort(key=lambda bode_measure: bode_measure["frequency"])
             bode_aux = []
             for bode_measure in self.bode_measures:
                 if bode_measure["bode-module"] > 1e3 or bode_measure["bode-phase"] > 1e3:
                     continue
                 bode_aux.append(bode_measure)
+
+            frequencies = [bode_measure["frequency"] for bode_measure in bode_aux]
+            phase, ambiguous = unwrap_phase(
+                [bode_measure["bode-phase"] for bode_measure in bode_aux],
+                [
+                    bode_measure.get("phase-noise", self.preferences_setup.get("unwrap-uncertainty", 1.0))
+                    for bode_measure in bode_aux
+                ],
+                self.preferences_setup.get("max-phase-step", 90)
+            )
+
+            # Ambiguous phase steps are resolved measuring between their points, only sweeps
+            # following a plan can measure them
+            refinements = refine_frequencies(frequencies, ambiguous)
+            if len(refinements) and self.bode_plan and self.bode_refinements < self.preferences_setup.get("phase-refinements", 0):
+                self.bode_refinements += 1
+                self.log("Measuring {} points between ambiguous phase steps".format(len(refinements)))
+                self.bode_plan += list(refinements)
+                self.start_pipeline()
+                self.bode_state = BodeStates.STEP_SETUP
+                return
+
+            for bode_measure, unwrapped, delay in zip(bode_aux, phase, group_delay(frequencies, phase)):
+                bode_measure["bode-phase-unwrapped"] = unwrapped
+                bode_measure["group-delay"] = delay
             self.result = bode_aux
+            if self.live_fit is not None:
+                self.live_fit.flush()
+
+            if self.is_burst_gated() and self.bode_plan:
+                self.restore_burst()
+            self.restore_timeout()
+            if self.autoscale_cache is not None:
+                self.autoscale_cache.save()
+            self.finish_checkpoint()
             self.finish()
 
     def get_result(self):
         return self.result
 
+    def get_channel_result(self, source: Sources) -> list:
+        """ Returns the result of the given output channel using the same fields of a
+        single output measurement, discarding its invalid values. """
+        output_channels = self.get_output_channels()
+        if source not in output_channels:
+            raise ValueError("The given source was not measured as an output channel.")
+        if source is output_channels[0]:
+            return self.result
+
+        channel_result = []
+        for bode_measure in self.bode_measures:
+            channel_measure = {
+                "frequency": bode_measure["frequency"],
+                "input-vpp": bode_measure["input-vpp"]
+            }
+            for field in self.channel_fields:
+                channel_measure[field] = bode_measure[self.channel_field(field, source)]
+
+            if channel_measure["bode-module"] > 1e3 or channel_measure["bode-phase"] > 1e3:
+                continue
+            channel_result.append(channel_measure)
+        return channel_result
+
+    def get_phase(self) -> str:
+        return self.bode_state.value
+
     def what(self):
         return "Measuring bode plots of the system"
 
@@ -194,5 +929,22 @@ class BodeAlgorithm(MeasureAlgorithm):
         self.bode_state = BodeStates.INITIAL_SETUP
         self.bode_measures = []
         self.bode_step = 0
+        self.bode_retries = 0
+        self.bode_plan = []
+        self.bode_deferred = {}
+        self.bode_refinements = 0
+        self.noise_estimate = None
+        self.noise_points = 0
+        self.resumed = False
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        if self.live_fit is not None:
+            self.live_fit.reset()
+        self.timebase_range = None
+        self.timebase_position = None
+        self.channel_ranges = {}
         self.result = None
         self.finished = False
@@ -0,0 +1,226 @@
+# python native modules
+from enum import Enum
+from numpy import logspace, log10, degrees, angle, fft, ptp
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.bode_algorithm import BodeAlgorithm
+from labtool.algorithm.bode_algorithm import BodeStates
+
+from labtool.analysis.spectrum import cross_spectra
+from labtool.analysis.spectrum import band_transfer
+from labtool.analysis.spectrum import band_coherence
+
+from labtool.generator.base.generator import Waveform
+from labtool.generator.base.generator import OutputLoad
+from labtool.generator.base.generator import OutputMode
+from labtool.generator.base.generator import SyncMode
+from labtool.generator.base.generator import SweepMode
+from labtool.generator.base.generator import SweepSpacing
+from labtool.generator.base.generator import TriggerSource
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+from labtool.oscilloscope.base.oscilloscope import TriggerMode
+from labtool.oscilloscope.base.oscilloscope import TriggerSweep
+from labtool.oscilloscope.base.oscilloscope import TriggerSlope
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+
+
+class ChirpStates(Enum):
+    """ Internal states for defining the chirp FSM
+    when working with the oscilloscope and the generator. """
+    INITIAL_SETUP = "Initial setup"
+    SCALE_SETUP = "Scale setup"
+    DOWNLOAD_DATA = "Download data"
+    DONE = "Done"
+
+
+class ChirpAlgorithm(BodeAlgorithm):
+    """ Measures the bode plot using the generator's hardware logarithmic frequency sweep.
+    The oscilloscope triggers on the generator's Sync output, which must be connected to the
+    External trigger input, and captures the whole sweep of both channels. The frequency response
+    is derived by deconvolution, dividing the output by the input spectrum, averaged over the
+    captures and over a band around each of the logarithmically spaced samples.
+        [Preferences]
+            + sweep-time: Duration of the generator sweep, by default ten periods of the start frequency,
+                shortened when the maximum record of the oscilloscope can not sample the stop frequency over it
+            + chirp-captures: Number of sweeps captured and averaged, by default 4
+            + waveform-points: Minimum number of points downloaded for each channel, limited by the
+                maximum record of the oscilloscope, which must sample the stop frequency
+            """
+
+    # Sync output level used to trigger the oscilloscope
+    sync_level = 1.5
+
+    # Lowest ratio between the sample rate of the record and the stop frequency
+    min_oversampling = 2.5
+
+    # Range of sweep times supported by the generator
+    min_sweep_time = 1e-3
+    max_sweep_time = 500
+
+    def __init__(self, *args, **kwargs):
+        super(ChirpAlgorithm, self).__init__(*args, **kwargs)
+
+        self.chirp_state = ChirpStates.INITIAL_SETUP
+        self.chirp_capture = 0
+        self.chirp_spectra = None
+        self.chirp_frequency = None
+        self.chirp_vpp = 0
+
+    def compute_sweep_time(self) -> float:
+        """ Returns the sweep time, limited to the range supported by the generator, and to the longest
+        one the maximum record of the oscilloscope samples without aliasing the stop frequency """
+        sweep_time = self.preferences_setup.get("sweep-time", 10 / self.preferences_setup["start-frequency"])
+        record_time = self.oscilloscope.max_waveform_points / (self.min_oversampling * self.preferences_setup["stop-frequency"])
+        return min(max(min(sweep_time, record_time), self.min_sweep_time), self.max_sweep_time)
+
+    def compute_points(self) -> int:
+        """ Returns the number of points downloaded for each channel, sampling well above the stop frequency
+        when the maximum record of the oscilloscope allows it """
+        return int(min(
+            max(
+                self.preferences_setup.get("waveform-points", 1000),
+                4 * self.preferences_setup["stop-frequency"] * self.compute_sweep_time()
+            ),
+            self.oscilloscope.max_waveform_points
+        ))
+
+    def __call__(self):
+        """ Runs an automatic chirp bode measuring using the given Oscilloscope and Generator.
+            [Return] Returns a list of dictionaries containing for each frequency,
+                the input and output voltage values, the module and phase of the frequency response,
+                and the coherence of the estimation, between 0 and 1, across the captures.
+                    return = [
+                        {
+                            "frequency": value_of_frequency,
+                            "input-vpp": value_of_input_amplitude,
+                            "output-vpp": value_of_output_amplitude,
+                            "bode-module": value_of_bode_module,
+                            "bode-phase": value_of_bode_phase,
+                            "coherence": value_of_coherence
+                        }
+                    ]
+                The input amplitude is the one of the chirp, and the output one follows from the module.
+                The coherence is left out when a single capture is taken.
+        """
+        if self.chirp_state is ChirpStates.INITIAL_SETUP:
+            self.progress(0)
+
+            # Wide sweeps are shortened to fit the record, only the shortest sweep of the generator can not be sampled
+            sweep_time = self.compute_sweep_time()
+            if self.compute_points() < 2 * self.preferences_setup["stop-frequency"] * sweep_time:
+                raise ValueError("The record of the oscilloscope cannot sample the stop frequency, even with the shortest sweep time.")
+            if sweep_time < self.preferences_setup.get("sweep-time", 10 / self.preferences_setup["start-frequency"]):
+                self.log("Sweep time shortened to {:.3f} s to fit the record of the oscilloscope".format(sweep_time))
+
+            self.oscilloscope.set_delay(self.preferences_setup["delay"])
+            self.set_timeout(2 * sweep_time + 2)
+            self.oscilloscope.reset()
+            self.oscilloscope.autoscale()
+
+            self.oscilloscope.setup_timebase(**self.timebase_setup)
+            self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["input-channel"]), **self.channel_setup)
+            self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["output-channel"]), **self.channel_setup)
+            self.oscilloscope.setup_trigger(**self.trigger_setup)
+            self.oscilloscope.setup_trigger(
+                **{
+                    "trigger-mode": TriggerMode.Edge,
+                    "trigger-sweep": TriggerSweep.Normal,
+                    "trigger-edge-source": Sources.External,
+                    "trigger-edge-slope": TriggerSlope.Positive,
+                    "trigger-edge-level": self.sync_level
+                }
+            )
+            self.oscilloscope.set_timebase_range(sweep_time)
+            self.oscilloscope.set_timebase_position(sweep_time / 2)
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+
+            self.generator.reset()
+            self.generator.set_waveform(Waveform.Sine)
+            self.generator.set_output_load(None, OutputLoad.HighZ)
+            self.generator.set_amplitude(self.generator_setup["amplitude"])
+            self.generator.set_sweep_spacing(SweepSpacing.Log)
+            self.generator.set_start_frequency(self.preferences_setup["start-frequency"])
+            self.generator.set_stop_frequency(self.preferences_setup["stop-frequency"])
+            self.generator.set_sweep_time(sweep_time)
+            self.generator.set_trigger_source(TriggerSource.Immediate)
+            self.generator.set_sweep_mode(SweepMode.ON)
+            self.generator.set_sync_mode(SyncMode.ON)
+            self.generator.set_output_mode(OutputMode.ON)
+
+            self.chirp_state = ChirpStates.SCALE_SETUP
+
+        elif self.chirp_state is ChirpStates.SCALE_SETUP:
+            self.vertical_scale(self.requirements["input-channel"])
+            self.vertical_scale(self.requirements["output-channel"])
+
+            self.wait(self.preferences_setup["stable-time"])
+            self.chirp_state = ChirpStates.DOWNLOAD_DATA
+
+        elif self.chirp_state is ChirpStates.DOWNLOAD_DATA:
+            captures = self.preferences_setup.get("chirp-captures", 4)
+            self.progress(self.chirp_capture * 100 / captures)
+
+            # Sampling well above the stop frequency, so the sweep is not aliased
+            sources = [self.requirements["input-channel"], self.requirements["output-channel"]]
+            self.oscilloscope.digitize(*sources)
+            self.oscilloscope.operation_complete()
+            time, voltages = self.oscilloscope.download_waveforms(sources, self.compute_points())
+            self.oscilloscope.run()
+            self.chirp_vpp += ptp(voltages[0])
+
+            spectra = cross_spectra(voltages[0], voltages[1])
+            if self.chirp_spectra is None:
+                self.chirp_spectra = spectra
+                self.chirp_frequency = fft.rfftfreq(len(time), time[1] - time[0])
+            else:
+                self.chirp_spectra = tuple(total + spectrum for total, spectrum in zip(self.chirp_spectra, spectra))
+
+            self.chirp_capture += 1
+            if self.chirp_capture >= captures:
+                frequencies = logspace(
+                    log10(self.preferences_setup["start-frequency"]),
+                    log10(self.preferences_setup["stop-frequency"]),
+                    num=self.preferences_setup["samples"]
+                )
+                response = band_transfer(self.chirp_frequency, *self.chirp_spectra, frequencies)[0]
+                input_vpp = self.chirp_vpp / captures
+                for frequency, value in zip(frequencies, response):
+                    self.bode_measures.append(
+                        {
+                            "frequency": frequency,
+                            "input-vpp": input_vpp,
+                            "output-vpp": input_vpp * abs(value),
+                            "bode-module": abs(value),
+                            "bode-phase": degrees(angle(value))
+                        }
+                    )
+
+                # The coherence of each bin is only meaningful across several captures
+                if captures > 1:
+                    coherence = band_coherence(self.chirp_frequency, *self.chirp_spectra, frequencies)
+                    for bode_measure, value_coherence in zip(self.bode_measures, coherence):
+                        bode_measure["coherence"] = value_coherence
+
+                self.progress(100)
+                self.chirp_state = ChirpStates.DONE
+
+        elif self.chirp_state is ChirpStates.DONE:
+            self.bode_state = BodeStates.DONE
+            super(ChirpAlgorithm, self).__call__()
+
+    def get_phase(self) -> str:
+        return self.chirp_state.value
+
+    def what(self):
+        return "Measuring bode plots of the system with a logarithmic chirp"
+
+    def reset(self):
+        super(ChirpAlgorithm, self).reset()
+        self.chirp_state = ChirpStates.INITIAL_SETUP
+        self.chirp_capture = 0
+        self.chirp_spectra = None
+        self.chirp_frequency = None
+        self.chirp_vpp = 0
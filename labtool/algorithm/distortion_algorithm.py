@@ -0,0 +1,111 @@
+# python native modules
+from numpy import stack
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.sweep_algorithm import SweepAlgorithm
+
+from labtool.analysis.distortion import harmonic_analysis
+from labtool.analysis.distortion import peak_harmonics
+
+from labtool.generator.base.generator import Waveform
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+from labtool.oscilloscope.base.oscilloscope import FFTWindow
+
+
+class DistortionAlgorithm(SweepAlgorithm):
+    """ Measures the harmonic distortion of the system, exciting it with a pure sine, optionally across
+    a frequency or amplitude sweep. At each point several long records of the channels are downloaded
+    and analysed together, with a single batched and windowed FFT, averaging their power spectra.
+        [Requirements]
+            + channels: List of sources analysed, usually the input and the output of the system
+            + sweeps: Optional list of sweeps, as in SweepAlgorithm, a single point is measured when missing
+        [Preferences]
+            + harmonics: Highest harmonic measured, by default 10
+            + distortion-captures: Number of records averaged at each point, by default 4
+            + waveform-points: Number of points downloaded for each channel, by default 10000
+            + timebase-periods: Periods of the signal shown in the timebase range, by default 20,
+                the frequency resolution is the frequency of the point divided by this value
+            + scope-fft: Computes the spectrum of each channel with the FFT function of the oscilloscope,
+                using a flat top window, and downloads only spectrum-points of it, by default 1000,
+                instead of the records. The THD+N is not measured in this mode.
+            """
+
+    timebase_periods = 20
+
+    def __init__(self, *args, **kwargs):
+        super(DistortionAlgorithm, self).__init__(*args, **kwargs)
+        self.generator_setup = dict(self.generator_setup, waveform=Waveform.Sine)
+
+    def get_sources(self) -> list:
+        return list(self.requirements["channels"])
+
+    def measure_point(self) -> dict:
+        """ Downloads the records of the current point and measures their distortion.
+            [Return] Returns a dictionary with, for each channel, the rms value of the fundamental, the THD,
+                the THD+N and the level of each harmonic relative to the fundamental, as in "thd-ch2"
+                or "harmonic-3-ch2".
+                """
+        if self.preferences_setup.get("scope-fft", False):
+            return self.measure_spectrum()
+
+        sources = self.get_sources()
+        time = None
+        records = []
+        for _ in range(self.preferences_setup.get("distortion-captures", 4)):
+            self.oscilloscope.digitize(*sources)
+            self.oscilloscope.operation_complete()
+            time, voltages = self.oscilloscope.download_waveforms(sources, self.preferences_setup.get("waveform-points", 10000))
+            records.append(voltages)
+        self.oscilloscope.run()
+
+        # Records are stacked as (channels, captures, points) and analysed at once
+        analysis = harmonic_analysis(
+            time,
+            stack(records, axis=1),
+            self.get_frequency(),
+            self.preferences_setup.get("harmonics", 10)
+        )
+
+        point_measure = {}
+        for index, source in enumerate(sources):
+            point_measure.update(self.analysis_fields(source, {key: value[index] for key, value in analysis.items()}))
+        return point_measure
+
+    def measure_spectrum(self) -> dict:
+        """ Measures the distortion of each channel from the spectrum computed by the oscilloscope,
+        averaging the power of the spectra of every capture """
+        frequency = self.get_frequency()
+        harmonics = self.preferences_setup.get("harmonics", 10)
+        captures = self.preferences_setup.get("distortion-captures", 4)
+        span = (harmonics + 1) * frequency
+
+        point_measure = {}
+        for source in self.get_sources():
+            self.oscilloscope.setup_fft(source, span, span / 2, FFTWindow.FlatTop)
+            power = 0
+            bins = None
+            for _ in range(captures):
+                self.oscilloscope.digitize(source, Sources.Function)
+                self.oscilloscope.operation_complete()
+                bins, magnitude = self.oscilloscope.download_spectrum(self.preferences_setup.get("spectrum-points", 1000))
+                power = power + 10 ** (magnitude / 10)
+            point_measure.update(self.analysis_fields(source, peak_harmonics(bins, power / captures, frequency, harmonics)))
+        self.oscilloscope.run()
+        return point_measure
+
+    def analysis_fields(self, source: Sources, analysis: dict) -> dict:
+        """ Returns the result fields of the distortion analysis of the source """
+        channel = self.oscilloscope.source_to_channel(source)
+        fields = {}
+        for field in ["fundamental", "thd", "thd-n"]:
+            if field in analysis.keys():
+                fields["{}-ch{}".format(field, channel)] = float(analysis[field])
+        for order, value in enumerate(analysis["harmonics"], 2):
+            fields["harmonic-{}-ch{}".format(order, channel)] = float(value)
+        return fields
+
+    def what(self):
+        return "Measuring harmonic distortion of the system"
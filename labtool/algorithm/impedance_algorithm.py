@@ -1,45 +1,131 @@
 # python native modules
-from enum import Enum
-
-import cmath
-import numpy
 
 # third-party modules
+import numpy
 
 # labtool project modules
 from labtool.algorithm.bode_algorithm import BodeAlgorithm
 
+from labtool.analysis.circuit_fit import CircuitModel
+from labtool.analysis.circuit_fit import circuit_fit
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
 
 class ImpedanceAlgorithm(BodeAlgorithm):
+    """ Measures the impedance of a DUT from the voltage divider of a series resistance, with the generator
+    voltage as reference. Up to three DUTs, each with its own series resistance and sharing the generator,
+    are measured at once at each frequency.
+        [Requirements]
+            + generator-channel: Channel measuring the generator voltage
+            + input-channel: Channel measuring the voltage of the DUT, or input-channels with a list of up
+                to three channels, one per DUT
+            + resistance: Series resistance of the DUT, or resistances with a list of one per input channel,
+                a single resistance is shared by every DUT
+            """
 
     def __init__(self, *args, **kwargs):
         super(ImpedanceAlgorithm, self).__init__(*args, **kwargs)
 
         self.impedance_requirements = self.requirements
-        self.requirements = {
-            "input-channel": self.impedance_requirements["generator-channel"],
-            "output-channel": self.impedance_requirements["input-channel"]
-        }
+        self.requirements = {"input-channel": self.impedance_requirements["generator-channel"]}
+        if "input-channels" in self.impedance_requirements.keys():
+            self.requirements["output-channels"] = list(self.impedance_requirements["input-channels"])
+        else:
+            self.requirements["output-channel"] = self.impedance_requirements["input-channel"]
 
-    def get_result(self):
-        impedance_measures = []
-        for bode_measure in self.result:
-            v_gen = cmath.rect(bode_measure["input-vpp"], 0)
-            v_in = cmath.rect(bode_measure["output-vpp"], numpy.radians(bode_measure["bode-phase"]))
-            z = (v_in * self.impedance_requirements["resistance"]) / (v_gen - v_in)
-
-            impedance_measures.append(
-                {
-                    "frequency": bode_measure["frequency"],
-                    "generator-vpp": bode_measure["input-vpp"],
-                    "input-vpp": bode_measure["output-vpp"],
-                    "input-phase": bode_measure["bode-phase"],
-                    "impedance-module": abs(z),
-                    "impedance-phase": numpy.degrees(cmath.phase(z))
-                }
+        resistances = self.impedance_requirements.get("resistances")
+        if resistances is not None and len(resistances) != len(self.get_dut_channels()):
+            raise ValueError("A resistance is expected for each input channel.")
+
+        # Impedance of each DUT and merged result, computed once from the bode result
+        self.dut_impedances = {}
+        self.impedance_measures = None
+
+    def get_dut_channels(self) -> list:
+        """ Returns the input channels of the DUTs, the first one is the main DUT """
+        return self.get_output_channels()
+
+    def get_dut_resistance(self, source: Sources) -> float:
+        """ Returns the series resistance of the DUT measured by the given input channel """
+        if "resistances" in self.impedance_requirements.keys():
+            return self.impedance_requirements["resistances"][self.get_dut_channels().index(source)]
+        return self.impedance_requirements["resistance"]
+
+    def compute_dut_impedance(self, bode_result: list, source: Sources):
+        """ Computes the impedance of the DUT of the given input channel at every frequency of its bode
+        result at once, with the generator voltage as the phase reference, from the voltage divider of
+        its series resistance.
+            [Return] Returns a tuple with the frequency values, the complex impedance and the list of measures.
+            """
+        frequency = numpy.array([bode_measure["frequency"] for bode_measure in bode_result])
+        v_gen = numpy.array([bode_measure["input-vpp"] for bode_measure in bode_result])
+        v_in = numpy.array([bode_measure["output-vpp"] for bode_measure in bode_result]) * numpy.exp(
+            1j * numpy.radians([bode_measure["bode-phase"] for bode_measure in bode_result])
+        )
+        impedance = (v_in * self.get_dut_resistance(source)) / (v_gen - v_in)
+
+        measures = [
+            {
+                "frequency": bode_measure["frequency"],
+                "generator-vpp": bode_measure["input-vpp"],
+                "input-vpp": bode_measure["output-vpp"],
+                "input-phase": bode_measure["bode-phase"],
+                "impedance-module": module,
+                "impedance-phase": phase
+            }
+            for bode_measure, module, phase in zip(
+                bode_result,
+                numpy.abs(impedance),
+                numpy.degrees(numpy.angle(impedance))
             )
+        ]
+        return frequency, impedance, measures
+
+    def compute_impedance(self):
+        """ Computes the impedance of every DUT from its valid bode points, and the result, with the
+        measures of the main DUT and the values of the other ones added with the channel number as suffix,
+        at the frequencies where both of them are valid """
+        dut_channels = self.get_dut_channels()
+        for source in dut_channels:
+            self.dut_impedances[source] = self.compute_dut_impedance(self.get_channel_result(source), source)
+
+        self.impedance_measures = [dict(measure) for measure in self.dut_impedances[dut_channels[0]][2]]
+        for source in dut_channels[1:]:
+            dut_measures = {dut_measure["frequency"]: dut_measure for dut_measure in self.dut_impedances[source][2]}
+            for measure in self.impedance_measures:
+                if measure["frequency"] in dut_measures.keys():
+                    for field in ["input-vpp", "input-phase", "impedance-module", "impedance-phase"]:
+                        measure[self.channel_field(field, source)] = dut_measures[measure["frequency"]][field]
 
-        return impedance_measures
+    def get_result(self):
+        if self.impedance_measures is None:
+            self.compute_impedance()
+        return self.impedance_measures
+
+    def get_dut_result(self, source: Sources) -> list:
+        """ Returns the impedance measures of the DUT of the given input channel, using the same fields
+        of a single DUT measurement, discarding its invalid values. """
+        if source not in self.get_dut_channels():
+            raise ValueError("The given source was not measured as an input channel.")
+        if self.impedance_measures is None:
+            self.compute_impedance()
+        return self.dut_impedances[source][2]
+
+    def fit_circuit(self, model: CircuitModel, source: Sources = None) -> dict:
+        """ Fits the component values of the given circuit model to the measured impedance of the main DUT,
+        or of the DUT of the given input channel.
+            [Return] Returns the dictionary of circuit_fit, with the fitted values and their residuals.
+            """
+        if self.impedance_measures is None:
+            self.compute_impedance()
+        frequency, impedance, _ = self.dut_impedances[self.get_dut_channels()[0] if source is None else source]
+        return circuit_fit(model, frequency, impedance)
 
     def what(self):
         return "Measuring input impedance of the system"
+
+    def reset(self):
+        super(ImpedanceAlgorithm, self).reset()
+        self.dut_impedances = {}
+        self.impedance_measures = None
@@ -0,0 +1,193 @@
+# python native modules
+from enum import Enum
+from numpy import ceil, log, log2, degrees, angle
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.bode_algorithm import BodeAlgorithm
+from labtool.algorithm.bode_algorithm import BodeStates
+
+from labtool.analysis.multitone import tone_harmonics
+from labtool.analysis.multitone import multitone_waveform
+from labtool.analysis.multitone import tone_phasors
+from labtool.analysis.sine_fit import wrap_phase
+
+from labtool.generator.base.generator import Waveform
+from labtool.generator.base.generator import OutputLoad
+from labtool.generator.base.generator import OutputMode
+
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+
+
+class MultitoneStates(Enum):
+    """ Internal states for defining the multi-tone FSM
+    when working with the oscilloscope and the generator. """
+    INITIAL_SETUP = "Initial setup"
+    SCALE_SETUP = "Scale setup"
+    DOWNLOAD_DATA = "Download data"
+    DONE = "Done"
+
+
+class MultitoneAlgorithm(BodeAlgorithm):
+    """ Measures the bode plot with a single acquisition, exciting the system with a sum of sinusoids
+    uploaded to the generator's arbitrary waveform memory. The start frequency is used as the
+    fundamental frequency, and the given number of samples are logarithmically spaced harmonics
+    of it, up to the stop frequency.
+    When the highest harmonic needs more points than the arbitrary waveform memory of the generator
+    holds, the band is split in several records, each one with its own fundamental frequency and
+    acquisition, spanning an equal part of the band in logarithmic scale. As the other bode algorithms,
+    up to three output channels are measured at once when given by output-channels.
+    Records too short to hold a period of the fundamental frequency, or enough samples of the highest
+    harmonic, are acquired again with twice the periods, until the retry-budget, by default 2, is spent.
+        [Preferences]
+            + multitone-periods: Periods of the fundamental frequency captured, by default 4
+            + waveform-points: Minimum number of points downloaded for each channel, limited by the
+                maximum record of the oscilloscope
+            """
+
+    # Points of the arbitrary waveform per period of the highest harmonic
+    arbitrary_oversampling = 8
+
+    def __init__(self, *args, **kwargs):
+        super(MultitoneAlgorithm, self).__init__(*args, **kwargs)
+
+        self.multitone_state = MultitoneStates.INITIAL_SETUP
+        self.multitone_records = []
+        self.multitone_record = 0
+
+    def compute_records(self) -> list:
+        """ Returns the fundamental frequency and the harmonics used as tones of each record, splitting
+        the band in as many records as needed for the highest harmonic to fit the arbitrary waveform memory """
+        start = self.preferences_setup["start-frequency"]
+        stop = self.preferences_setup["stop-frequency"]
+        max_harmonic = self.generator.arbitrary_max_points // self.arbitrary_oversampling
+        count = max(int(ceil(log(stop / start) / log(max_harmonic))), 1)
+        ratio = (stop / start) ** (1 / count)
+        samples = int(ceil(self.preferences_setup["samples"] / count))
+
+        records = []
+        for index in range(count):
+            fundamental = start * ratio ** index
+            harmonics = tone_harmonics(samples, max(min(int(round(ratio)), max_harmonic), 1))
+            if index < count - 1:
+                # Tones reaching the fundamental frequency of the next record are measured there
+                harmonics = harmonics[fundamental * harmonics < start * ratio ** (index + 1)]
+            records.append((fundamental, harmonics))
+        return records
+
+    def arbitrary_points(self, harmonics) -> int:
+        """ Returns the points of the arbitrary waveform holding the given harmonics, limited by the generator """
+        points = max(2 ** int(ceil(log2(self.arbitrary_oversampling * harmonics[-1]))), 1024)
+        return min(points, self.generator.arbitrary_max_points)
+
+    def record_periods(self) -> int:
+        """ Returns the periods of the fundamental frequency captured, doubled on each retry of the record """
+        return self.preferences_setup.get("multitone-periods", 4) * 2 ** self.bode_retries
+
+    def compute_points(self, harmonics) -> int:
+        """ Returns the number of points downloaded for each channel, sampling well above the highest harmonic
+        when the maximum record of the oscilloscope allows it """
+        return int(min(
+            max(self.preferences_setup.get("waveform-points", 1000), 10 * harmonics[-1] * self.record_periods()),
+            self.oscilloscope.max_waveform_points
+        ))
+
+    def __call__(self):
+        """ Runs an automatic multi-tone bode measuring using the given Oscilloscope and Generator.
+            [Return] Returns the same list of dictionaries returned by the BodeAlgorithm, one for each tone.
+            """
+        if self.multitone_state is MultitoneStates.INITIAL_SETUP:
+            self.progress(0)
+            self.multitone_records = self.compute_records()
+
+            self.oscilloscope.set_delay(self.preferences_setup["delay"])
+            self.oscilloscope.reset()
+            self.oscilloscope.autoscale()
+
+            self.oscilloscope.setup_timebase(**self.timebase_setup)
+            self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["input-channel"]), **self.channel_setup)
+            for output_channel in self.get_output_channels():
+                self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(output_channel), **self.channel_setup)
+            self.oscilloscope.setup_trigger(**self.trigger_setup)
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+
+            self.generator.reset()
+            self.generator.set_output_load(None, OutputLoad.HighZ)
+            self.generator.set_amplitude(self.generator_setup["amplitude"])
+            self.generator.set_output_mode(OutputMode.ON)
+
+            self.multitone_state = MultitoneStates.SCALE_SETUP
+
+        elif self.multitone_state is MultitoneStates.SCALE_SETUP:
+            self.progress(self.multitone_record * 100 / len(self.multitone_records))
+
+            fundamental, harmonics = self.multitone_records[self.multitone_record]
+            self.generator.upload_arbitrary(multitone_waveform(harmonics, self.arbitrary_points(harmonics)))
+            self.generator.set_waveform(Waveform.Arbitrary)
+            self.generator.set_frequency(fundamental)
+            self.set_timebase_range(self.record_periods() / fundamental)
+
+            self.vertical_scale(self.requirements["input-channel"])
+            for output_channel in self.get_output_channels():
+                self.vertical_scale(output_channel)
+
+            self.wait(self.preferences_setup["stable-time"])
+            self.multitone_state = MultitoneStates.DOWNLOAD_DATA
+
+        elif self.multitone_state is MultitoneStates.DOWNLOAD_DATA:
+            # Averaging is not used, the trigger point of a multi-tone signal is not stable
+            # but the tone ratios do not depend on where the record starts
+            fundamental, harmonics = self.multitone_records[self.multitone_record]
+
+            sources = [self.requirements["input-channel"]] + self.get_output_channels()
+            self.oscilloscope.digitize(*sources)
+            time, voltages = self.oscilloscope.download_waveforms(sources, self.compute_points(harmonics))
+            self.oscilloscope.run()
+
+            try:
+                phasors = tone_phasors(time, voltages, fundamental, harmonics)
+            except ValueError:
+                if self.bode_retries >= self.preferences_setup.get("retry-budget", 2):
+                    raise
+                self.bode_retries += 1
+                self.log("Acquiring again the record at {:.2f} Hz, retry {}".format(fundamental, self.bode_retries))
+                self.set_timebase_range(self.record_periods() / fundamental)
+                return
+
+            self.bode_retries = 0
+            for index, harmonic in enumerate(harmonics):
+                bode_measure = {"frequency": fundamental * harmonic, "input-vpp": 2 * abs(phasors[0, index])}
+                for channel, output_channel in enumerate(self.get_output_channels(), 1):
+                    ratio = phasors[channel, index] / phasors[0, index]
+                    measure = {
+                        "output-vpp": 2 * abs(phasors[channel, index]),
+                        "bode-module": abs(ratio),
+                        "bode-phase": wrap_phase(degrees(angle(ratio)))
+                    }
+                    for field in self.channel_fields:
+                        bode_measure[field if channel == 1 else self.channel_field(field, output_channel)] = measure[field]
+                self.bode_measures.append(bode_measure)
+
+            self.multitone_record += 1
+            if self.multitone_record >= len(self.multitone_records):
+                self.progress(100)
+                self.multitone_state = MultitoneStates.DONE
+            else:
+                self.multitone_state = MultitoneStates.SCALE_SETUP
+
+        elif self.multitone_state is MultitoneStates.DONE:
+            self.bode_state = BodeStates.DONE
+            super(MultitoneAlgorithm, self).__call__()
+
+    def get_phase(self) -> str:
+        return self.multitone_state.value
+
+    def what(self):
+        return "Measuring bode plots of the system with a multi-tone excitation"
+
+    def reset(self):
+        super(MultitoneAlgorithm, self).reset()
+        self.multitone_state = MultitoneStates.INITIAL_SETUP
+        self.multitone_records = []
+        self.multitone_record = 0
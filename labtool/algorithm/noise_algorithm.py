@@ -0,0 +1,237 @@
+# python native modules
+from enum import Enum
+from numpy import logspace, log10, sqrt, ones
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.base.measure_algorithm import MeasureAlgorithm
+from labtool.algorithm.base.pipeline import PipelineExecutor
+
+from labtool.analysis.noise import WelchAccumulator
+from labtool.analysis.spectrum import band_sum
+
+from labtool.generator.base.generator import OutputMode
+
+from labtool.oscilloscope.base.oscilloscope import Oscilloscope
+from labtool.oscilloscope.base.oscilloscope import Sources
+from labtool.oscilloscope.base.oscilloscope import FFTWindow
+from labtool.oscilloscope.base.oscilloscope import TriggerSweep
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+from labtool.oscilloscope.base.oscilloscope import WaveformFormat
+
+
+class NoiseStates(Enum):
+    """ Internal states for defining the noise FSM
+    when working with the oscilloscope and the generator. """
+    INITIAL_SETUP = "Initial setup"
+    SCALE_SETUP = "Scale setup"
+    DOWNLOAD_DATA = "Download data"
+    DONE = "Done"
+
+
+class NoiseAlgorithm(MeasureAlgorithm):
+    """ Measures the noise spectral density of a channel with the generator output turned off.
+    Many long records are captured with a free running trigger, and the Welch estimate of their power
+    spectral density is accumulated on the host, so memory stays constant however many are averaged.
+    The density is averaged over a band around each of the logarithmically spaced samples.
+        [Requirements]
+            + channel: Source whose noise is measured
+        [Preferences]
+            + noise-captures: Number of records averaged, by default 32
+            + noise-window: Time captured in each record, by default 16 periods of the start frequency
+            + waveform-points: Minimum number of points downloaded for each record
+            + pipelined: Decodes and transforms each record on a worker thread while the next one is
+                acquired, by default True, with up to pipeline-depth records pending, by default 2
+            + scope-fft: Computes the spectrum of each record with the FFT function of the oscilloscope,
+                using a Hanning window, and downloads only spectrum-points of it, by default 1000,
+                instead of the record, averaging the power of the spectra on the host
+            """
+
+    # Segments of the Welch estimate, relative to the period of the start frequency
+    segment_periods = 4
+
+    # Window of the oscilloscope's FFT, and its equivalent noise bandwidth in bins
+    fft_window = FFTWindow.Hanning
+    fft_window_bandwidth = 1.5
+
+    def __init__(self, *args, **kwargs):
+        super(NoiseAlgorithm, self).__init__(*args, **kwargs)
+
+        self.noise_state = NoiseStates.INITIAL_SETUP
+        self.noise_capture = 0
+        self.accumulator = None
+        self.spectrum_frequency = None
+        self.spectrum_power = 0
+        self.spectrum_count = 0
+        self.spectrum_resolution = None
+        self.pipeline = None
+
+    def compute_window(self) -> float:
+        """ Returns the time captured in each record """
+        return self.preferences_setup.get("noise-window", 16 / self.preferences_setup["start-frequency"])
+
+    def compute_points(self) -> int:
+        """ Returns the number of points downloaded for each record, sampling well above the stop frequency """
+        return int(max(
+            self.preferences_setup.get("waveform-points", 1000),
+            4 * self.preferences_setup["stop-frequency"] * self.compute_window()
+        ))
+
+    def acquire_capture(self):
+        """ Digitizes the channel and downloads its raw data, which is decoded later,
+        or its spectrum when using the oscilloscope's FFT """
+        source = self.requirements["channel"]
+        if self.preferences_setup.get("scope-fft", False):
+            self.oscilloscope.digitize(source, Sources.Function)
+            self.oscilloscope.operation_complete()
+            return self.oscilloscope.download_spectrum(self.preferences_setup.get("spectrum-points", 1000))
+
+        self.oscilloscope.digitize(source)
+        self.oscilloscope.operation_complete()
+        self.oscilloscope.set_waveform_format(WaveformFormat.Word)
+        self.oscilloscope.set_waveform_unsigned(True)
+        self.oscilloscope.set_waveform_points(self.compute_points())
+        self.oscilloscope.set_waveform_source(source)
+        return self.oscilloscope.get_waveform_preamble(), self.oscilloscope.get_waveform_data(WaveformFormat.Word)
+
+    def process_capture(self, *data):
+        """ Adds the data returned by acquire_capture to the estimate. It does not access the instruments,
+        so it can run on the pipeline's worker thread. """
+        if self.preferences_setup.get("scope-fft", False):
+            self.add_spectrum(*data)
+        else:
+            self.add_record(*data)
+
+    def add_record(self, preamble: dict, data):
+        """ Decodes a record and adds it to the Welch estimate """
+        time, voltage = Oscilloscope.decode_waveform(preamble, data)
+        if self.accumulator is None:
+            sample_interval = time[1] - time[0]
+            segment_points = int(self.segment_periods / (self.preferences_setup["start-frequency"] * sample_interval))
+            self.accumulator = WelchAccumulator(min(segment_points, len(voltage)), sample_interval)
+        self.accumulator.add(voltage)
+
+    def add_spectrum(self, frequency, magnitude):
+        """ Adds the power of a spectrum in dBV to the sum of spectra """
+        self.spectrum_frequency = frequency
+        self.spectrum_power = self.spectrum_power + 10 ** (magnitude / 10)
+        self.spectrum_count += 1
+
+    def get_psd(self):
+        """ Returns the frequency and the power spectral density, in V^2/Hz, averaged over every capture.
+        The power of each bin of the oscilloscope's spectrum is divided by the noise bandwidth of the bin,
+        from the resolution of the FFT over its configured span, not the spacing of the downloaded points. """
+        if self.preferences_setup.get("scope-fft", False):
+            psd = self.spectrum_power / (self.spectrum_count * self.fft_window_bandwidth * self.spectrum_resolution)
+            return self.spectrum_frequency, psd
+        return self.accumulator.frequency(), self.accumulator.psd()
+
+    def __call__(self):
+        """ Runs an automatic noise measuring using the given Oscilloscope and Generator.
+            [Return] Returns a list of dictionaries containing for each frequency,
+                the noise spectral density in V/sqrt(Hz).
+                    return = [
+                        {
+                            "frequency": value_of_frequency,
+                            "noise-density": value_of_noise_density
+                        }
+                    ]
+        """
+        if self.noise_state is NoiseStates.INITIAL_SETUP:
+            self.progress(0)
+
+            window = self.compute_window()
+            channel = self.oscilloscope.source_to_channel(self.requirements["channel"])
+
+            self.generator.reset()
+            self.generator.set_output_mode(OutputMode.OFF)
+
+            self.oscilloscope.set_delay(self.preferences_setup["delay"])
+            self.oscilloscope.set_timeout(window + 2)
+            self.oscilloscope.reset()
+
+            self.oscilloscope.setup_timebase(**self.timebase_setup)
+            self.oscilloscope.setup_channel(channel, **self.channel_setup)
+            self.oscilloscope.setup_trigger(**self.trigger_setup)
+            self.oscilloscope.set_trigger_sweep(TriggerSweep.Auto)
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+            self.set_timebase_range(window)
+
+            # The spectrum covers up to twice the stop frequency, its fft_points bins spread over the span
+            if self.preferences_setup.get("scope-fft", False):
+                stop_frequency = self.preferences_setup["stop-frequency"]
+                self.oscilloscope.setup_fft(self.requirements["channel"], 2 * stop_frequency, stop_frequency, self.fft_window)
+                self.spectrum_resolution = 2 * stop_frequency / self.oscilloscope.fft_points
+
+            if self.preferences_setup.get("pipelined", True):
+                self.pipeline = PipelineExecutor(self.process_capture, self.preferences_setup.get("pipeline-depth", 2))
+
+            self.noise_state = NoiseStates.SCALE_SETUP
+
+        elif self.noise_state is NoiseStates.SCALE_SETUP:
+            self.vertical_scale(self.requirements["channel"])
+            self.wait(self.preferences_setup["stable-time"])
+            self.noise_state = NoiseStates.DOWNLOAD_DATA
+
+        elif self.noise_state is NoiseStates.DOWNLOAD_DATA:
+            captures = self.preferences_setup.get("noise-captures", 32)
+            self.progress(self.noise_capture * 100 / captures)
+
+            # The next record is acquired while the worker thread processes the previous one
+            if self.pipeline is not None:
+                self.pipeline.submit(*self.acquire_capture())
+            else:
+                self.process_capture(*self.acquire_capture())
+
+            self.noise_capture += 1
+            if self.noise_capture >= captures:
+                self.oscilloscope.run()
+                if self.pipeline is not None:
+                    self.pipeline.join()
+                    self.pipeline = None
+                self.progress(100)
+                self.noise_state = NoiseStates.DONE
+
+        elif self.noise_state is NoiseStates.DONE:
+            frequency, psd = self.get_psd()
+            centers = logspace(
+                log10(self.preferences_setup["start-frequency"]),
+                log10(self.preferences_setup["stop-frequency"]),
+                num=self.preferences_setup["samples"]
+            )
+            density = sqrt(band_sum(frequency, psd, centers) / band_sum(frequency, ones(len(frequency)), centers))
+
+            self.result = [
+                {
+                    "frequency": center,
+                    "noise-density": value
+                }
+                for center, value in zip(centers, density)
+            ]
+            self.finish()
+
+    def get_result(self):
+        return self.result
+
+    def get_phase(self) -> str:
+        return self.noise_state.value
+
+    def what(self):
+        return "Measuring the noise spectral density of the system"
+
+    def reset(self):
+        self.noise_state = NoiseStates.INITIAL_SETUP
+        self.noise_capture = 0
+        self.accumulator = None
+        self.spectrum_frequency = None
+        self.spectrum_power = 0
+        self.spectrum_count = 0
+        self.spectrum_resolution = None
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        self.timebase_range = None
+        self.channel_ranges = {}
+        self.result = None
+        self.finished = False
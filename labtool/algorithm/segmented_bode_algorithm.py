@@ -0,0 +1,246 @@
+# python native modules
+from enum import Enum
+from numpy import logical_and, degrees
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.bode_algorithm import BodeAlgorithm
+from labtool.algorithm.bode_algorithm import BodeStates
+from labtool.algorithm.bode_algorithm import BurstAcquisitionError
+
+from labtool.analysis.sine_fit import sine_fit_segments
+from labtool.analysis.sine_fit import wrap_phase
+
+from labtool.generator.base.generator import Waveform
+from labtool.generator.base.generator import OutputLoad
+from labtool.generator.base.generator import OutputMode
+from labtool.generator.base.generator import SyncMode
+from labtool.generator.base.generator import BurstMode
+from labtool.generator.base.generator import BurstState
+from labtool.generator.base.generator import TriggerSource
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+from labtool.oscilloscope.base.oscilloscope import TriggerMode
+from labtool.oscilloscope.base.oscilloscope import TriggerSweep
+from labtool.oscilloscope.base.oscilloscope import TriggerSlope
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+
+
+class SegmentedStates(Enum):
+    """ Internal states for defining the segmented bode FSM
+    when working with the oscilloscope and the generator. """
+    INITIAL_SETUP = "Initial setup"
+    SCALE_SETUP = "Scale setup"
+    DOWNLOAD_DATA = "Download data"
+    DONE = "Done"
+
+
+class SegmentedBodeAlgorithm(BodeAlgorithm):
+    """ Measures the bode plot capturing many frequencies in a single segmented acquisition of the
+    oscilloscope. The generator outputs a burst at each frequency, triggered by the bus, and the
+    oscilloscope triggers on the generator's Sync output, which must be connected to the External
+    trigger input, acquiring a segment for each burst. The segments are downloaded once the group has
+    been acquired, and all of them are fitted at once on the host.
+    Frequencies are grouped so the segments of a group share the timebase and vertical ranges.
+        [Preferences]
+            + segment-ratio: Highest ratio between the frequencies of a group, by default 10
+            + segment-periods: Periods of each burst analysed, by default 4
+            + burst-skip-cycles: Periods at the start of each burst left out while the system
+                settles, by default 2
+            + waveform-points: Number of points of each segment, by default 1000
+            """
+
+    def __init__(self, *args, **kwargs):
+        super(SegmentedBodeAlgorithm, self).__init__(*args, **kwargs)
+
+        self.segmented_state = SegmentedStates.INITIAL_SETUP
+        self.segmented_groups = []
+        self.segmented_group = 0
+
+    def compute_groups(self) -> list:
+        """ Returns the frequencies of the sweep, sorted and split in groups captured by a single
+        segmented acquisition, limited by the segment-ratio and by the segments of the oscilloscope.
+        Points restored from a checkpoint are not measured again. """
+        ratio = self.preferences_setup.get("segment-ratio", 10)
+        measured = [bode_measure["frequency"] for bode_measure in self.bode_measures]
+        frequencies = [self.compute_frequency(step) for step in range(self.preferences_setup["samples"])]
+        frequencies = sorted([frequency for frequency in frequencies if frequency not in measured])
+
+        groups = []
+        for frequency in frequencies:
+            if groups and frequency <= ratio * groups[-1][0] and len(groups[-1]) < self.oscilloscope.max_segments:
+                groups[-1].append(frequency)
+            else:
+                groups.append([frequency])
+        return groups
+
+    def burst_cycles(self) -> int:
+        """ Returns the number of cycles of each burst, the skipped ones and the analysed ones """
+        return self.preferences_setup.get("burst-skip-cycles", 2) + self.preferences_setup.get("segment-periods", 4)
+
+    def scale_group(self, frequencies: list):
+        """ Auto scaling the vertical axis of every channel for the frequencies of the group, with the
+        continuous output, keeping the largest range found at its lowest and highest frequencies """
+        sources = [self.requirements["input-channel"]] + self.get_output_channels()
+        ranges = {}
+        for frequency in [frequencies[0], frequencies[-1]]:
+            self.generator.set_frequency(frequency)
+            self.wait(self.timing_model.settle_time(frequency))
+            for source in sources:
+                self.vertical_scale(source)
+                ranges[source] = max(ranges.get(source, 0), self.channel_ranges[source])
+
+        for source in sources:
+            self.set_channel_range(source, ranges[source])
+
+    def capture_group(self, frequencies: list):
+        """ Acquires a segment for each frequency of the group, arming a single segmented acquisition
+        and firing a burst at each one, and downloads every segment of the channels.
+        Raises BurstAcquisitionError when the oscilloscope is not armed or the segments are not captured.
+            [Return] Returns a tuple with the time values of the segments and an array of voltage values,
+                with shape (channels, segments, points).
+                """
+        sources = [self.requirements["input-channel"]] + self.get_output_channels()
+        cycles = self.burst_cycles()
+        timeout = self.timing_model.timeout(frequencies[0], self.timebase_range)
+
+        self.oscilloscope.set_acquire_segments(len(frequencies))
+        if self.timing_model.adaptive:
+            self.set_timeout(timeout)
+
+        captured = False
+        if self.arm_single(timeout):
+            for frequency in frequencies:
+                self.generator.set_frequency(frequency)
+                self.generator.trigger()
+                self.wait(self.timing_model.acquisition_time(frequency, cycles / frequency))
+            captured = self.oscilloscope.wait_single(timeout)
+
+        if not captured:
+            self.oscilloscope.set_acquire_segments(0)
+            self.oscilloscope.run()
+            self.restore_timeout()
+            raise BurstAcquisitionError
+
+        time, voltages = self.oscilloscope.download_segments(
+            sources,
+            len(frequencies),
+            self.preferences_setup.get("waveform-points", 1000)
+        )
+        self.oscilloscope.set_acquire_segments(0)
+        self.oscilloscope.run()
+        return time, voltages
+
+    def process_group(self, frequencies: list, time, voltages) -> list:
+        """ Returns the bode points of the group from its segments, fitting the analysed periods
+        of each burst, after the skipped ones, at their known frequencies """
+        skip = self.preferences_setup.get("burst-skip-cycles", 2)
+        cycles = self.burst_cycles()
+        windows = [logical_and(time >= skip / frequency, time < cycles / frequency) for frequency in frequencies]
+        amplitude, phase = sine_fit_segments(time, voltages, frequencies, windows)[:2]
+
+        bode_measures = []
+        for segment, frequency in enumerate(frequencies):
+            bode_measure = {"frequency": frequency, "input-vpp": 2 * amplitude[0, segment]}
+            for index, output_channel in enumerate(self.get_output_channels(), 1):
+                measure = {
+                    "output-vpp": 2 * amplitude[index, segment],
+                    "bode-module": amplitude[index, segment] / amplitude[0, segment],
+                    "bode-phase": wrap_phase(degrees(phase[index, segment] - phase[0, segment]))
+                }
+                for field in self.channel_fields:
+                    bode_measure[field if index == 1 else self.channel_field(field, output_channel)] = measure[field]
+            bode_measures.append(bode_measure)
+        return bode_measures
+
+    def __call__(self):
+        """ Runs an automatic segmented bode measuring using the given Oscilloscope and Generator.
+            [Return] Returns the same list of dictionaries of BodeAlgorithm.
+        """
+        if self.segmented_state is SegmentedStates.INITIAL_SETUP:
+            if self.oscilloscope.max_segments < 2:
+                raise ValueError("The oscilloscope does not support segmented acquisitions.")
+            self.progress(0)
+            self.start_checkpoint()
+            self.segmented_groups = self.compute_groups()
+            if not self.segmented_groups:
+                self.segmented_state = SegmentedStates.DONE
+                return
+
+            self.oscilloscope.set_delay(self.preferences_setup["delay"])
+            self.oscilloscope.reset()
+            self.oscilloscope.autoscale()
+
+            self.oscilloscope.setup_timebase(**self.timebase_setup)
+            self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["input-channel"]), **self.channel_setup)
+            for output_channel in self.get_output_channels():
+                self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(output_channel), **self.channel_setup)
+            self.oscilloscope.setup_trigger(**self.trigger_setup)
+            self.oscilloscope.setup_trigger(
+                **{
+                    "trigger-mode": TriggerMode.Edge,
+                    "trigger-sweep": TriggerSweep.Normal,
+                    "trigger-edge-source": Sources.External,
+                    "trigger-edge-slope": TriggerSlope.Positive,
+                    "trigger-edge-level": self.sync_level
+                }
+            )
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+
+            self.generator.reset()
+            self.generator.set_waveform(Waveform.Sine)
+            self.generator.set_frequency(self.segmented_groups[0][0])
+            self.generator.set_output_load(None, OutputLoad.HighZ)
+            self.generator.set_amplitude(self.generator_setup["amplitude"])
+            self.generator.set_burst_mode(BurstMode.Triggered)
+            self.generator.set_burst_cycles(self.burst_cycles())
+            self.generator.set_trigger_source(TriggerSource.Bus)
+            self.generator.set_sync_mode(SyncMode.ON)
+            self.generator.set_output_mode(OutputMode.ON)
+
+            self.segmented_state = SegmentedStates.SCALE_SETUP
+
+        elif self.segmented_state is SegmentedStates.SCALE_SETUP:
+            self.progress(self.segmented_group * 100 / len(self.segmented_groups))
+
+            # Segments start at the trigger, and show the whole burst of the lowest frequency
+            frequencies = self.segmented_groups[self.segmented_group]
+            time_range = self.burst_cycles() / frequencies[0]
+            self.set_timebase_range(time_range)
+            self.set_timebase_position(time_range / 2)
+
+            self.generator.set_burst_state(BurstState.OFF)
+            self.scale_group(frequencies)
+            self.generator.set_burst_state(BurstState.ON)
+
+            self.segmented_state = SegmentedStates.DOWNLOAD_DATA
+
+        elif self.segmented_state is SegmentedStates.DOWNLOAD_DATA:
+            frequencies = self.segmented_groups[self.segmented_group]
+            for bode_measure in self.process_group(frequencies, *self.capture_group(frequencies)):
+                self.add_measure(bode_measure)
+
+            self.segmented_group += 1
+            if self.segmented_group >= len(self.segmented_groups):
+                self.restore_burst()
+                self.progress(100)
+                self.segmented_state = SegmentedStates.DONE
+            else:
+                self.segmented_state = SegmentedStates.SCALE_SETUP
+
+        elif self.segmented_state is SegmentedStates.DONE:
+            self.bode_state = BodeStates.DONE
+            super(SegmentedBodeAlgorithm, self).__call__()
+
+    def get_phase(self) -> str:
+        return self.segmented_state.value
+
+    def what(self):
+        return "Measuring bode plots of the system with segmented acquisitions"
+
+    def reset(self):
+        super(SegmentedBodeAlgorithm, self).reset()
+        self.segmented_state = SegmentedStates.INITIAL_SETUP
+        self.segmented_groups = []
+        self.segmented_group = 0
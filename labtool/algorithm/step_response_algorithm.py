@@ -0,0 +1,209 @@
+# python native modules
+from enum import Enum
+from numpy import logspace, log10, degrees, angle, diff, fft, ptp
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.bode_algorithm import BodeAlgorithm
+from labtool.algorithm.bode_algorithm import BodeStates
+
+from labtool.analysis.spectrum import cross_spectra
+from labtool.analysis.spectrum import band_transfer
+
+from labtool.generator.base.generator import Waveform
+from labtool.generator.base.generator import OutputLoad
+from labtool.generator.base.generator import OutputMode
+
+from labtool.oscilloscope.base.oscilloscope import TriggerMode
+from labtool.oscilloscope.base.oscilloscope import TriggerSweep
+from labtool.oscilloscope.base.oscilloscope import TriggerSlope
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+
+
+class StepResponseStates(Enum):
+    """ Internal states for defining the step response FSM
+    when working with the oscilloscope and the generator. """
+    INITIAL_SETUP = "Initial setup"
+    SCALE_SETUP = "Scale setup"
+    DOWNLOAD_DATA = "Download data"
+    DONE = "Done"
+
+
+class StepResponseAlgorithm(BodeAlgorithm):
+    """ Measures the bode plot from the step response of the system, exciting it with a square wave
+    slow enough for the system to settle after each edge. The oscilloscope triggers on the rising edge
+    of the input channel, at the middle of the step, and captures every channel in high resolution mode,
+    the captures are averaged on the host, and the frequency response is derived dividing the spectrum of
+    the output derivative, the impulse response, by the spectrum of the input derivative, averaged over a
+    band around each of the logarithmically spaced samples. As the other bode algorithms, up to three
+    output channels are measured at once when given by output-channels.
+        [Preferences]
+            + step-window: Time captured after each edge, by default four periods of the start frequency,
+                it should be longer than the settling time of the system
+            + step-captures: Number of captures averaged, by default 16
+            + waveform-points: Minimum number of points downloaded for each channel, limited by the
+                maximum record of the oscilloscope
+            """
+
+    # Fraction of the capture shown before the trigger edge
+    pre_trigger = 0.05
+
+    def __init__(self, *args, **kwargs):
+        super(StepResponseAlgorithm, self).__init__(*args, **kwargs)
+
+        self.step_state = StepResponseStates.INITIAL_SETUP
+        self.step_capture = 0
+        self.step_time = None
+        self.step_voltages = None
+
+    def compute_window(self) -> float:
+        """ Returns the time captured after each edge """
+        return self.preferences_setup.get("step-window", 4 / self.preferences_setup["start-frequency"])
+
+    def compute_points(self) -> int:
+        """ Returns the number of points downloaded for each channel, sampling well above the stop frequency
+        when the maximum record of the oscilloscope allows it """
+        return int(min(
+            max(
+                self.preferences_setup.get("waveform-points", 1000),
+                4 * self.preferences_setup["stop-frequency"] * self.compute_window()
+            ),
+            self.oscilloscope.max_waveform_points
+        ))
+
+    def compute_trigger_level(self) -> float:
+        """ Returns the middle level of the step, the square wave of the generator spans the
+        amplitude around its offset """
+        return self.generator_setup.get("offset", 0)
+
+    def __call__(self):
+        """ Runs an automatic step response bode measuring using the given Oscilloscope and Generator.
+            [Return] Returns a list of dictionaries containing for each frequency,
+                the peak to peak value of the input and output steps, the module and phase of the frequency
+                response, and the coherence of the estimation, between 0 and 1.
+                    return = [
+                        {
+                            "frequency": value_of_frequency,
+                            "input-vpp": value_of_input_step,
+                            "output-vpp": value_of_output_step,
+                            "bode-module": value_of_bode_module,
+                            "bode-phase": value_of_bode_phase,
+                            "coherence": value_of_coherence
+                        }
+                    ]
+                When measuring several output channels, the values of the other ones are added with the
+                channel number as suffix, as in BodeAlgorithm.
+        """
+        if self.step_state is StepResponseStates.INITIAL_SETUP:
+            self.progress(0)
+
+            window = self.compute_window()
+
+            self.oscilloscope.set_delay(self.preferences_setup["delay"])
+            self.set_timeout(2 * window + 2)
+            self.oscilloscope.reset()
+            self.oscilloscope.autoscale()
+
+            self.oscilloscope.setup_timebase(**self.timebase_setup)
+            self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(self.requirements["input-channel"]), **self.channel_setup)
+            for output_channel in self.get_output_channels():
+                self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(output_channel), **self.channel_setup)
+            self.oscilloscope.setup_trigger(**self.trigger_setup)
+            self.oscilloscope.setup_trigger(
+                **{
+                    "trigger-mode": TriggerMode.Edge,
+                    "trigger-sweep": TriggerSweep.Normal,
+                    "trigger-edge-source": self.requirements["input-channel"],
+                    "trigger-edge-slope": TriggerSlope.Positive,
+                    "trigger-edge-level": self.compute_trigger_level()
+                }
+            )
+            self.oscilloscope.set_timebase_range(window)
+            self.oscilloscope.set_timebase_position(window * (0.5 - self.pre_trigger))
+            self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+
+            # The square period leaves a whole window after each edge, for both edges
+            self.generator.reset()
+            self.generator.set_waveform(Waveform.Square)
+            self.generator.set_frequency(1 / (2 * window))
+            self.generator.set_output_load(None, OutputLoad.HighZ)
+            self.generator.set_amplitude(self.generator_setup["amplitude"])
+            if "offset" in self.generator_setup.keys():
+                self.generator.set_offset(self.generator_setup["offset"])
+            self.generator.set_output_mode(OutputMode.ON)
+
+            self.step_state = StepResponseStates.SCALE_SETUP
+
+        elif self.step_state is StepResponseStates.SCALE_SETUP:
+            self.vertical_scale(self.requirements["input-channel"])
+            for output_channel in self.get_output_channels():
+                self.vertical_scale(output_channel)
+            self.oscilloscope.set_acquire_mode(AcquireMode.HighResolution)
+
+            self.wait(self.preferences_setup["stable-time"])
+            self.step_state = StepResponseStates.DOWNLOAD_DATA
+
+        elif self.step_state is StepResponseStates.DOWNLOAD_DATA:
+            captures = self.preferences_setup.get("step-captures", 16)
+            self.progress(self.step_capture * 100 / captures)
+
+            # Sampling well above the stop frequency, so the edge is not aliased
+            sources = [self.requirements["input-channel"]] + self.get_output_channels()
+            self.oscilloscope.digitize(*sources)
+            self.oscilloscope.operation_complete()
+            time, voltages = self.oscilloscope.download_waveforms(sources, self.compute_points())
+            self.oscilloscope.run()
+
+            if self.step_voltages is None:
+                self.step_time = time
+                self.step_voltages = voltages
+            else:
+                self.step_voltages = self.step_voltages + voltages
+
+            self.step_capture += 1
+            if self.step_capture >= captures:
+                voltages = self.step_voltages / captures
+                derivatives = diff(voltages, axis=1)
+                frequencies = logspace(
+                    log10(self.preferences_setup["start-frequency"]),
+                    log10(self.preferences_setup["stop-frequency"]),
+                    num=self.preferences_setup["samples"]
+                )
+                spectrum_frequency = fft.rfftfreq(derivatives.shape[1], self.step_time[1] - self.step_time[0])
+                self.bode_measures = [{"frequency": frequency, "input-vpp": ptp(voltages[0])} for frequency in frequencies]
+                for index, output_channel in enumerate(self.get_output_channels(), 1):
+                    response, coherence = band_transfer(
+                        spectrum_frequency,
+                        *cross_spectra(derivatives[0], derivatives[index]),
+                        frequencies
+                    )
+                    for bode_measure, value, value_coherence in zip(self.bode_measures, response, coherence):
+                        measure = {
+                            "output-vpp": ptp(voltages[index]),
+                            "bode-module": abs(value),
+                            "bode-phase": degrees(angle(value)),
+                            "coherence": value_coherence
+                        }
+                        for field, field_value in measure.items():
+                            bode_measure[field if index == 1 else self.channel_field(field, output_channel)] = field_value
+
+                self.progress(100)
+                self.step_state = StepResponseStates.DONE
+
+        elif self.step_state is StepResponseStates.DONE:
+            self.bode_state = BodeStates.DONE
+            super(StepResponseAlgorithm, self).__call__()
+
+    def get_phase(self) -> str:
+        return self.step_state.value
+
+    def what(self):
+        return "Measuring bode plots of the system from its step response"
+
+    def reset(self):
+        super(StepResponseAlgorithm, self).reset()
+        self.step_state = StepResponseStates.INITIAL_SETUP
+        self.step_capture = 0
+        self.step_time = None
+        self.step_voltages = None
@@ -0,0 +1,286 @@
+# python native modules
+from enum import Enum
+from itertools import product
+from numpy import logspace, linspace, log10
+
+# third-party modules
+
+# labtool project modules
+from labtool.algorithm.base.measure_algorithm import MeasureAlgorithm
+
+from labtool.tool import BodeScale
+from labtool.tool import SweepParameter
+
+from labtool.generator.base.generator import Waveform
+from labtool.generator.base.generator import OutputLoad
+from labtool.generator.base.generator import OutputMode
+
+from labtool.oscilloscope.base.oscilloscope import Oscilloscope
+from labtool.oscilloscope.base.oscilloscope import AcquireMode
+from labtool.oscilloscope.base.oscilloscope import Measure
+
+
+class SweepStates(Enum):
+    """ Internal states for defining the parameter sweep FSM
+    when working with the oscilloscope and the generator. """
+    INITIAL_SETUP = "Initial setup"
+    STEP_SETUP = "Step setup"
+    DOWNLOAD_DATA = "Download data"
+    DONE = "Done"
+
+
+class SweepAlgorithm(MeasureAlgorithm):
+    """ Sweeps one or more parameters of the generator, measuring the given oscilloscope measurements
+    at each point. Nested sweeps measure every combination of their values, the last sweep being the
+    innermost one, and only the parameters changing between points are sent to the generator.
+        [Requirements]
+            + sweeps: List of sweeps, each one a dictionary with the SweepParameter as "parameter" and
+                either its "values", or its "start", "stop", "samples" and BodeScale "scale"
+            + measures: List of (Measure, source, reference_source) tuples, where the reference source
+                is None unless the measure is between two sources, as VRatio and Phase
+        [Generator setup]
+            + waveform: Waveform used, by default Sine
+            + frequency: Frequency used when it is not swept, by default 1000
+            + amplitude, offset, square-duty, ramp-symmetry: Values used when they are not swept
+        [Preferences]
+            + autoscale: Scales the vertical axis of the measured channels at each point, by default True,
+                centering the channel offset on the signal so the DC level of offset sweeps is not clipped
+            + timebase-periods: Periods of the signal shown in the timebase range, by default 2
+            + statistics-count: When set, each measure is the mean of the oscilloscope's statistics
+                over this number of acquisitions, and its standard deviation is added as well
+            """
+
+    # Periods of the signal shown in the timebase range, unless given in the preferences
+    timebase_periods = 2
+
+    # Result fields and generator setters of each parameter
+    parameter_fields = {
+        SweepParameter.Frequency: "frequency",
+        SweepParameter.Amplitude: "amplitude",
+        SweepParameter.Offset: "offset",
+        SweepParameter.SquareDuty: "square-duty",
+        SweepParameter.RampSymmetry: "ramp-symmetry"
+    }
+
+    parameter_setters = {
+        SweepParameter.Frequency: "set_frequency",
+        SweepParameter.Amplitude: "set_amplitude",
+        SweepParameter.Offset: "set_offset",
+        SweepParameter.SquareDuty: "set_square_duty",
+        SweepParameter.RampSymmetry: "set_ramp_symmetry"
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(SweepAlgorithm, self).__init__(*args, **kwargs)
+
+        self.sweep_state = SweepStates.INITIAL_SETUP
+        self.sweep_measures = []
+        self.sweep_points = []
+        self.sweep_step = 0
+        self.sweep_parameters = {}
+
+    @staticmethod
+    def compute_values(sweep: dict) -> list:
+        """ Returns the values of a single sweep """
+        if "values" in sweep.keys():
+            return list(sweep["values"])
+        if sweep.get("scale", BodeScale.Linear) is BodeScale.Log:
+            return list(logspace(log10(sweep["start"]), log10(sweep["stop"]), num=sweep["samples"]))
+        return list(linspace(sweep["start"], sweep["stop"], num=sweep["samples"]))
+
+    def compute_points(self) -> list:
+        """ Returns the points of the nested sweeps, as dictionaries of the value of each swept parameter """
+        sweeps = self.requirements.get("sweeps", [])
+        return [
+            {sweep["parameter"]: value for sweep, value in zip(sweeps, values)}
+            for values in product(*[self.compute_values(sweep) for sweep in sweeps])
+        ]
+
+    @staticmethod
+    def measure_field(measure: Measure, source, reference_source=None) -> str:
+        """ Returns the name of the result field of a measure, as in "vpp-ch2" or "vratio-ch2-ch1" """
+        field = "{}-ch{}".format(measure.value.lower(), Oscilloscope.source_to_channel(source))
+        if reference_source is not None:
+            field += "-ch{}".format(Oscilloscope.source_to_channel(reference_source))
+        return field
+
+    def get_frequency(self) -> float:
+        """ Returns the frequency of the current point """
+        return self.sweep_parameters.get(SweepParameter.Frequency, self.generator_setup.get("frequency", 1000))
+
+    def get_sources(self) -> list:
+        """ Returns the sources used by the measures, without repeating them """
+        sources = []
+        for _, source, reference_source in self.requirements["measures"]:
+            for channel in [source, reference_source]:
+                if channel is not None and channel not in sources:
+                    sources.append(channel)
+        return sources
+
+    def set_parameters(self, point: dict):
+        """ Sets the parameters of the point which changed since the previous one """
+        for parameter, value in point.items():
+            if self.sweep_parameters.get(parameter) != value:
+                getattr(self.generator, self.parameter_setters[parameter])(value)
+                self.sweep_parameters[parameter] = value
+
+    def measure_point(self) -> dict:
+        """ Measures every measure at the current point.
+            [Return] Returns a dictionary with the value of each measure field, and its standard deviation
+                as "{field}-std-dev" when using the oscilloscope's statistics.
+                """
+        measures = self.requirements["measures"]
+        if self.preferences_setup.get("statistics-count"):
+            results = self.fetch_statistics(measures, self.preferences_setup["statistics-count"])
+            point_measure = {}
+            for (measure, source, reference_source), result in zip(measures, results):
+                field = self.measure_field(measure, source, reference_source)
+                point_measure[field] = result["mean"]
+                point_measure["{}-std-dev".format(field)] = result["std-dev"]
+            return point_measure
+
+        methods = {
+            Measure.Vmax: self.oscilloscope.measure_vmax,
+            Measure.Vmin: self.oscilloscope.measure_vmin,
+            Measure.Vpp: self.oscilloscope.measure_vpp,
+            Measure.VRatio: self.oscilloscope.measure_vratio,
+            Measure.Phase: self.oscilloscope.measure_phase
+        }
+        point_measure = {}
+        for measure, source, reference_source in measures:
+            arguments = [source] if reference_source is None else [source, reference_source]
+            point_measure[self.measure_field(measure, source, reference_source)] = float(methods[measure](*arguments))
+        return point_measure
+
+    def restore(self, records: list):
+        """ Restores the points of an unfinished run, they are not measured again """
+        self.sweep_measures = [record["measure"] for record in records]
+
+    def is_measured(self, point: dict) -> bool:
+        """ Returns whether the point was already measured """
+        for sweep_measure in self.sweep_measures:
+            if all([sweep_measure[self.parameter_fields[parameter]] == value for parameter, value in point.items()]):
+                return True
+        return False
+
+    def __call__(self):
+        """ Runs an automatic parameter sweep using the given Oscilloscope and Generator.
+            [Return] Returns a list of dictionaries containing for each point the value of each swept
+                parameter, and the value of each measure.
+                    return = [
+                        {
+                            "amplitude": value_of_amplitude,
+                            "vpp-ch2": value_of_the_vpp_of_channel_2,
+                            "vratio-ch2-ch1": value_of_the_vratio_of_channel_2_over_channel_1
+                        }
+                    ]
+        """
+        if self.sweep_state is SweepStates.INITIAL_SETUP:
+            self.progress(0)
+            self.start_checkpoint()
+
+            self.sweep_points = [point for point in self.compute_points() if not self.is_measured(point)]
+            if not self.sweep_points:
+                self.sweep_state = SweepStates.DONE
+                return
+
+            self.oscilloscope.set_delay(self.preferences_setup["delay"])
+            self.oscilloscope.reset()
+            self.oscilloscope.autoscale()
+
+            self.oscilloscope.setup_timebase(**self.timebase_setup)
+            for source in self.get_sources():
+                self.oscilloscope.setup_channel(self.oscilloscope.source_to_channel(source), **self.channel_setup)
+            self.oscilloscope.setup_trigger(**self.trigger_setup)
+            self.oscilloscope.setup_acquire(**self.acquire_setup)
+
+            self.generator.reset()
+            self.generator.set_waveform(self.generator_setup.get("waveform", Waveform.Sine))
+            self.generator.set_frequency(self.generator_setup.get("frequency", 1000))
+            self.generator.set_output_load(None, OutputLoad.HighZ)
+            self.generator.set_amplitude(self.generator_setup["amplitude"])
+            if "offset" in self.generator_setup.keys():
+                self.generator.set_offset(self.generator_setup["offset"])
+            if "square-duty" in self.generator_setup.keys():
+                self.generator.set_square_duty(self.generator_setup["square-duty"])
+            if "ramp-symmetry" in self.generator_setup.keys():
+                self.generator.set_ramp_symmetry(self.generator_setup["ramp-symmetry"])
+            self.generator.set_output_mode(OutputMode.ON)
+
+            self.sweep_state = SweepStates.STEP_SETUP
+
+        elif self.sweep_state is SweepStates.STEP_SETUP:
+            self.progress(self.sweep_step * 100 / len(self.sweep_points))
+
+            self.set_parameters(self.sweep_points[self.sweep_step])
+            frequency = self.get_frequency()
+            self.set_timebase_range(self.preferences_setup.get("timebase-periods", self.timebase_periods) / frequency)
+
+            if self.preferences_setup.get("autoscale", True):
+                self.oscilloscope.set_acquire_mode(AcquireMode.Normal)
+                for source in self.get_sources():
+                    self.vertical_offset_scale(source)
+                self.oscilloscope.setup_acquire(**self.acquire_setup)
+
+            self.wait(self.timing_model.settle_time(frequency))
+            self.sweep_state = SweepStates.DOWNLOAD_DATA
+
+        elif self.sweep_state is SweepStates.DOWNLOAD_DATA:
+            frequency = self.get_frequency()
+            average_count = 1
+            if self.acquire_setup.get("acquire-mode", AcquireMode.Normal) is AcquireMode.Average:
+                average_count = self.acquire_setup.get("average-count", 1)
+            if self.timing_model.adaptive:
+                self.set_timeout(self.timing_model.timeout(frequency, self.timebase_range, average_count))
+                if not self.preferences_setup.get("statistics-count"):
+                    self.wait(self.timing_model.acquisition_time(frequency, self.timebase_range, average_count))
+
+            sweep_measure = {
+                self.parameter_fields[parameter]: value
+                for parameter, value in self.sweep_points[self.sweep_step].items()
+            }
+            sweep_measure.update(self.measure_point())
+            self.sweep_measures.append(sweep_measure)
+            self.save_checkpoint({"step": self.sweep_step, "measure": sweep_measure})
+
+            self.sweep_step += 1
+            if self.sweep_step >= len(self.sweep_points):
+                self.sweep_state = SweepStates.DONE
+                self.progress(100)
+            else:
+                self.sweep_state = SweepStates.STEP_SETUP
+
+        elif self.sweep_state is SweepStates.DONE:
+            # Restored points are sorted back into the order of the sweeps
+            points = self.compute_points()
+            fields = [self.parameter_fields[parameter] for parameter in points[0].keys()]
+            order = {tuple(point.values()): index for index, point in enumerate(points)}
+            self.sweep_measures.sort(key=lambda sweep_measure: order.get(tuple([sweep_measure[field] for field in fields]), 0))
+
+            self.result = self.sweep_measures
+            self.restore_timeout()
+            self.finish_checkpoint()
+            self.finish()
+
+    def get_result(self):
+        return self.result
+
+    def get_phase(self) -> str:
+        return self.sweep_state.value
+
+    def what(self):
+        return "Sweeping generator parameters of the system"
+
+    def reset(self):
+        self.sweep_state = SweepStates.INITIAL_SETUP
+        self.sweep_measures = []
+        self.sweep_points = []
+        self.sweep_step = 0
+        self.sweep_parameters = {}
+        self.timebase_range = None
+        self.channel_ranges = {}
+        self.resumed = False
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        self.result = None
+        self.finished = False
@@ -0,0 +1,162 @@
+"""
+Circuit fitting routines used to estimate the component values of simple R, L and C
+models from a measured impedance.
+"""
+
+# python native modules
+from enum import Enum
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+class CircuitModel(Enum):
+    SeriesRC = "Series RC"
+    SeriesRL = "Series RL"
+    SeriesRLC = "Series RLC"
+    ParallelRC = "Parallel RC"
+    ParallelRL = "Parallel RL"
+    ParallelRLC = "Parallel RLC"
+
+
+#############
+# Constants #
+#############
+
+# Components of each model, in the order of their values, and whether they are in series
+MODEL_COMPONENTS = {
+    CircuitModel.SeriesRC: (("resistance", "capacitance"), True),
+    CircuitModel.SeriesRL: (("resistance", "inductance"), True),
+    CircuitModel.SeriesRLC: (("resistance", "inductance", "capacitance"), True),
+    CircuitModel.ParallelRC: (("resistance", "capacitance"), False),
+    CircuitModel.ParallelRL: (("resistance", "inductance"), False),
+    CircuitModel.ParallelRLC: (("resistance", "inductance", "capacitance"), False)
+}
+
+
+#############
+# Functions #
+#############
+
+def component_terms(component: str, value, omega, series: bool):
+    """ Returns the term of the component in the impedance of a series model, or in the admittance
+    of a parallel model, and the sign of its derivative with respect to the logarithm of the value """
+    if component == "resistance":
+        return (value * numpy.ones(len(omega)), 1) if series else (numpy.ones(len(omega)) / value, -1)
+    if component == "inductance":
+        return (1j * omega * value, 1) if series else (1 / (1j * omega * value), -1)
+    return (1 / (1j * omega * value), -1) if series else (1j * omega * value, 1)
+
+
+def model_impedance(model: CircuitModel, values, frequency):
+    """ Returns the impedance of the model with the given component values at each frequency,
+    and its jacobian with respect to the logarithm of the values, with a column per component """
+    components, series = MODEL_COMPONENTS[model]
+    omega = 2 * numpy.pi * numpy.asarray(frequency, dtype=float)
+    terms = [component_terms(component, value, omega, series) for component, value in zip(components, values)]
+
+    total = sum([term for term, _ in terms])
+    derivatives = numpy.column_stack([sign * term for term, sign in terms])
+    if series:
+        return total, derivatives
+    impedance = 1 / total
+    return impedance, -impedance[:, numpy.newaxis] ** 2 * derivatives
+
+
+def initial_values(model: CircuitModel, frequency, impedance):
+    """ Returns the initial component values of the fit, solving the linear least squares problem
+    of the real and imaginary parts of the impedance, or admittance, of the model """
+    components, series = MODEL_COMPONENTS[model]
+    omega = 2 * numpy.pi * numpy.asarray(frequency, dtype=float)
+    target = impedance if series else 1 / impedance
+
+    # Each component is linear in a single part, as R, wL and 1/(wC) in series
+    columns = {
+        "resistance": (numpy.ones(len(omega)), 0),
+        "inductance": (omega if series else -1 / omega, 1),
+        "capacitance": (-1 / omega if series else omega, 1)
+    }
+    weights = 1 / numpy.abs(target)
+    design = numpy.zeros((2 * len(omega), len(components)))
+    for index, component in enumerate(components):
+        column, part = columns[component]
+        design[part * len(omega):(part + 1) * len(omega), index] = column
+    rows = numpy.concatenate((weights, weights))
+    coefficients = numpy.linalg.lstsq(
+        design * rows[:, numpy.newaxis],
+        numpy.concatenate((target.real, target.imag)) * rows,
+        rcond=None
+    )[0]
+
+    # Coefficients are R, L and 1/C in series, and 1/R, 1/L and C in parallel
+    values = []
+    for component, coefficient in zip(components, coefficients):
+        inverted = (component == "capacitance") == series
+        coefficient = abs(coefficient) if coefficient != 0 else 1e-12
+        values.append(1 / coefficient if inverted else coefficient)
+    return numpy.array(values)
+
+
+def circuit_fit(model: CircuitModel, frequency, impedance, max_iterations: int = 100, tolerance: float = 1e-10) -> dict:
+    """ Fits the component values of the model to the measured impedance with the Levenberg-Marquardt
+    method, minimizing the relative error of the complex impedance at each frequency. The values are
+    fitted in logarithmic scale, so they are always positive.
+        [Return] Returns a dictionary with the fitted component values and the relative residuals.
+            return = {
+                "model": model,
+                "resistance": value_of_resistance,
+                "inductance": value_of_inductance,
+                "capacitance": value_of_capacitance,
+                "residuals": complex_relative_residual_of_each_frequency,
+                "rms-error": rms_value_of_the_relative_residuals,
+                "iterations": number_of_iterations
+            }
+            Only the components of the model are included.
+            """
+    frequency = numpy.asarray(frequency, dtype=float)
+    impedance = numpy.asarray(impedance, dtype=complex)
+    components = MODEL_COMPONENTS[model][0]
+
+    def evaluate(parameters):
+        model_values, jacobian = model_impedance(model, numpy.exp(parameters), frequency)
+        residuals = (model_values - impedance) / impedance
+        jacobian = jacobian / impedance[:, numpy.newaxis]
+        return (
+            numpy.concatenate((residuals.real, residuals.imag)),
+            numpy.concatenate((jacobian.real, jacobian.imag)),
+            residuals
+        )
+
+    parameters = numpy.log(initial_values(model, frequency, impedance))
+    error, jacobian, residuals = evaluate(parameters)
+    cost = numpy.sum(error ** 2)
+    damping = 1e-3
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        hessian = jacobian.T @ jacobian
+        gradient = jacobian.T @ error
+        step = numpy.linalg.solve(hessian + damping * numpy.diag(numpy.diag(hessian) + 1e-12), -gradient)
+
+        candidate = parameters + step
+        candidate_error, candidate_jacobian, candidate_residuals = evaluate(candidate)
+        candidate_cost = numpy.sum(candidate_error ** 2)
+        if candidate_cost < cost:
+            improvement = cost - candidate_cost
+            parameters, error, jacobian, residuals, cost = candidate, candidate_error, candidate_jacobian, candidate_residuals, candidate_cost
+            damping = max(damping / 10, 1e-12)
+            if improvement <= tolerance * max(cost, tolerance):
+                break
+        else:
+            damping *= 10
+            if damping > 1e12:
+                break
+
+    fit = {"model": model}
+    for component, value in zip(components, numpy.exp(parameters)):
+        fit[component] = value
+    fit["residuals"] = residuals
+    fit["rms-error"] = numpy.sqrt(numpy.mean(numpy.abs(residuals) ** 2))
+    fit["iterations"] = iteration
+    return fit
@@ -0,0 +1,120 @@
+"""
+Harmonic distortion routines used to measure the THD and THD+N of sine waveforms
+downloaded from the oscilloscope, when the fundamental frequency is known.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+#############
+# Constants #
+#############
+
+# Coefficients of the four term Blackman-Harris window, sidelobes stay below -92dB
+BLACKMAN_HARRIS = (0.35875, 0.48829, 0.14128, 0.01168)
+
+# Half width of the main lobe of the window, in bins
+MAIN_LOBE_BINS = 4
+
+
+#############
+# Functions #
+#############
+
+def blackman_harris(points: int):
+    """ Returns the four term Blackman-Harris window of the given length """
+    phase = 2 * numpy.pi * numpy.arange(points) / points
+    return sum([(-1) ** index * value * numpy.cos(index * phase) for index, value in enumerate(BLACKMAN_HARRIS)])
+
+
+def power_spectra(samples):
+    """ Computes the power spectrum of each record in the last axis of samples, windowed with the
+    Blackman-Harris window, in a single batched FFT. Spectra are scaled so that summing the bins
+    of a tone gives its mean square value.
+        [Return] Returns an array with the power spectra, with the same leading axes as samples.
+        """
+    samples = numpy.asarray(samples, dtype=float)
+    window = blackman_harris(samples.shape[-1])
+    spectra = numpy.abs(numpy.fft.rfft(samples * window, axis=-1)) ** 2
+    spectra *= 2 / (samples.shape[-1] * numpy.sum(window ** 2))
+    spectra[..., 0] /= 2
+    return spectra
+
+
+def harmonic_analysis(time, samples, frequency: float, harmonics: int = 10):
+    """ Measures the harmonic distortion of sine records with the given fundamental frequency.
+    The power spectra of the records in the second to last axis of samples are averaged, lowering the
+    variance of the noise floor, so samples can hold a single record, a set of captures of a channel
+    with shape (captures, points), or of several channels with shape (channels, captures, points).
+    The power of each harmonic is summed over the main lobe around its peak, so the result does not
+    depend on where the tone falls between bins. Harmonics above the Nyquist frequency are not measured.
+        [Return] Returns a dictionary of arrays with a value per channel, or scalars for a single channel.
+            return = {
+                "fundamental": rms_value_of_the_fundamental,
+                "harmonics": rms_value_of_harmonics_2_to_n_relative_to_the_fundamental,
+                "thd": rms_value_of_the_harmonics_relative_to_the_fundamental,
+                "thd-n": rms_value_of_everything_but_the_fundamental_and_dc_relative_to_the_fundamental
+            }
+            """
+    samples = numpy.asarray(samples, dtype=float)
+    single = samples.ndim < 3
+    records = samples.reshape((-1,) + samples.shape[-2:]) if samples.ndim > 1 else samples.reshape((1, 1, -1))
+    spectra = numpy.mean(power_spectra(records), axis=-2)
+
+    bins = spectra.shape[-1]
+    resolution = 1 / (samples.shape[-1] * (time[1] - time[0]))
+    orders = numpy.arange(1, harmonics + 1)
+    orders = orders[orders * frequency / resolution < bins - 1]
+
+    # Each lobe is centered on the highest bin near the expected one, then its bins are summed
+    expected = numpy.rint(orders * frequency / resolution).astype(int)
+    offsets = numpy.arange(-MAIN_LOBE_BINS, MAIN_LOBE_BINS + 1)
+    search = numpy.clip(expected[:, numpy.newaxis] + offsets, 0, bins - 1)
+    peaks = expected + offsets[numpy.argmax(spectra[:, search], axis=-1)]
+    lobes = numpy.clip(peaks[..., numpy.newaxis] + offsets, 0, bins - 1)
+    powers = numpy.sum(numpy.take_along_axis(spectra[:, numpy.newaxis, :], lobes, axis=-1), axis=-1)
+
+    # The DC lobe and the fundamental lobe are excluded from the noise and distortion power
+    excluded = numpy.zeros(spectra.shape, dtype=bool)
+    excluded[..., :MAIN_LOBE_BINS + 1] = True
+    numpy.put_along_axis(excluded, lobes[:, 0, :], True, axis=-1)
+    residual = numpy.sum(numpy.where(excluded, 0, spectra), axis=-1)
+
+    fundamental = powers[:, 0]
+    result = {
+        "fundamental": numpy.sqrt(fundamental),
+        "harmonics": numpy.sqrt(powers[:, 1:] / fundamental[:, numpy.newaxis]),
+        "thd": numpy.sqrt(numpy.sum(powers[:, 1:], axis=-1) / fundamental),
+        "thd-n": numpy.sqrt(residual / fundamental)
+    }
+    if single:
+        result = {key: value[0] for key, value in result.items()}
+    return result
+
+
+def peak_harmonics(frequency, power, fundamental: float, harmonics: int = 10):
+    """ Measures the harmonic distortion from a power spectrum computed elsewhere, as the FFT function
+    of the oscilloscope, with evenly spaced bins in V^2 rms. The level of each harmonic is the highest bin
+    near its frequency, which is accurate with a flat top window, so the noise power and the THD+N can not
+    be measured this way. Harmonics above the last bin are not measured.
+        [Return] Returns a dictionary with the same values of harmonic_analysis, but the "thd-n".
+        """
+    frequency = numpy.asarray(frequency, dtype=float)
+    power = numpy.asarray(power, dtype=float)
+    resolution = frequency[1] - frequency[0]
+    orders = numpy.arange(1, harmonics + 1)
+    orders = orders[orders * fundamental <= frequency[-1]]
+
+    expected = numpy.rint((orders * fundamental - frequency[0]) / resolution).astype(int)
+    offsets = numpy.arange(-MAIN_LOBE_BINS, MAIN_LOBE_BINS + 1)
+    powers = numpy.max(power[numpy.clip(expected[:, numpy.newaxis] + offsets, 0, len(power) - 1)], axis=1)
+    return {
+        "fundamental": numpy.sqrt(powers[0]),
+        "harmonics": numpy.sqrt(powers[1:] / powers[0]),
+        "thd": numpy.sqrt(numpy.sum(powers[1:]) / powers[0])
+    }
@@ -0,0 +1,74 @@
+"""
+Multi-tone excitation routines, used to build a crest-factor optimized sum of sinusoids
+and to extract the phasor of each tone from the waveforms captured with the oscilloscope.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+#############
+# Functions #
+#############
+
+def tone_harmonics(count: int, max_harmonic: int):
+    """ Returns an array of unique harmonic numbers, logarithmically spaced between the fundamental
+    and the given maximum harmonic. Less than count harmonics may be returned at the low end,
+    where consecutive harmonics are already closer than the requested spacing. """
+    harmonics = numpy.round(numpy.logspace(0, numpy.log10(max_harmonic), num=count))
+    return numpy.unique(harmonics.astype(int))
+
+
+def schroeder_phases(count: int):
+    """ Returns the Schroeder phases (radians) of count equal amplitude tones, a closed form
+    approximation of the phases with the lowest crest factor. """
+    indexes = numpy.arange(count)
+    return -numpy.pi * indexes * (indexes + 1) / count
+
+
+def crest_factor(waveform) -> float:
+    """ Returns the crest factor, the peak to rms ratio, of the waveform """
+    return numpy.max(numpy.abs(waveform)) / numpy.sqrt(numpy.mean(waveform ** 2))
+
+
+def multitone_waveform(harmonics, points: int, iterations: int = 100):
+    """ Returns one period of a sum of equal amplitude tones at the given harmonics, normalized to
+    the [-1, 1] range. Starting from the Schroeder phases, the crest factor is reduced by iteratively
+    clipping the waveform and restoring the tone amplitudes, keeping the best waveform found. """
+    spectrum = numpy.zeros(points // 2 + 1, dtype=complex)
+    spectrum[harmonics] = numpy.exp(1j * schroeder_phases(len(harmonics)))
+    waveform = numpy.fft.irfft(spectrum, points)
+
+    best_waveform = waveform
+    for _ in range(iterations):
+        level = 0.9 * numpy.max(numpy.abs(waveform))
+        clipped_spectrum = numpy.fft.rfft(numpy.clip(waveform, -level, level))
+        spectrum[harmonics] = numpy.exp(1j * numpy.angle(clipped_spectrum[harmonics]))
+        waveform = numpy.fft.irfft(spectrum, points)
+        if crest_factor(waveform) < crest_factor(best_waveform):
+            best_waveform = waveform
+
+    return best_waveform / numpy.max(numpy.abs(best_waveform))
+
+
+def tone_phasors(time, samples, fundamental: float, harmonics):
+    """ Computes the phasor of each tone in every row of samples, using the FFT of the longest
+    part of the record holding an integer number of periods of the fundamental frequency.
+        [Return] Returns a complex matrix, with one row per row of samples and one column per harmonic,
+            where the module is the tone amplitude.
+            """
+    samples = numpy.atleast_2d(samples)
+    sample_interval = time[1] - time[0]
+    periods = int(len(time) * sample_interval * fundamental)
+    if periods < 1:
+        raise ValueError("The record does not contain a complete period of the fundamental frequency.")
+
+    length = int(round(periods / (fundamental * sample_interval)))
+    if numpy.max(harmonics) * periods > length // 2:
+        raise ValueError("The record does not contain enough samples per period of the highest harmonic.")
+    spectrum = numpy.fft.rfft(samples[:, :length], axis=1) * 2 / length
+    return spectrum[:, numpy.asarray(harmonics) * periods]
@@ -0,0 +1,58 @@
+"""
+Noise analysis routines used to estimate the power spectral density of records
+downloaded from the oscilloscope, averaged over any number of captures.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+class WelchAccumulator(object):
+    """ Accumulates the Welch estimate of the power spectral density of records added one at a time.
+    Each record is split into segments of the given length, overlapping by half of it, which are
+    windowed with a Hann window and transformed with a single batched FFT. Only the sum of their
+    power spectra is kept, so the memory used does not depend on the number of records averaged.
+    Records must share the same sample interval, they can have different lengths.
+    """
+
+    def __init__(self, segment_points: int, sample_interval: float):
+        self.segment_points = segment_points
+        self.sample_interval = sample_interval
+        self.window = numpy.hanning(segment_points + 1)[:-1]
+        self.power = numpy.zeros(segment_points // 2 + 1)
+        self.segments = 0
+
+    def add(self, samples):
+        """ Adds the segments of a record to the estimate, the remaining samples after the last
+        complete segment are discarded """
+        samples = numpy.asarray(samples, dtype=float)
+        step = self.segment_points // 2
+        count = (len(samples) - self.segment_points) // step + 1
+        if count < 1:
+            return
+
+        indexes = numpy.arange(count)[:, numpy.newaxis] * step + numpy.arange(self.segment_points)
+        segments = samples[indexes]
+        segments = segments - numpy.mean(segments, axis=1, keepdims=True)
+        self.power += numpy.sum(numpy.abs(numpy.fft.rfft(segments * self.window, axis=1)) ** 2, axis=0)
+        self.segments += count
+
+    def frequency(self):
+        """ Returns the frequency of each bin of the estimate """
+        return numpy.fft.rfftfreq(self.segment_points, self.sample_interval)
+
+    def psd(self):
+        """ Returns the one sided power spectral density, in V^2/Hz, averaged over every segment added """
+        psd = self.power * self.sample_interval / (max(self.segments, 1) * numpy.sum(self.window ** 2))
+        psd[1:] *= 2
+        if self.segment_points % 2 == 0:
+            psd[-1] /= 2
+        return psd
+
+    def reset(self):
+        self.power = numpy.zeros(self.segment_points // 2 + 1)
+        self.segments = 0
@@ -0,0 +1,56 @@
+"""
+Phase analysis routines used to unwrap the phase of a frequency response measured at discrete
+frequencies, and to derive its group delay.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+from labtool.analysis.sine_fit import wrap_phase
+
+
+#############
+# Functions #
+#############
+
+def unwrap_phase(phase, uncertainty=0, max_step: float = 90, coverage: float = 3):
+    """ Unwraps the phase, in degrees, of points sorted by frequency, taking the step between neighbours
+    with the smallest magnitude. The step is ambiguous when it could also have been the one turning the
+    other way, which is assumed when its magnitude, widened by coverage times the uncertainty of the step,
+    exceeds max_step degrees, as the true step between close enough points is expected to be small.
+        [Options]
+            + uncertainty: Standard deviation of the phase in degrees, a value per point or a single one
+        [Return] Returns a tuple with the unwrapped phase, starting from the first point in the [-180, 180)
+            range, and a boolean array telling, for each pair of neighbours, whether their step is ambiguous.
+            """
+    phase = numpy.asarray(phase, dtype=float)
+    if len(phase) == 0:
+        return phase, numpy.zeros(0, dtype=bool)
+    uncertainty = numpy.broadcast_to(numpy.asarray(uncertainty, dtype=float), phase.shape)
+
+    steps = wrap_phase(numpy.diff(phase))
+    step_uncertainty = numpy.hypot(uncertainty[1:], uncertainty[:-1])
+    ambiguous = numpy.abs(steps) + coverage * step_uncertainty > max_step
+
+    unwrapped = wrap_phase(phase[0]) + numpy.concatenate(([0], numpy.cumsum(steps)))
+    return unwrapped, ambiguous
+
+
+def group_delay(frequency, phase):
+    """ Returns the group delay, in seconds, at each frequency, the derivative of the unwrapped phase,
+    in degrees, with respect to the angular frequency, with second order differences over the
+    uneven spacing of the points. """
+    frequency = numpy.asarray(frequency, dtype=float)
+    if len(frequency) < 2:
+        return numpy.zeros(len(frequency))
+    return -numpy.gradient(numpy.radians(phase), 2 * numpy.pi * frequency)
+
+
+def refine_frequencies(frequency, ambiguous):
+    """ Returns the frequencies to measure for resolving the ambiguous steps, the geometric mean
+    of each pair of neighbours whose step is ambiguous """
+    frequency = numpy.asarray(frequency, dtype=float)
+    return numpy.sqrt(frequency[1:] * frequency[:-1])[ambiguous]
@@ -0,0 +1,84 @@
+"""
+Sine estimation routines used to extract the amplitude and phase of waveforms
+downloaded from the oscilloscope, when the excitation frequency is known.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+#############
+# Functions #
+#############
+
+def sine_fit(time, samples, frequency: float):
+    """ Least-squares fit of a sine of known frequency (three parameter fit) to each row of samples,
+    using the model amplitude * cos(2 * pi * frequency * time + phase) + offset.
+        [Return] Returns a tuple with arrays of amplitude, phase (radians), offset and residual rms value,
+            with one value per row of samples.
+            """
+    samples = numpy.atleast_2d(samples)
+    omega = 2 * numpy.pi * frequency
+    design = numpy.column_stack((numpy.cos(omega * time), numpy.sin(omega * time), numpy.ones(len(time))))
+    coefficients = numpy.linalg.lstsq(design, samples.T, rcond=None)[0]
+    residual = samples.T - design @ coefficients
+
+    amplitude = numpy.hypot(coefficients[0], coefficients[1])
+    phase = numpy.arctan2(-coefficients[1], coefficients[0])
+    return amplitude, phase, coefficients[2], numpy.sqrt(numpy.mean(residual ** 2, axis=0))
+
+
+def sine_fit_segments(time, samples, frequencies, weights=None):
+    """ Least-squares fit of a sine to each segment of samples, as sine_fit, where each segment has its
+    own known frequency. Segments share the time values, and are fitted at once by solving the normal
+    equations of every segment together.
+        [Options]
+            + weights: Weight of each sample in the fit, with the shape of the segments, as a window
+                which leaves out the samples outside of it
+        [Return] Returns a tuple with arrays of amplitude, phase (radians), offset and residual rms value,
+            with the shape of samples without its last axis, (..., segments).
+            """
+    samples = numpy.asarray(samples, dtype=float)
+    omega = 2 * numpy.pi * numpy.asarray(frequencies, dtype=float)[:, numpy.newaxis]
+    design = numpy.stack(
+        (numpy.cos(omega * time), numpy.sin(omega * time), numpy.ones((len(omega), len(time)))),
+        axis=-1
+    )
+    weights = numpy.ones(design.shape[:2]) if weights is None else numpy.asarray(weights, dtype=float)
+
+    normal = numpy.einsum("sp,spi,spj->sij", weights, design, design)
+    projection = numpy.einsum("sp,spi,...sp->...si", weights, design, samples)
+    coefficients = numpy.linalg.solve(normal, projection[..., numpy.newaxis])[..., 0]
+    residual = samples - numpy.einsum("spi,...si->...sp", design, coefficients)
+
+    amplitude = numpy.hypot(coefficients[..., 0], coefficients[..., 1])
+    phase = numpy.arctan2(-coefficients[..., 1], coefficients[..., 0])
+    rms = numpy.sqrt(numpy.sum(weights * residual ** 2, axis=-1) / numpy.sum(weights, axis=-1))
+    return amplitude, phase, coefficients[..., 2], rms
+
+
+def sine_fit_uncertainty(amplitude, residual, points: int):
+    """ Estimates the standard deviation of the fitted values, assuming the residual is white noise.
+    The relative amplitude uncertainty is returned, which is also the phase uncertainty in radians,
+    one value per fitted row. """
+    return residual * numpy.sqrt(2 / points) / amplitude
+
+
+def single_bin_dft(time, samples, frequency: float):
+    """ Computes the DFT of each row of samples at the given frequency only, exact when the
+    waveform contains an integer number of periods.
+        [Return] Returns a tuple with arrays of amplitude and phase (radians), one value per row of samples.
+        """
+    samples = numpy.atleast_2d(samples)
+    kernel = numpy.exp(-2j * numpy.pi * frequency * time)
+    phasors = 2 * (samples - numpy.mean(samples, axis=1, keepdims=True)) @ kernel / len(time)
+    return numpy.abs(phasors), numpy.angle(phasors)
+
+
+def wrap_phase(phase: float) -> float:
+    """ Wraps the phase value in degrees to the [-180, 180) range """
+    return (phase + 180) % 360 - 180
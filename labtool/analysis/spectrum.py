@@ -0,0 +1,72 @@
+"""
+Spectral analysis routines used to estimate frequency responses from captured waveforms.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+#############
+# Functions #
+#############
+
+def cross_spectra(reference, target):
+    """ Computes the power and cross spectra of a pair of records with the same length.
+        [Return] Returns a tuple with the reference power, cross and target power spectra,
+            the cross spectrum being target * conjugate(reference).
+            """
+    reference_spectrum = numpy.fft.rfft(reference)
+    target_spectrum = numpy.fft.rfft(target)
+    return (
+        numpy.abs(reference_spectrum) ** 2,
+        target_spectrum * numpy.conj(reference_spectrum),
+        numpy.abs(target_spectrum) ** 2
+    )
+
+
+def band_edges(centers):
+    """ Returns the edges of the bands around each center frequency, placed at the geometric
+    mean between neighbouring centers, the outer bands being symmetric in a log scale. """
+    centers = numpy.asarray(centers, dtype=float)
+    if len(centers) < 2:
+        return numpy.array([centers[0] / 1.1, centers[0] * 1.1])
+
+    middles = numpy.sqrt(centers[1:] * centers[:-1])
+    return numpy.concatenate(
+        ([centers[0] ** 2 / middles[0]], middles, [centers[-1] ** 2 / middles[-1]])
+    )
+
+
+def band_sum(frequency, spectrum, centers):
+    """ Sums the spectrum bins falling inside the band of each center frequency. Bands narrower
+    than the frequency resolution use the nearest bin. """
+    edges = numpy.searchsorted(frequency, band_edges(centers))
+    lower = numpy.minimum(edges[:-1], len(frequency) - 1)
+    upper = numpy.maximum(edges[1:], lower + 1)
+    cumulative = numpy.concatenate(([0], numpy.cumsum(spectrum)))
+    return cumulative[upper] - cumulative[lower]
+
+
+def band_transfer(frequency, reference_power, cross, target_power, centers):
+    """ Estimates the transfer function at each center frequency with the H1 estimator,
+    dividing the band averaged cross spectrum by the band averaged reference power spectrum.
+        [Return] Returns a tuple with the complex transfer function and the coherence of each band.
+        """
+    reference_band = band_sum(frequency, reference_power, centers)
+    cross_band = band_sum(frequency, cross, centers)
+    target_band = band_sum(frequency, target_power, centers)
+    return cross_band / reference_band, numpy.abs(cross_band) ** 2 / (reference_band * target_band)
+
+
+def band_coherence(frequency, reference_power, cross, target_power, centers):
+    """ Estimates the coherence at each center frequency from the spectra summed over several independent
+    captures, computing the coherence of each bin across the captures and averaging it over the band,
+    weighted by the reference power. The spectra of a single capture always give a coherence of 1.
+        [Return] Returns the coherence of each band, between 0 and 1.
+        """
+    bin_coherence = numpy.abs(cross) ** 2 / (reference_power * target_power)
+    return band_sum(frequency, bin_coherence * reference_power, centers) / band_sum(frequency, reference_power, centers)
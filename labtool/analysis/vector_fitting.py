@@ -0,0 +1,237 @@
+"""
+Vector fitting routines used to identify a stable rational model, its poles, zeros and gain,
+from a measured frequency response.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+#############
+# Constants #
+#############
+
+# Zeros above this multiple of the highest frequency of the band are not part of the model
+FAR_ZEROS = 10
+
+
+#############
+# Functions #
+#############
+
+def initial_poles(frequency, order: int):
+    """ Returns the starting poles of the fit, complex pairs with their imaginary parts spread in a log
+    scale over the band and weakly damped, and a real pole in the middle of the band for odd orders.
+    Poles are normalized by the highest angular frequency. """
+    omega = 2 * numpy.pi * numpy.asarray(frequency, dtype=float) / (2 * numpy.pi * numpy.max(frequency))
+    poles = []
+    if order % 2:
+        poles.append(-numpy.sqrt(numpy.min(omega) * numpy.max(omega)) + 0j)
+    for beta in numpy.logspace(numpy.log10(numpy.min(omega)), numpy.log10(numpy.max(omega)), order // 2):
+        poles += [-beta / 100 + 1j * beta, -beta / 100 - 1j * beta]
+    return numpy.array(poles)
+
+
+def pole_basis(s, poles):
+    """ Returns the real valued basis of partial fractions of the poles, with a column per pole,
+    where complex pairs use the columns 1/(s-a)+1/(s-a*) and j/(s-a)-j/(s-a*), and the state matrices
+    A and b whose realization has the poles as eigenvalues. """
+    basis = numpy.zeros((len(s), len(poles)), dtype=complex)
+    state = numpy.zeros((len(poles), len(poles)))
+    input_vector = numpy.zeros(len(poles))
+    index = 0
+    while index < len(poles):
+        pole = poles[index]
+        if pole.imag == 0:
+            basis[:, index] = 1 / (s - pole)
+            state[index, index] = pole.real
+            input_vector[index] = 1
+            index += 1
+        else:
+            basis[:, index] = 1 / (s - pole) + 1 / (s - numpy.conj(pole))
+            basis[:, index + 1] = 1j / (s - pole) - 1j / (s - numpy.conj(pole))
+            state[index:index + 2, index:index + 2] = [[pole.real, pole.imag], [-pole.imag, pole.real]]
+            input_vector[index:index + 2] = [2, 0]
+            index += 2
+    return basis, state, input_vector
+
+
+def sort_poles(poles):
+    """ Returns the poles with unstable ones flipped to the left half plane, the real poles first and
+    then each complex pole followed by its conjugate """
+    poles = numpy.where(poles.real > 0, -numpy.conj(poles), poles)
+    real = numpy.sort(poles[poles.imag == 0].real) + 0j
+    upper = numpy.sort_complex(poles[poles.imag > 0])
+    pairs = numpy.column_stack((upper, numpy.conj(upper))).ravel()
+    return numpy.concatenate((real, pairs))
+
+
+def solve_weighted(design, target, weights):
+    """ Solves the complex least squares problem with real unknowns, weighting each row """
+    design = design * weights[:, numpy.newaxis]
+    target = target * weights
+    return numpy.linalg.lstsq(
+        numpy.concatenate((design.real, design.imag)),
+        numpy.concatenate((target.real, target.imag)),
+        rcond=None
+    )[0]
+
+
+def vector_fit(frequency, response, order: int, iterations: int = 10, poles=None, constant: bool = True) -> dict:
+    """ Fits a rational model of the given order to the frequency response with vector fitting.
+    Poles are relocated in each iteration from the zeros of the weighting function, solved for every
+    point at once with a single least squares problem, and unstable poles are flipped so the model
+    is stable. Errors are weighted by the inverse of the response, so the fit error is relative.
+        [Options]
+            + poles: Starting poles, as the ones of a previous fit, which warm starts the fit
+            + constant: Whether the model has a constant term, otherwise it is strictly proper
+        [Return] Returns a dictionary with the model, H(s) = sum(residues / (s - poles)) + constant,
+            which is also gain * prod(s - zeros) / prod(s - poles).
+            return = {
+                "poles": array_of_poles,
+                "residues": array_of_residues,
+                "constant": value_of_constant,
+                "zeros": array_of_zeros,
+                "gain": value_of_gain,
+                "fit-error": rms_value_of_the_relative_error
+            }
+            Poles, residues and zeros are in rad/s. Zeros far above the band are left out.
+            """
+    frequency = numpy.asarray(frequency, dtype=float)
+    response = numpy.asarray(response, dtype=complex)
+
+    # The fit is solved with the angular frequency normalized, for a better conditioning
+    scale = 2 * numpy.pi * numpy.max(frequency)
+    s = 2j * numpy.pi * frequency / scale
+    poles = initial_poles(frequency, order) if poles is None else sort_poles(numpy.asarray(poles) / scale)
+    weights = 1 / numpy.maximum(numpy.abs(response), 1e-300)
+    offset = numpy.ones((len(s), int(constant)))
+
+    for _ in range(iterations):
+        basis, state, input_vector = pole_basis(s, poles)
+        coefficients = solve_weighted(
+            numpy.column_stack((basis, offset, -response[:, numpy.newaxis] * basis)),
+            response,
+            weights
+        )
+        sigma_residues = coefficients[-len(poles):]
+        poles = sort_poles(numpy.linalg.eigvals(state - numpy.outer(input_vector, sigma_residues)))
+
+    # Residues are identified with the final poles
+    basis = pole_basis(s, poles)[0]
+    coefficients = solve_weighted(numpy.column_stack((basis, offset)), response, weights)
+    residues = numpy.zeros(len(poles), dtype=complex)
+    index = 0
+    while index < len(poles):
+        if poles[index].imag == 0:
+            residues[index] = coefficients[index]
+            index += 1
+        else:
+            residues[index] = coefficients[index] + 1j * coefficients[index + 1]
+            residues[index + 1] = numpy.conj(residues[index])
+            index += 2
+    constant_term = coefficients[len(poles)] if constant else 0
+
+    # Numerator of the normalized model, whose negligible leading terms are removed
+    numerator = constant_term * numpy.poly(poles)
+    for index in range(len(poles)):
+        numerator = numpy.polyadd(numerator, residues[index] * numpy.poly(numpy.delete(poles, index)))
+    numerator = numpy.real_if_close(numerator, tol=1e6)
+    leading = numpy.argmax(numpy.abs(numerator) > 1e-9 * numpy.max(numpy.abs(numerator)))
+    numerator = numerator[leading:]
+    zeros = numpy.roots(numerator)
+
+    # Zeros far above the band come from the error of the response, they are folded into the gain
+    gain = numerator[0] * numpy.prod(-zeros[numpy.abs(zeros) > FAR_ZEROS])
+    zeros = zeros[numpy.abs(zeros) <= FAR_ZEROS]
+
+    fit = {
+        "poles": poles * scale,
+        "residues": residues * scale,
+        "constant": constant_term,
+        "zeros": zeros * scale,
+        "gain": numpy.real_if_close(gain) * scale ** (len(poles) - len(zeros))
+    }
+    fit["fit-error"] = numpy.sqrt(numpy.mean(numpy.abs((model_response(fit, frequency) - response) * weights) ** 2))
+    return fit
+
+
+def model_response(fit: dict, frequency):
+    """ Returns the response of the fitted model at the given frequencies """
+    s = 2j * numpy.pi * numpy.asarray(frequency, dtype=float)
+    return numpy.sum(fit["residues"] / (s[:, numpy.newaxis] - fit["poles"]), axis=1) + fit["constant"]
+
+
+def required_points(frequency, response, order: int, accuracy: float, constant: bool = True):
+    """ Returns the smallest number of points, evenly taken from the given ones, whose fit of the given
+    order reaches the accuracy, as the relative error over every point, or None if none reaches it.
+    Points are expected to be sorted and spaced as in the sweep. """
+    frequency = numpy.asarray(frequency, dtype=float)
+    response = numpy.asarray(response, dtype=complex)
+
+    # Each point gives two equations, for the real unknowns of the poles, the residues and the constant
+    minimum = order + 2
+    if len(frequency) < minimum:
+        return None
+    for count in numpy.unique(numpy.geomspace(minimum, len(frequency), 16).astype(int)):
+        indexes = numpy.unique(numpy.rint(numpy.linspace(0, len(frequency) - 1, count)).astype(int))
+        fit = vector_fit(frequency[indexes], response[indexes], order, constant=constant)
+        error = numpy.sqrt(numpy.mean(numpy.abs(model_response(fit, frequency) / response - 1) ** 2))
+        if error <= accuracy:
+            return len(indexes)
+    return None
+
+
+class LiveVectorFit(object):
+    """ Vector fitting of a frequency response updated while its points arrive. Each update warm starts
+    from the poles of the previous fit, so a couple of iterations are enough to follow the new points.
+    The fit starts once there are enough points for the order, and is then updated every interval points,
+    so the cost of fitting does not grow with each point of a long sweep. """
+
+    def __init__(self, order: int, iterations: int = 2, constant: bool = True, interval: int = 5):
+        self.order = order
+        self.iterations = iterations
+        self.constant = constant
+        self.interval = interval
+        self.frequency = []
+        self.response = []
+        self.pending = 0
+        self.fit = None
+
+    def add(self, frequency: float, response: complex):
+        """ Adds a point, updating the fit when it is the first one with enough points,
+        or interval points have been added since the last update """
+        self.frequency.append(frequency)
+        self.response.append(response)
+        self.pending += 1
+        if len(self.frequency) >= self.order + 2 and (self.fit is None or self.pending >= self.interval):
+            self.update()
+
+    def flush(self):
+        """ Updates the fit with the points added since the last update, if any """
+        if self.pending and len(self.frequency) >= self.order + 2:
+            self.update()
+
+    def update(self):
+        self.pending = 0
+        if self.fit is None:
+            self.fit = vector_fit(self.frequency, self.response, self.order, constant=self.constant)
+        else:
+            self.fit = vector_fit(
+                self.frequency,
+                self.response,
+                self.order,
+                iterations=self.iterations,
+                poles=self.fit["poles"],
+                constant=self.constant
+            )
+
+    def reset(self):
+        self.frequency = []
+        self.response = []
+        self.pending = 0
+        self.fit = None
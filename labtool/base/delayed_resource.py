@@ -22,10 +22,20 @@ class DelayedResource(object):
     def set_delay(self, delay):
         self.delay = delay
 
+    def set_timeout(self, timeout):
+        self.resource.timeout = timeout * 1000
+
+    def get_timeout(self):
+        return self.resource.timeout / 1000
+
     def write(self, *args, **kwargs):
         self.resource.write(*args, **kwargs)
         time.sleep(self.delay)
 
+    def write_binary_values(self, *args, **kwargs):
+        self.resource.write_binary_values(*args, **kwargs)
+        time.sleep(self.delay)
+
     def read(self, *args, **kwargs):
         return self.resource.read(*args, **kwargs)
 
@@ -34,5 +44,10 @@ class DelayedResource(object):
         time.sleep(self.delay)
         return buffer
 
+    def query_binary_values(self, *args, **kwargs):
+        values = self.resource.query_binary_values(*args, **kwargs)
+        time.sleep(self.delay)
+        return values
+
     def close(self):
         self.resource.close()
@@ -0,0 +1,111 @@
+"""
+DryRunResource is a class standing in for a PyVisa Resource, without
+any instrument connected, counting the commands sent and the time they
+would have taken.
+"""
+
+# python native modules
+
+# third-party modules
+import numpy
+
+# labtool project modules
+
+
+#############
+# Constants #
+#############
+
+# Replies of the queries of a dry run, for the command syntax of each brand, only the replies
+# whose default value is not valid are needed
+AGILENT_REPLIES = {
+    ":CHAN": "8",
+    ":WAV:PRE?": "1,0,1000,1,1e-06,0,0,1e-04,0,32768",
+    ":WAV:DATA?": lambda settings: settings.get(":WAV:POIN", "1000"),
+    ":MEASure:RESults?": ",".join(["Meas,1,1,1,1,0,1000"] * 8)
+}
+
+DRY_RUN_REPLIES = {
+    "AGILENT": AGILENT_REPLIES,
+    "RIGOL": AGILENT_REPLIES
+}
+
+
+class DryRunResource(object):
+    """ PyVisa Resource replacement used to estimate the time of a measurement without running it.
+    Every command is counted and its time is computed from the latency model of the instrument's driver,
+    under the current phase name, so the caller can split the costs of the measurement.
+        [Latency model]
+            + write: Time taken by a command, in seconds
+            + query: Time taken by a query, in seconds
+            + transfer-rate: Bytes per second of binary transfers
+            + commands: Dictionary of command prefixes and the additional time they take to execute
+        Queries are answered with the first reply of the given dictionary whose prefix matches the query,
+        or "1" if there is none. A reply can also be a function receiving the last value written with each
+        command header, as in {":WAV:POIN": "1000"}. Binary queries are answered with as many zeros as
+        their reply says.
+    """
+
+    default_reply = "1"
+
+    def __init__(self, latency_model: dict, replies: dict):
+        self.latency_model = latency_model
+        self.replies = replies
+        self.delay = 0
+        self.timeout = 0
+
+        self.settings = {}
+        self.phase = None
+        self.costs = {}
+
+    def account(self, kind: str, command: str, size: int = 0):
+        """ Adds the time of a command to the costs of the current phase """
+        elapsed = self.latency_model[kind] + self.delay + size / self.latency_model["transfer-rate"]
+        for prefix, extra_time in self.latency_model.get("commands", {}).items():
+            if command.startswith(prefix):
+                elapsed += extra_time
+
+        cost = self.costs.setdefault(self.phase, {"commands": 0, "time": 0})
+        cost["commands"] += 1
+        cost["time"] += elapsed
+
+    def reply(self, command: str) -> str:
+        for prefix, reply in self.replies.items():
+            if command.startswith(prefix):
+                return reply(self.settings) if callable(reply) else reply
+        return DryRunResource.default_reply
+
+    def set_delay(self, delay):
+        self.delay = delay
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout * 1000
+
+    def get_timeout(self):
+        return self.timeout / 1000
+
+    def write(self, command, *args, **kwargs):
+        self.account("write", command)
+        if " " in command:
+            header, value = command.split(" ", 1)
+            self.settings[header] = value
+
+    def write_binary_values(self, command, values, *args, **kwargs):
+        datatype = kwargs.get("datatype", args[0] if args else "f")
+        self.account("write", command, len(values) * numpy.dtype(datatype).itemsize)
+
+    def read(self, *args, **kwargs):
+        return DryRunResource.default_reply
+
+    def query(self, command, *args, **kwargs):
+        self.account("query", command)
+        return self.reply(command)
+
+    def query_binary_values(self, command, *args, **kwargs):
+        points = int(self.reply(command))
+        datatype = kwargs.get("datatype", args[0] if args else "f")
+        self.account("query", command, points * numpy.dtype(datatype).itemsize)
+        return kwargs.get("container", list)(numpy.zeros(points))
+
+    def close(self):
+        pass
@@ -10,6 +10,8 @@ import pyvisa
 
 # labtool project modules
 from labtool.base.delayed_resource import DelayedResource
+from labtool.base.dry_run_resource import DryRunResource
+from labtool.base.dry_run_resource import DRY_RUN_REPLIES
 
 
 ################################
@@ -47,6 +49,14 @@ class Instrument(object):
     model = "Instrument's Model"
     type = "Instrument's Type"
 
+    # Latency model of the instrument's interface, used to estimate measurements with a dry run
+    latency_model = {
+        "write": 0.005,
+        "query": 0.01,
+        "transfer-rate": 1e6,
+        "commands": {}
+    }
+
     def __init__(self, resource_name):
         """ A Resource is opened and its reference will be saved, but if there is
         no resource with the given name or identifier, then an exception will be
@@ -64,6 +74,19 @@ class Instrument(object):
         except:
             raise ResourceNotFound
 
+    @classmethod
+    def from_resource(cls, resource):
+        """ Returns an instance of the instrument using an already opened resource """
+        instrument = cls.__new__(cls)
+        instrument.resource = resource
+        return instrument
+
+    @classmethod
+    def dry_run(cls):
+        """ Returns an instance of the instrument with no connection, accounting the cost of each
+        command with the latency model of the class, see DryRunResource """
+        return cls.from_resource(DryRunResource(cls.latency_model, DRY_RUN_REPLIES.get(cls.brand, {})))
+
     def __del__(self):
         """ Deleting the interface opened to interact with the given resource.
             Closing the visa connection.
@@ -76,5 +99,13 @@ class Instrument(object):
     def set_delay(self, delay):
         self.resource.set_delay(delay)
 
+    def set_timeout(self, timeout):
+        """ Sets the time, in seconds, a query waits for the instrument's answer """
+        self.resource.set_timeout(timeout)
+
+    def get_timeout(self) -> float:
+        """ Returns the time, in seconds, a query waits for the instrument's answer """
+        return self.resource.get_timeout()
+
     def close(self):
         self.resource.close()
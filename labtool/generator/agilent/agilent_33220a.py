@@ -2,6 +2,9 @@
 Agilent 33220A signal generator class implementation.
 """
 
+# third-party modules
+import numpy
+
 # labtool project modules
 from labtool.tool import LabTool
 
@@ -9,6 +12,11 @@ from labtool.generator.base.generator import Generator
 from labtool.generator.base.generator import Waveform
 from labtool.generator.base.generator import OutputMode
 from labtool.generator.base.generator import SyncMode
+from labtool.generator.base.generator import SweepMode
+from labtool.generator.base.generator import SweepSpacing
+from labtool.generator.base.generator import BurstMode
+from labtool.generator.base.generator import BurstState
+from labtool.generator.base.generator import TriggerSource
 from labtool.generator.base.generator import OutputPolarity
 from labtool.generator.base.generator import OutputLoad
 
@@ -24,13 +32,30 @@ class Agilent33220A(Generator):
     brand = "AGILENT"
     model = "33220A"
 
+    # Interface latency model, a frequency change takes some time to be applied
+    latency_model = {
+        "write": 0.005,
+        "query": 0.02,
+        "transfer-rate": 2e5,
+        "commands": {
+            "*RST": 1.0,
+            "FREQuency ": 0.03
+        }
+    }
+
     # Internal dictionaries of agilent syntax
     waveforms = {
         Waveform.Sine: "SINusoid",
         Waveform.Square: "SQUare",
-        Waveform.Ramp: "RAMP"
+        Waveform.Ramp: "RAMP",
+        Waveform.Arbitrary: "USER"
     }
 
+    # Arbitrary waveform memory limits
+    arbitrary_min_points = 2
+    arbitrary_max_points = 65536
+    arbitrary_dac_max = 8191
+
     output_modes = {
         OutputMode.OFF: "OFF",
         OutputMode.ON: "ON"
@@ -41,6 +66,32 @@ class Agilent33220A(Generator):
         SyncMode.ON: "ON"
     }
 
+    sweep_modes = {
+        SweepMode.OFF: "OFF",
+        SweepMode.ON: "ON"
+    }
+
+    sweep_spacings = {
+        SweepSpacing.Linear: "LINear",
+        SweepSpacing.Log: "LOGarithmic"
+    }
+
+    burst_modes = {
+        BurstMode.Triggered: "TRIGgered",
+        BurstMode.Gated: "GATed"
+    }
+
+    burst_states = {
+        BurstState.OFF: "OFF",
+        BurstState.ON: "ON"
+    }
+
+    trigger_sources = {
+        TriggerSource.Immediate: "IMMediate",
+        TriggerSource.External: "EXTernal",
+        TriggerSource.Bus: "BUS"
+    }
+
     output_polarities = {
         OutputPolarity.Normal: "NORMal",
         OutputPolarity.Inverted: "INVerted"
@@ -119,6 +170,25 @@ class Agilent33220A(Generator):
         """Changes output symmetry, only applicable if output is Ramp"""
         self.resource.write("FUNCtion:{}:SYMMetry {}".format(self.waveforms[Waveform.Ramp], percent))
 
+    def upload_arbitrary(self, points):
+        """ Uploads the waveform points, normalized to the [-1, 1] range, to the volatile arbitrary
+        waveform memory and selects it as the Arbitrary waveform. Points are transferred as a binary
+        block of DAC values. """
+        if not self.arbitrary_min_points <= len(points) <= self.arbitrary_max_points:
+            raise ValueError("Arbitrary waveforms need between {} and {} points.".format(
+                self.arbitrary_min_points,
+                self.arbitrary_max_points)
+            )
+
+        self.resource.write("FORMat:BORDer SWAPped")
+        self.resource.write_binary_values(
+            "DATA:DAC VOLATILE, ",
+            numpy.round(numpy.clip(points, -1, 1) * self.arbitrary_dac_max).astype(int),
+            datatype="h",
+            is_big_endian=False
+        )
+        self.resource.write("FUNCtion:USER VOLATILE")
+
     def set_output_mode(self, mode: OutputMode):
         """Turns the output on or off depending on the arg"""
         self.resource.write("OUTPut {}".format(self.output_modes[mode]))
@@ -155,6 +225,58 @@ class Agilent33220A(Generator):
         """Returns a OutputMode indicating output state"""
         return self.resource.query("OUTPut:SYNC?")
 
+    ##################
+    # SWEEP COMMANDS #
+    ##################
+
+    def set_sweep_mode(self, mode: SweepMode):
+        """ Turns the frequency sweep on or off depending on the arg """
+        self.resource.write("SWEep:STATe {}".format(self.sweep_modes[mode]))
+
+    def set_sweep_spacing(self, spacing: SweepSpacing):
+        """ Changes the sweep spacing, selectable from the ones in Enum """
+        self.resource.write("SWEep:SPACing {}".format(self.sweep_spacings[spacing]))
+
+    def set_sweep_time(self, seconds: float):
+        """ Changes the time taken to sweep from the start to the stop frequency """
+        self.resource.write("SWEep:TIME {}".format(seconds))
+
+    def set_start_frequency(self, frequency: float):
+        """ Changes the start frequency of the sweep """
+        self.resource.write("FREQuency:STARt {}".format(frequency))
+
+    def set_stop_frequency(self, frequency: float):
+        """ Changes the stop frequency of the sweep """
+        self.resource.write("FREQuency:STOP {}".format(frequency))
+
+    ##################
+    # BURST COMMANDS #
+    ##################
+
+    def set_burst_mode(self, mode: BurstMode):
+        """ Changes the burst mode, selectable from the ones in Enum """
+        self.resource.write("BURSt:MODE {}".format(self.burst_modes[mode]))
+
+    def set_burst_cycles(self, cycles: int):
+        """ Changes the number of cycles output by each triggered burst """
+        self.resource.write("BURSt:NCYCles {}".format(cycles))
+
+    def set_burst_state(self, state: BurstState):
+        """ Turns the burst mode on or off depending on the arg """
+        self.resource.write("BURSt:STATe {}".format(self.burst_states[state]))
+
+    ####################
+    # TRIGGER COMMANDS #
+    ####################
+
+    def set_trigger_source(self, source: TriggerSource):
+        """ Changes the trigger source used to start sweeps and bursts, selectable from the ones in Enum """
+        self.resource.write("TRIGger:SOURce {}".format(self.trigger_sources[source]))
+
+    def trigger(self):
+        """ Triggers the generator, only applicable if the trigger source is Bus """
+        self.resource.write("*TRG")
+
 
 # Subscribing the new instrument to the lab-tool register
 LabTool.add_generator(Agilent33220A)
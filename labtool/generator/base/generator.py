@@ -27,6 +27,7 @@ class Waveform(Enum):
     Sine = "Sine"
     Square = "Square"
     Ramp = "Ramp"
+    Arbitrary = "Arbitrary"
 
 
 class OutputMode(Enum):
@@ -39,6 +40,32 @@ class SyncMode(Enum):
     ON = "ON"
 
 
+class SweepMode(Enum):
+    OFF = "OFF"
+    ON = "ON"
+
+
+class SweepSpacing(Enum):
+    Linear = "Linear"
+    Log = "Log"
+
+
+class BurstMode(Enum):
+    Triggered = "Triggered"
+    Gated = "Gated"
+
+
+class BurstState(Enum):
+    OFF = "OFF"
+    ON = "ON"
+
+
+class TriggerSource(Enum):
+    Immediate = "Immediate"
+    External = "External"
+    Bus = "Bus"
+
+
 class OutputPolarity(Enum):
     Normal = "Normal"
     Inverted = "Inverted"
@@ -128,6 +155,13 @@ class Generator(Instrument, ABC):
         """ Changes output symmetry, only applicable if output is Ramp """
         pass
 
+    @abstractmethod
+    def upload_arbitrary(self, points):
+        """ Uploads the waveform points, normalized to the [-1, 1] range, to the volatile arbitrary
+        waveform memory and selects it as the Arbitrary waveform. One period of the waveform is
+        generated at the output frequency. """
+        pass
+
     @abstractmethod
     def set_output_mode(self, mode: OutputMode):
         """ Turns the output on or off depending on the arg """
@@ -168,3 +202,65 @@ class Generator(Instrument, ABC):
     def check_sync_mode(self) -> SyncMode:
         """ Returns a OutputMode indicating output state """
         pass
+
+    ##################
+    # SWEEP COMMANDS #
+    ##################
+
+    @abstractmethod
+    def set_sweep_mode(self, mode: SweepMode):
+        """ Turns the frequency sweep on or off depending on the arg """
+        pass
+
+    @abstractmethod
+    def set_sweep_spacing(self, spacing: SweepSpacing):
+        """ Changes the sweep spacing, selectable from the ones in Enum """
+        pass
+
+    @abstractmethod
+    def set_sweep_time(self, seconds: float):
+        """ Changes the time taken to sweep from the start to the stop frequency """
+        pass
+
+    @abstractmethod
+    def set_start_frequency(self, frequency: float):
+        """ Changes the start frequency of the sweep """
+        pass
+
+    @abstractmethod
+    def set_stop_frequency(self, frequency: float):
+        """ Changes the stop frequency of the sweep """
+        pass
+
+    ##################
+    # BURST COMMANDS #
+    ##################
+
+    @abstractmethod
+    def set_burst_mode(self, mode: BurstMode):
+        """ Changes the burst mode, selectable from the ones in Enum """
+        pass
+
+    @abstractmethod
+    def set_burst_cycles(self, cycles: int):
+        """ Changes the number of cycles output by each triggered burst """
+        pass
+
+    @abstractmethod
+    def set_burst_state(self, state: BurstState):
+        """ Turns the burst mode on or off depending on the arg """
+        pass
+
+    ####################
+    # TRIGGER COMMANDS #
+    ####################
+
+    @abstractmethod
+    def set_trigger_source(self, source: TriggerSource):
+        """ Changes the trigger source used to start sweeps and bursts, selectable from the ones in Enum """
+        pass
+
+    @abstractmethod
+    def trigger(self):
+        """ Triggers the generator, only applicable if the trigger source is Bus """
+        pass
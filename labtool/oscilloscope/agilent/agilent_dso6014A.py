@@ -2,6 +2,9 @@
 DSO6014 Agilent Model class implementation.
 """
 
+# third-party modules
+import numpy
+
 # labtool project modules
 from labtool.oscilloscope.base.oscilloscope import Oscilloscope
 from labtool.oscilloscope.base.oscilloscope import AcquireMode
@@ -9,12 +12,16 @@ from labtool.oscilloscope.base.oscilloscope import Coupling
 from labtool.oscilloscope.base.oscilloscope import TimebaseMode
 from labtool.oscilloscope.base.oscilloscope import TriggerMode
 from labtool.oscilloscope.base.oscilloscope import Sources
+from labtool.oscilloscope.base.oscilloscope import Measure
+from labtool.oscilloscope.base.oscilloscope import MeasureStatistics
 from labtool.oscilloscope.base.oscilloscope import TriggerSlope
 from labtool.oscilloscope.base.oscilloscope import TriggerSweep
 from labtool.oscilloscope.base.oscilloscope import WaveformFormat
 from labtool.oscilloscope.base.oscilloscope import AcquireMode
 from labtool.oscilloscope.base.oscilloscope import BandwidthLimit
 from labtool.oscilloscope.base.oscilloscope import ChannelStatus
+from labtool.oscilloscope.base.oscilloscope import FunctionOperation
+from labtool.oscilloscope.base.oscilloscope import FFTWindow
 
 from labtool.tool import LabTool
 
@@ -40,6 +47,20 @@ class AgilentDSO6014A(Oscilloscope):
     brand = "AGILENT"
     model = "DSO6014A"
 
+    # Segmented memory, with the segmented memory option
+    max_segments = 250
+
+    # Interface latency model
+    latency_model = {
+        "write": 0.002,
+        "query": 0.01,
+        "transfer-rate": 2e6,
+        "commands": {
+            "*RST": 1.5,
+            ":AUToscale": 3.0
+        }
+    }
+
     # Internal dictionaries of agilent syntax
     sources = {
         Sources.Channel_1: "CHANnel1",
@@ -88,16 +109,57 @@ class AgilentDSO6014A(Oscilloscope):
         WaveformFormat.Ascii: "ASCii"
     }
 
+    waveform_datatypes = {
+        WaveformFormat.Word: "H",
+        WaveformFormat.Byte: "B"
+    }
+
     bandwidth_limit = {
         BandwidthLimit.On: "1",
         BandwidthLimit.Off: "0"
     }
 
+    measures = {
+        Measure.Vmax: "VMAX",
+        Measure.Vmin: "VMIN",
+        Measure.Vpp: "VPP",
+        Measure.VRatio: "VRATio",
+        Measure.Phase: "PHASe"
+    }
+
+    measure_statistics = {
+        MeasureStatistics.All: "ON",
+        MeasureStatistics.Current: "CURRent",
+        MeasureStatistics.Mean: "MEAN",
+        MeasureStatistics.Minimum: "MINimum",
+        MeasureStatistics.Maximum: "MAXimum",
+        MeasureStatistics.StdDev: "STDDev"
+    }
+
+    # Fields of each measurement returned by :MEASure:RESults? with statistics enabled
+    measure_result_fields = ["label", "current", "minimum", "maximum", "mean", "std-dev", "count"]
+
     channel_status = {
         ChannelStatus.On: "1",
         ChannelStatus.Off: "0"
     }
 
+    function_operations = {
+        FunctionOperation.Add: "ADD",
+        FunctionOperation.Subtract: "SUBTract",
+        FunctionOperation.Multiply: "MULTiply",
+        FunctionOperation.Integrate: "INTegrate",
+        FunctionOperation.Differentiate: "DIFFerentiate",
+        FunctionOperation.FFT: "FFT"
+    }
+
+    fft_windows = {
+        FFTWindow.Rectangular: "RECTangular",
+        FFTWindow.Hanning: "HANNing",
+        FFTWindow.FlatTop: "FLATtop",
+        FFTWindow.BlackmanHarris: "BHARris"
+    }
+
     ###################
     # COMMON COMMANDS #
     ###################
@@ -114,6 +176,10 @@ class AgilentDSO6014A(Oscilloscope):
         """ Returns a string with an oscilloscope's identifier. """
         return self.resource.query("*IDN?")
 
+    def operation_complete(self):
+        """ Blocks until all pending operations, like a digitize() call, have finished. """
+        return self.resource.query("*OPC?")
+
     #################
     # ROOT COMMANDS #
     #################
@@ -131,6 +197,18 @@ class AgilentDSO6014A(Oscilloscope):
         that had been captured in the screen. """
         self.resource.write(":STOP")
 
+    def single(self):
+        """ Arms the oscilloscope for a single acquisition, stopping after it has been captured. """
+        self.resource.write(":SINGle")
+
+    def is_armed(self) -> bool:
+        """ Returns whether the oscilloscope has been armed and is ready to trigger. """
+        return int(self.resource.query(":AER?")) == 1
+
+    def is_running(self) -> bool:
+        """ Returns whether the oscilloscope is acquiring, false once a single acquisition is captured. """
+        return bool(int(self.resource.query(":OPERegister:CONDition?")) & 8)
+
     ####################
     # ACQUIRE COMMANDS #
     ####################
@@ -149,6 +227,19 @@ class AgilentDSO6014A(Oscilloscope):
         else:
             raise AverageCountError
 
+    def set_acquire_segments(self, count: int):
+        """ Enables the segmented memory, where each trigger acquires the next of the given number
+        of segments, or disables it when the count is 0 """
+        if count:
+            self.resource.write(":ACQuire:MODE SEGMented")
+            self.resource.write(":ACQuire:SEGMented:COUNt {}".format(count))
+        else:
+            self.resource.write(":ACQuire:MODE RTIMe")
+
+    def set_acquire_segment_index(self, index: int):
+        """ Selects the segment of the segmented memory, starting at 1, whose waveform data is downloaded """
+        self.resource.write(":ACQuire:SEGMented:INDex {}".format(index))
+
     ####################
     # CHANNEL COMMANDS #
     ####################
@@ -206,6 +297,10 @@ class AgilentDSO6014A(Oscilloscope):
         """ Sets the scale value of the time base """
         self.resource.write(":TIMebase:SCALe {}".format(scale_value))
 
+    def set_timebase_position(self, position: float):
+        """ Sets the time from the trigger event to the display reference point """
+        self.resource.write(":TIMebase:POSition {}".format(position))
+
     ####################
     # TRIGGER COMMANDS #
     ####################
@@ -271,13 +366,36 @@ class AgilentDSO6014A(Oscilloscope):
         """ Returns the waveform data preamble used to decode byte data """
         return self.resource.query(":WAV:PRE?")
 
+    def get_waveform_data(self, waveform_format: WaveformFormat):
+        """ Returns the waveform data as an array of unsigned raw values, using a binary transfer """
+        return self.resource.query_binary_values(
+            ":WAV:DATA?",
+            datatype=self.waveform_datatypes[waveform_format],
+            is_big_endian=True,
+            container=numpy.array
+        )
+
+    def get_waveform_preamble(self) -> dict:
+        """ Returns the waveform data preamble as a dictionary of values used to decode the raw data """
+        preamble = self.resource.query(":WAV:PRE?").split(",")
+        return {
+            "points": int(float(preamble[2])),
+            "x-increment": float(preamble[4]),
+            "x-origin": float(preamble[5]),
+            "x-reference": float(preamble[6]),
+            "y-increment": float(preamble[7]),
+            "y-origin": float(preamble[8]),
+            "y-reference": float(preamble[9])
+        }
+
     #####################
     # DIGITIZE COMMANDS #
     #####################
 
-    def digitize(self, source: Sources):
-        """ Acquires the waveform of a selected channel using the current settings. """
-        self.resource.write(":DIG {}".format(self.sources[source]))
+    def digitize(self, *sources: Sources):
+        """ Acquires the waveform of the selected channels using the current settings,
+        all of them from the same acquisition. """
+        self.resource.write(":DIG {}".format(", ".join([self.sources[source] for source in sources])))
 
     ####################
     # MEASURE COMMANDS #
@@ -313,6 +431,70 @@ class AgilentDSO6014A(Oscilloscope):
             )
         )
 
+    def clear_measurements(self):
+        """ Removes all the active measurements """
+        self.resource.write(":MEASure:CLEar")
+
+    def add_measurement(self, measure: Measure, source: Sources, reference_source: Sources = None):
+        """ Adds an active measurement of the source, kept by the oscilloscope over acquisitions. """
+        if reference_source is None:
+            self.resource.write(":MEASure:{} {}".format(self.measures[measure], self.sources[source]))
+        else:
+            self.resource.write(
+                ":MEASure:{} {}, {}".format(
+                    self.measures[measure],
+                    self.sources[source],
+                    self.sources[reference_source]
+                )
+            )
+
+    def set_measure_statistics(self, statistics: MeasureStatistics):
+        """ Sets the statistics returned for the active measurements """
+        self.resource.write(":MEASure:STATistics {}".format(self.measure_statistics[statistics]))
+
+    def reset_measure_statistics(self):
+        """ Resets the statistics of the active measurements """
+        self.resource.write(":MEASure:STATistics:RESet")
+
+    def get_measure_results(self) -> list:
+        """ Returns the statistics of all active measurements with a single query """
+        values = self.resource.query(":MEASure:RESults?").split(",")
+        fields = self.measure_result_fields
+        results = []
+        for index in range(0, len(values) - len(fields) + 1, len(fields)):
+            result = {field: float(value) for field, value in zip(fields[1:], values[index + 1:index + len(fields)])}
+            result["count"] = int(result["count"])
+            results.append(result)
+        return results
+
+    #####################
+    # FUNCTION COMMANDS #
+    #####################
+
+    def set_function_operation(self, operation: FunctionOperation):
+        """ Sets the operation computed by the function """
+        self.resource.write(":FUNCtion:OPERation {}".format(self.function_operations[operation]))
+
+    def set_function_source(self, source: Sources):
+        """ Sets the source of the function, for operations on a single source as FFT """
+        self.resource.write(":FUNCtion:SOURce1 {}".format(self.sources[source]))
+
+    def set_function_display(self, status: ChannelStatus):
+        """ Sets the function status in the oscilloscope's display """
+        self.resource.write(":FUNCtion:DISPlay {}".format(self.channel_status[status]))
+
+    def set_fft_window(self, window: FFTWindow):
+        """ Sets the window applied to the waveform before computing its FFT """
+        self.resource.write(":FUNCtion:WINDow {}".format(self.fft_windows[window]))
+
+    def set_fft_span(self, span: float):
+        """ Sets the frequency span of the FFT """
+        self.resource.write(":FUNCtion:SPAN {}".format(span))
+
+    def set_fft_center(self, center: float):
+        """ Sets the center frequency of the FFT """
+        self.resource.write(":FUNCtion:CENTer {}".format(center))
+
 
 #############
 # Functions #
@@ -14,6 +14,10 @@ from abc import abstractmethod
 
 from enum import Enum
 
+import time
+
+# third-party modules
+import numpy
 
 # labtool project modules
 from labtool.base.instrument import Instrument
@@ -68,6 +72,39 @@ class TriggerSlope(Enum):
     Alternate = "Alternate"
 
 
+class Measure(Enum):
+    Vmax = "Vmax"
+    Vmin = "Vmin"
+    Vpp = "Vpp"
+    VRatio = "VRatio"
+    Phase = "Phase"
+
+
+class MeasureStatistics(Enum):
+    All = "All"
+    Current = "Current"
+    Mean = "Mean"
+    Minimum = "Minimum"
+    Maximum = "Maximum"
+    StdDev = "StdDev"
+
+
+class FunctionOperation(Enum):
+    Add = "Add"
+    Subtract = "Subtract"
+    Multiply = "Multiply"
+    Integrate = "Integrate"
+    Differentiate = "Differentiate"
+    FFT = "FFT"
+
+
+class FFTWindow(Enum):
+    Rectangular = "Rectangular"
+    Hanning = "Hanning"
+    FlatTop = "Flat top"
+    BlackmanHarris = "Blackman-Harris"
+
+
 class Sources(Enum):
     Channel_1 = "Channel 1"
     Channel_2 = "Channel 2"
@@ -99,6 +136,18 @@ class Oscilloscope(Instrument, ABC):
     # Oscilloscope information
     type = InstrumentType.Oscilloscope
 
+    # Maximum number of measurements active at once, with statistics
+    max_measurements = 3
+
+    # Maximum number of segments of the segmented memory, 1 when not supported
+    max_segments = 1
+
+    # Maximum number of points of a downloaded waveform
+    max_waveform_points = 1000000
+
+    # Points of the spectrum computed by the FFT function over its span
+    fft_points = 1000
+
     ###################
     # COMMON COMMANDS #
     ###################
@@ -118,6 +167,11 @@ class Oscilloscope(Instrument, ABC):
         """ Returns a string with an oscilloscope's identifier. """
         pass
 
+    @abstractmethod
+    def operation_complete(self):
+        """ Blocks until all pending operations, like a digitize() call, have finished. """
+        pass
+
     #################
     # ROOT COMMANDS #
     #################
@@ -138,6 +192,21 @@ class Oscilloscope(Instrument, ABC):
         that had been captured in the screen. """
         pass
 
+    @abstractmethod
+    def single(self):
+        """ Arms the oscilloscope for a single acquisition, stopping after it has been captured. """
+        pass
+
+    @abstractmethod
+    def is_armed(self) -> bool:
+        """ Returns whether the oscilloscope has been armed and is ready to trigger. """
+        pass
+
+    @abstractmethod
+    def is_running(self) -> bool:
+        """ Returns whether the oscilloscope is acquiring, false once a single acquisition is captured. """
+        pass
+
     ####################
     # ACQUIRE COMMANDS #
     ####################
@@ -152,6 +221,17 @@ class Oscilloscope(Instrument, ABC):
         """ Sets the amount of samples to be used when averaging the signal. """
         pass
 
+    @abstractmethod
+    def set_acquire_segments(self, count: int):
+        """ Enables the segmented memory, where each trigger acquires the next of the given number
+        of segments, or disables it when the count is 0 """
+        pass
+
+    @abstractmethod
+    def set_acquire_segment_index(self, index: int):
+        """ Selects the segment of the segmented memory, starting at 1, whose waveform data is downloaded """
+        pass
+
     ####################
     # CHANNEL COMMANDS #
     ####################
@@ -215,6 +295,11 @@ class Oscilloscope(Instrument, ABC):
         """ Sets the scale value of the time base """
         pass
 
+    @abstractmethod
+    def set_timebase_position(self, position: float):
+        """ Sets the time from the trigger event to the display reference point """
+        pass
+
     ####################
     # TRIGGER COMMANDS #
     ####################
@@ -288,13 +373,29 @@ class Oscilloscope(Instrument, ABC):
         """ Returns the waveform data preamble used to decode byte data """
         pass
 
+    @abstractmethod
+    def get_waveform_data(self, waveform_format: WaveformFormat):
+        """ Returns the waveform data as an array of unsigned raw values, using a binary transfer """
+        pass
+
+    @abstractmethod
+    def get_waveform_preamble(self) -> dict:
+        """ Returns the waveform data preamble as a dictionary of values used to decode the raw data
+            [Return]
+                + points: Number of data points transferred
+                + x-increment, x-origin, x-reference: Horizontal conversion values
+                + y-increment, y-origin, y-reference: Vertical conversion values
+                """
+        pass
+
     #####################
     # DIGITIZE COMMANDS #
     #####################
 
     @abstractmethod
-    def digitize(self, source: Sources):
-        """ Acquires the waveform of a selected channel using the current settings. """
+    def digitize(self, *sources: Sources):
+        """ Acquires the waveform of the selected channels using the current settings,
+        all of them from the same acquisition. """
         pass
 
     ####################
@@ -326,6 +427,79 @@ class Oscilloscope(Instrument, ABC):
         """ Measures the phase of the target source """
         pass
 
+    @abstractmethod
+    def clear_measurements(self):
+        """ Removes all the active measurements """
+        pass
+
+    @abstractmethod
+    def add_measurement(self, measure: Measure, source: Sources, reference_source: Sources = None):
+        """ Adds an active measurement of the source, kept by the oscilloscope over acquisitions.
+        The reference source is used by measurements between two sources, as VRatio and Phase. """
+        pass
+
+    @abstractmethod
+    def set_measure_statistics(self, statistics: MeasureStatistics):
+        """ Sets the statistics returned for the active measurements """
+        pass
+
+    @abstractmethod
+    def reset_measure_statistics(self):
+        """ Resets the statistics of the active measurements """
+        pass
+
+    @abstractmethod
+    def get_measure_results(self) -> list:
+        """ Returns the statistics of all active measurements with a single query, in the order
+        they were added, with MeasureStatistics.All being used.
+            [Return] Returns a list of dictionaries, one for each active measurement.
+                return = [
+                    {
+                        "current": value_of_last_measure,
+                        "minimum": value_of_minimum,
+                        "maximum": value_of_maximum,
+                        "mean": value_of_mean,
+                        "std-dev": value_of_standard_deviation,
+                        "count": value_of_measures_count
+                    }
+                ]
+                """
+        pass
+
+    #####################
+    # FUNCTION COMMANDS #
+    #####################
+
+    @abstractmethod
+    def set_function_operation(self, operation: FunctionOperation):
+        """ Sets the operation computed by the function """
+        pass
+
+    @abstractmethod
+    def set_function_source(self, source: Sources):
+        """ Sets the source of the function, for operations on a single source as FFT """
+        pass
+
+    @abstractmethod
+    def set_function_display(self, status: ChannelStatus):
+        """ Sets the function status in the oscilloscope's display """
+        pass
+
+    @abstractmethod
+    def set_fft_window(self, window: FFTWindow):
+        """ Sets the window applied to the waveform before computing its FFT """
+        pass
+
+    @abstractmethod
+    def set_fft_span(self, span: float):
+        """ Sets the frequency span of the FFT """
+        pass
+
+    @abstractmethod
+    def set_fft_center(self, center: float):
+        """ Sets the center frequency of the FFT """
+        pass
+
     ##################
     # HELPER METHODS #
     ##################
@@ -337,6 +511,15 @@ class Oscilloscope(Instrument, ABC):
             return int(source.value[-1])
         return None
 
+    @staticmethod
+    def decode_waveform(preamble: dict, data):
+        """ Returns the time and voltage values of the raw waveform data, using the preamble,
+        which may have a row of data for each segment """
+        indexes = numpy.arange(numpy.shape(data)[-1])
+        time = (indexes - preamble["x-reference"]) * preamble["x-increment"] + preamble["x-origin"]
+        voltage = (numpy.asarray(data, dtype=float) - preamble["y-reference"]) * preamble["y-increment"] + preamble["y-origin"]
+        return time, voltage
+
     @staticmethod
     def channel_to_source(number: int):
         """ Returns the source enum definition from the channel number """
@@ -346,6 +529,136 @@ class Oscilloscope(Instrument, ABC):
                 return source
         return None
 
+    ############################
+    # WAVEFORM DOWNLOAD METHODS #
+    ############################
+
+    def download_waveforms(self, sources: list, points: int):
+        """ Downloads the last acquired waveforms of the given sources using binary transfers.
+        It is assumed that all sources were acquired by the same digitize() call, so they
+        share the same time values.
+            [Return] Returns a tuple with the time values and a matrix of voltage values,
+                where each row belongs to one of the sources, in the given order.
+                """
+        self.set_waveform_format(WaveformFormat.Word)
+        self.set_waveform_unsigned(True)
+        self.set_waveform_points(points)
+
+        time = None
+        voltages = []
+        for source in sources:
+            self.set_waveform_source(source)
+            preamble = self.get_waveform_preamble()
+            data = self.get_waveform_data(WaveformFormat.Word)
+            time, voltage = Oscilloscope.decode_waveform(preamble, data)
+            voltages.append(voltage)
+
+        return time, numpy.array(voltages)
+
+    def download_segments(self, sources: list, segments: int, points: int):
+        """ Downloads every segment of the last segmented acquisition of the given sources, selecting
+        each segment and reading it with a binary transfer, and decodes all of them at once.
+        It is assumed that all segments share the same time values, relative to their own trigger.
+            [Return] Returns a tuple with the time values and an array of voltage values, with shape
+                (sources, segments, points), in the given order.
+                """
+        self.set_waveform_format(WaveformFormat.Word)
+        self.set_waveform_unsigned(True)
+        self.set_waveform_points(points)
+
+        time = None
+        voltages = []
+        for source in sources:
+            self.set_waveform_source(source)
+            data = []
+            for index in range(1, segments + 1):
+                self.set_acquire_segment_index(index)
+                data.append(self.get_waveform_data(WaveformFormat.Word))
+            preamble = self.get_waveform_preamble()
+
+            # Segments may differ in a few points, they are truncated to the shortest one
+            segment_points = min([len(segment) for segment in data])
+            time, voltage = Oscilloscope.decode_waveform(
+                preamble,
+                numpy.array([segment[:segment_points] for segment in data])
+            )
+            voltages.append(voltage)
+
+        return time, numpy.array(voltages)
+
+    #############################
+    # SPECTRUM DOWNLOAD METHODS #
+    #############################
+
+    def setup_fft(self, source: Sources, span: float, center: float, window: FFTWindow = FFTWindow.Hanning):
+        """ Sets up the function to compute the FFT of the given source on the oscilloscope,
+        over the given span and center frequency """
+        self.set_function_operation(FunctionOperation.FFT)
+        self.set_function_source(source)
+        self.set_fft_window(window)
+        self.set_fft_span(span)
+        self.set_fft_center(center)
+        self.set_function_display(ChannelStatus.On)
+
+    def download_spectrum(self, points: int = 1000):
+        """ Downloads the magnitude spectrum computed by the FFT function from the last acquisition.
+        Only the spectrum crosses the bus, which is much smaller than the raw record of the source.
+            [Return] Returns a tuple with the frequency values and the magnitude values in dBV,
+                the rms value of the component at each frequency.
+                """
+        frequency, magnitude = self.download_waveforms([Sources.Function], points)
+        return frequency, magnitude[0]
+
+    ##############################
+    # SINGLE ACQUISITION METHODS #
+    ##############################
+
+    def arm_single(self, timeout: float = None, poll_time: float = 0.001) -> bool:
+        """ Arms the oscilloscope for a single acquisition and waits until it is ready to trigger,
+        or until the timeout, in seconds, expires.
+            [Return] Returns whether the oscilloscope was armed.
+                """
+        self.single()
+        start = time.time()
+        while not self.is_armed():
+            if timeout is not None and time.time() - start > timeout:
+                return False
+            time.sleep(poll_time)
+        return True
+
+    def wait_single(self, timeout: float = None, poll_time: float = 0.01) -> bool:
+        """ Waits until the single acquisition has been captured, or until the timeout, in seconds, expires.
+            [Return] Returns whether the acquisition was captured.
+                """
+        start = time.time()
+        while self.is_running():
+            if timeout is not None and time.time() - start > timeout:
+                return False
+            time.sleep(poll_time)
+        return True
+
+    ###############################
+    # MEASURE STATISTICS METHODS #
+    ###############################
+
+    def fetch_measure_statistics(self, count: int, timeout: float = None, poll_time: float = 0.1) -> list:
+        """ Resets the statistics of the active measurements and waits until all of them have been
+        computed over the given number of acquisitions, or until the timeout, in seconds, expires.
+            [Return] Returns the results of get_measure_results() when they are completed, or the incomplete
+                ones when the timeout expires, whose count is smaller than the given one.
+                """
+        self.set_measure_statistics(MeasureStatistics.All)
+        self.reset_measure_statistics()
+
+        start = time.time()
+        while True:
+            results = self.get_measure_results()
+            if results and min([result["count"] for result in results]) >= count:
+                return results
+            if timeout is not None and time.time() - start > timeout:
+                return results
+            time.sleep(poll_time)
+
     ###########################
     # SUBSYSTEM SETUP METHODS #
     ###########################
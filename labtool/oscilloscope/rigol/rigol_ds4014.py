@@ -17,6 +17,20 @@ class RigolDS4014(AgilentDSO6014A):
     brand = "RIGOL"
     model = "DS4014"
 
+    # Segmented memory of the Agilent syntax is not supported
+    max_segments = 1
+
+    # Interface latency model
+    latency_model = {
+        "write": 0.005,
+        "query": 0.03,
+        "transfer-rate": 5e5,
+        "commands": {
+            "*RST": 2.0,
+            ":AUToscale": 5.0
+        }
+    }
+
     bandwidth_limit = {
         BandwidthLimit.On: "20M",
         BandwidthLimit.Off: "0"
@@ -36,6 +36,26 @@ class BodeScale(Enum):
     Log = "Log"
 
 
+class SweepOrder(Enum):
+    Sequential = "Sequential"
+    CoarseToFine = "Coarse to fine"
+    MinimumCost = "Minimum cost"
+
+
+class SweepParameter(Enum):
+    Frequency = "Frequency"
+    Amplitude = "Amplitude"
+    Offset = "Offset"
+    SquareDuty = "Square duty"
+    RampSymmetry = "Ramp symmetry"
+
+
+class MeasureMode(Enum):
+    Scope = "Scope"
+    SineFit = "Sine fit"
+    DFT = "Single-bin DFT"
+
+
 ######################
 # LabTool Exceptions #
 ######################
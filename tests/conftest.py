@@ -0,0 +1,338 @@
+"""
+Simulated bench used to run the measurement algorithms without instruments. The real Agilent DSO6014A
+and 33220A drivers talk to a fake resource, which answers their SCPI commands from a model of the
+generator driving a system under test, whose input and outputs are measured by the oscilloscope.
+"""
+
+# python native modules
+import re
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.base.delayed_resource import DelayedResource
+
+from labtool.generator.agilent.agilent_33220a import Agilent33220A
+
+from labtool.oscilloscope.agilent.agilent_dso6014A import AgilentDSO6014A
+
+import labtool.oscilloscope.base.oscilloscope
+
+
+#############
+# Constants #
+#############
+
+# Value returned by the oscilloscope when a measurement can not be made
+INVALID_VALUE = 9.9e37
+
+# Points of the record transformed by the FFT function of the oscilloscope
+FFT_POINTS = 1000
+
+
+class FakeBench(object):
+    """ Model of the bench. Channel 1 measures the generator output, and every other channel the output
+    of a first order low pass filter, whose cutoff is cutoff times the number of the channel minus one,
+    unless a response is given for it in responses, as a function of the frequency. DC offsets pass
+    through every channel. Commands are kept in the log, in the order they were received.
+        + noise: Standard deviation of the white noise added to the downloaded waveforms
+        + noise-density: One sided power spectral density, in V^2/Hz, of the spectra of the FFT function
+        + arm: Whether the oscilloscope gets armed for single acquisitions
+        + statistics-count: Acquisitions counted by the statistics of the active measurements
+    """
+
+    def __init__(self, cutoff: float = 1e3):
+        self.cutoff = cutoff
+        self.responses = {}
+        self.noise = 0
+        self.noise_density = 0
+        self.arm = True
+        self.statistics_count = 1000
+        self.random = numpy.random.default_rng(0)
+        self.log = []
+
+        # Generator state
+        self.output = True
+        self.frequency = 1e3
+        self.amplitude = 1.0
+        self.offset = 0
+        self.burst_cycles = 1
+        self.burst_state = False
+
+        # Oscilloscope state
+        self.ranges = {channel: 8.0 for channel in range(1, 5)}
+        self.channel_offsets = {channel: 0 for channel in range(1, 5)}
+        self.timebase_range = 1e-3
+        self.timebase_position = 0
+        self.waveform_source = 1
+        self.waveform_points = 1000
+        self.measurements = []
+        self.fft_span = 1e3
+        self.fft_center = 500
+        self.single = False
+        self.burst = None
+        self.segmented = False
+        self.segment_count = 1
+        self.segments = []
+        self.segment_index = 1
+
+    def response(self, channel: int, frequency: float = None) -> complex:
+        """ Returns the complex response of the channel, relative to the generator output """
+        frequency = self.frequency if frequency is None else frequency
+        if channel in self.responses.keys():
+            return self.responses[channel](frequency)
+        if channel == 1:
+            return 1
+        return 1 / (1 + 1j * frequency / (self.cutoff * (channel - 1)))
+
+    def vpp(self, channel: int) -> float:
+        """ Returns the peak to peak voltage of the channel, including the peaks of its noise """
+        return self.amplitude * abs(self.response(channel)) * self.output + 8 * self.noise
+
+    def phase(self, target: int, reference: int) -> float:
+        return numpy.degrees(numpy.angle(self.response(target) / self.response(reference)))
+
+    def commands(self, prefix: str) -> list:
+        """ Returns the logged commands starting with the prefix """
+        return [command for command in self.log if command.startswith(prefix)]
+
+    def waveform(self, channel: int, time):
+        """ Returns the voltage of the channel at the given time values, of the continuous output,
+        the captured burst, or the selected segment """
+        response = self.response(channel)
+        frequency = self.frequency
+        gate = numpy.ones(len(time), dtype=bool)
+        if self.segmented:
+            frequency = self.segments[self.segment_index - 1]
+            response = self.response(channel, frequency)
+            gate = time >= 0
+        elif self.burst is not None:
+            frequency, cycles = self.burst
+            gate = numpy.logical_and(time >= 0, time < cycles / frequency)
+
+        sine = self.amplitude / 2 * abs(response) * numpy.cos(2 * numpy.pi * frequency * time + numpy.angle(response))
+        return self.offset + sine * gate * self.output + self.noise * self.random.standard_normal(len(time))
+
+
+class FakeResource(object):
+    """ Resource answering the SCPI commands of an instrument of the bench """
+
+    def __init__(self, bench: FakeBench):
+        self.bench = bench
+        self.timeout = 2000
+
+    @staticmethod
+    def channels(command: str) -> list:
+        return [int(channel) for channel in re.findall(r"CHANnel(\d)", command)]
+
+    def write(self, command: str):
+        self.bench.log.append(command)
+        self.handle(command)
+
+    def write_binary_values(self, command: str, values, *args, **kwargs):
+        self.bench.log.append(command)
+
+    def handle(self, command: str):
+        pass
+
+    def query(self, command: str) -> str:
+        self.bench.log.append(command)
+        return self.answer(command)
+
+    def answer(self, command: str) -> str:
+        return "1"
+
+    def query_binary_values(self, command: str, *args, **kwargs):
+        self.bench.log.append(command)
+        return self.binary_answer(command)
+
+    def binary_answer(self, command: str):
+        return numpy.zeros(0)
+
+    def close(self):
+        pass
+
+
+class FakeGeneratorResource(FakeResource):
+
+    def handle(self, command: str):
+        bench = self.bench
+        header, _, value = command.partition(" ")
+        if header == "OUTPut":
+            bench.output = value == "ON"
+        elif header == "FREQuency":
+            bench.frequency = float(value)
+        elif header == "VOLTage":
+            bench.amplitude = float(value)
+        elif header == "OFFSet":
+            bench.offset = float(value)
+        elif header == "BURSt:NCYCles":
+            bench.burst_cycles = int(value)
+        elif header == "BURSt:STATe":
+            bench.burst_state = value == "ON"
+        elif header == "*TRG":
+            if bench.segmented and bench.single:
+                bench.segments.append(bench.frequency)
+                bench.single = len(bench.segments) < bench.segment_count
+            elif bench.single and bench.burst_state:
+                bench.burst = (bench.frequency, bench.burst_cycles)
+                bench.single = False
+
+
+class FakeOscilloscopeResource(FakeResource):
+
+    def handle(self, command: str):
+        bench = self.bench
+        header, _, value = command.partition(" ")
+        channel = re.match(r":CHAN(\d):", header)
+        if channel is not None and header.endswith(":RANG"):
+            bench.ranges[int(channel.group(1))] = float(value)
+        elif channel is not None and header.endswith(":SCAL"):
+            bench.ranges[int(channel.group(1))] = 8 * float(value)
+        elif channel is not None and header.endswith(":OFFS"):
+            bench.channel_offsets[int(channel.group(1))] = float(value)
+        elif header == ":TIMebase:RANGe":
+            bench.timebase_range = float(value)
+        elif header == ":TIMebase:POSition":
+            bench.timebase_position = float(value)
+        elif header == ":WAV:SOUR":
+            bench.waveform_source = "FUNCtion" if value == "FUNCtion" else self.channels(value)[0]
+        elif header == ":WAV:POIN":
+            bench.waveform_points = int(value)
+        elif header == ":FUNCtion:SPAN":
+            bench.fft_span = float(value)
+        elif header == ":FUNCtion:CENTer":
+            bench.fft_center = float(value)
+        elif header == ":MEASure:CLEar":
+            bench.measurements = []
+        elif re.match(r":MEASure:(VPP|VRATio|PHASe)$", header):
+            bench.measurements.append((header.split(":")[-1], self.channels(value)))
+        elif header == ":ACQuire:MODE":
+            bench.segmented = value == "SEGMented"
+        elif header == ":ACQuire:SEGMented:COUNt":
+            bench.segment_count = int(value)
+        elif header == ":ACQuire:SEGMented:INDex":
+            bench.segment_index = int(value)
+        elif header == ":DIG":
+            bench.segments = []
+        elif header == ":SINGle":
+            bench.single = True
+            if bench.segmented:
+                bench.segments = []
+        elif header in [":RUN", ":STOP"]:
+            bench.single = False
+            bench.burst = None
+
+    def measure(self, kind: str, channels: list) -> float:
+        bench = self.bench
+        if kind == "VPP":
+            value = bench.vpp(channels[0])
+            return value if value < bench.ranges[channels[0]] else INVALID_VALUE
+        if kind == "VRATio":
+            return abs(bench.response(channels[0]) / bench.response(channels[1]))
+        if bench.timebase_range < 1 / bench.frequency:
+            return INVALID_VALUE
+        return bench.phase(channels[0], channels[1])
+
+    def answer(self, command: str) -> str:
+        bench = self.bench
+        header = command.split(" ")[0]
+        channels = self.channels(command)
+        if header in [":MEAS:VPP?", ":MEAS:VRAT?", ":MEAS:PHAS?"]:
+            kind = {":MEAS:VPP?": "VPP", ":MEAS:VRAT?": "VRATio", ":MEAS:PHAS?": "PHASe"}[header]
+            return str(self.measure(kind, channels))
+        if header in [":MEAS:VMAX?", ":MEAS:VMIN?"]:
+            sign = 1 if header == ":MEAS:VMAX?" else -1
+            value = bench.offset + sign * bench.vpp(channels[0]) / 2
+            fits = abs(value - bench.channel_offsets[channels[0]]) < bench.ranges[channels[0]] / 2
+            return str(value if fits else INVALID_VALUE)
+        if re.match(r":CHAN\d:RANG\?", header):
+            return str(bench.ranges[int(header[5])])
+        if header == ":WAV:PRE?" and bench.waveform_source == "FUNCtion":
+            resolution = bench.fft_span / bench.waveform_points
+            return "1,0,{},1,{},{},0,0.01,-200,0".format(
+                bench.waveform_points, resolution, bench.fft_center - bench.fft_span / 2
+            )
+        if header == ":WAV:PRE?":
+            channel = bench.waveform_source
+            return "1,0,{},1,{},{},0,{},{},32768".format(
+                bench.waveform_points,
+                bench.timebase_range / bench.waveform_points,
+                bench.timebase_position - bench.timebase_range / 2,
+                bench.ranges[channel] / 65536,
+                bench.channel_offsets[channel]
+            )
+        if header == ":AER?":
+            return "1" if bench.single and bench.arm else "0"
+        if header == ":OPERegister:CONDition?":
+            return "8" if bench.single else "0"
+        if header == ":MEASure:RESults?":
+            results = []
+            for kind, measure_channels in bench.measurements:
+                value = self.measure(kind, measure_channels)
+                deviation = 0.01 * abs(value)
+                results += [kind, value, value - deviation, value + deviation, value, deviation, bench.statistics_count]
+            return ",".join([str(result) for result in results])
+        return "1"
+
+    def binary_answer(self, command: str):
+        bench = self.bench
+        if bench.waveform_source == "FUNCtion":
+            # Each bin holds the noise power within the equivalent noise bandwidth of the Hanning window
+            power = numpy.full(bench.waveform_points, bench.noise_density * 1.5 * bench.fft_span / FFT_POINTS)
+            return numpy.round((10 * numpy.log10(power + 1e-30) + 200) / 0.01)
+
+        channel = bench.waveform_source
+        increment = bench.timebase_range / bench.waveform_points
+        time = numpy.arange(bench.waveform_points) * increment + bench.timebase_position - bench.timebase_range / 2
+        voltage = bench.waveform(channel, time) - bench.channel_offsets[channel]
+        return numpy.clip(numpy.round(voltage / (bench.ranges[channel] / 65536) + 32768), 0, 65535)
+
+
+class FakeClock(object):
+    """ Clock replacing the time module of the oscilloscope base class, so the polling loops
+    of the drivers time out at once without sleeping """
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+############
+# Fixtures #
+############
+
+@pytest.fixture
+def bench(monkeypatch):
+    monkeypatch.setattr(labtool.oscilloscope.base.oscilloscope, "time", FakeClock())
+    return FakeBench()
+
+
+@pytest.fixture
+def oscilloscope(bench):
+    return AgilentDSO6014A.from_resource(DelayedResource(FakeOscilloscopeResource(bench)))
+
+
+@pytest.fixture
+def generator(bench):
+    return Agilent33220A.from_resource(DelayedResource(FakeGeneratorResource(bench)))
+
+
+@pytest.fixture
+def run_algorithm():
+    """ Returns a function running the algorithm until it finishes, returning its result """
+    def run(algorithm, max_calls: int = 10000):
+        for _ in range(max_calls):
+            if algorithm.finished:
+                break
+            algorithm()
+        assert algorithm.finished
+        return algorithm.get_result()
+    return run
@@ -0,0 +1,254 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from conftest import INVALID_VALUE
+
+from labtool.algorithm.bode_algorithm import BodeAlgorithm
+from labtool.algorithm.bode_algorithm import BurstAcquisitionError
+
+from labtool.oscilloscope.base.oscilloscope import Measure
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import BodeScale
+from labtool.tool import MeasureMode
+from labtool.tool import SweepOrder
+
+
+def make_bode(oscilloscope, generator, requirements: dict = None, **preferences):
+    """ Returns a bode algorithm measuring channel 2 against channel 1, with the given preferences """
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "scale": BodeScale.Log,
+        "start-frequency": 100,
+        "stop-frequency": 1e5,
+        "samples": 7,
+        **preferences
+    }
+    if requirements is None:
+        requirements = {"input-channel": Sources.Channel_1, "output-channel": Sources.Channel_2}
+    return BodeAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def test_minimum_cost_plan_issues_fewer_range_changes(bench, oscilloscope, generator, run_algorithm, tmp_path):
+    # The gain of the output alternates between two levels from point to point
+    frequencies = numpy.logspace(3, 4, 8)
+    bench.responses[2] = lambda frequency: [1.0, 0.3][int(numpy.argmin(numpy.abs(frequencies - frequency))) % 2]
+    preferences = {"start-frequency": 1e3, "stop-frequency": 1e4, "samples": 8, "autoscale-cache": str(tmp_path / "cache.json")}
+
+    # A first sweep fills the autoscale cache, which predicts the ranges of the next ones
+    run_algorithm(make_bode(oscilloscope, generator, **preferences))
+
+    range_changes = {}
+    for order in [SweepOrder.Sequential, SweepOrder.MinimumCost]:
+        bench.log.clear()
+        result = run_algorithm(make_bode(oscilloscope, generator, **{"sweep-order": order, **preferences}))
+        range_changes[order] = len(bench.commands(":CHAN2:RANG "))
+        assert [measure["bode-module"] for measure in result] == pytest.approx([1.0, 0.3] * 4)
+
+    assert range_changes[SweepOrder.MinimumCost] < range_changes[SweepOrder.Sequential]
+
+
+def test_pipelined_waveform_points_match_sequential_ones(bench, oscilloscope, generator, run_algorithm):
+    preferences = {"measure-mode": MeasureMode.SineFit}
+    sequential = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+    algorithm = make_bode(oscilloscope, generator, pipelined=True, **preferences)
+    pipelined = run_algorithm(algorithm)
+
+    assert algorithm.is_pipelined()
+    assert [measure["frequency"] for measure in pipelined] == pytest.approx([measure["frequency"] for measure in sequential])
+    assert [measure["bode-module"] for measure in pipelined] == pytest.approx([measure["bode-module"] for measure in sequential])
+
+
+def test_scope_mode_is_not_pipelined(bench, oscilloscope, generator, run_algorithm):
+    algorithm = make_bode(oscilloscope, generator, pipelined=True)
+    algorithm()
+
+    assert not algorithm.is_pipelined()
+    assert algorithm.pipeline is None
+    assert len(run_algorithm(algorithm)) == 7
+
+
+@pytest.mark.parametrize("mode", [MeasureMode.SineFit, MeasureMode.DFT])
+def test_waveform_modes_estimate_gain_and_phase_on_the_host(bench, oscilloscope, generator, run_algorithm, mode):
+    bench.noise = 1e-3
+    result = run_algorithm(make_bode(oscilloscope, generator, **{"measure-mode": mode}))
+
+    frequencies = numpy.logspace(2, 5, 7)
+    expected = [bench.response(2, frequency) for frequency in frequencies]
+    assert [measure["bode-module"] for measure in result] == pytest.approx(numpy.abs(expected), rel=1e-2)
+    assert [measure["bode-phase"] for measure in result] == pytest.approx(numpy.degrees(numpy.angle(expected)), abs=0.5)
+
+    # Gain and phase come from the downloaded waveforms, not from the oscilloscope's measurements
+    assert bench.commands(":WAV:DATA?")
+    assert not bench.commands(":MEAS:VRAT?") and not bench.commands(":MEAS:PHAS?")
+
+
+def test_multiple_output_channels_add_suffixed_fields(bench, oscilloscope, generator, run_algorithm):
+    requirements = {"input-channel": Sources.Channel_1, "output-channels": [Sources.Channel_2, Sources.Channel_3]}
+    algorithm = make_bode(oscilloscope, generator, requirements)
+    result = run_algorithm(algorithm)
+
+    frequencies = numpy.logspace(2, 5, 7)
+    for channel, module_field, phase_field in [(2, "bode-module", "bode-phase"), (3, "bode-module-ch3", "bode-phase-ch3")]:
+        expected = [bench.response(channel, frequency) for frequency in frequencies]
+        assert [measure[module_field] for measure in result] == pytest.approx(numpy.abs(expected), rel=1e-6)
+        assert [measure[phase_field] for measure in result] == pytest.approx(numpy.degrees(numpy.angle(expected)), abs=1e-6)
+
+    # The other channels are also returned with the fields of a single output measurement
+    channel_result = algorithm.get_channel_result(Sources.Channel_3)
+    assert [measure["bode-module"] for measure in channel_result] == pytest.approx([measure["bode-module-ch3"] for measure in result])
+    with pytest.raises(ValueError):
+        algorithm.get_channel_result(Sources.Channel_4)
+
+
+def test_frozen_frame_queries_a_single_digitized_acquisition(bench, oscilloscope, generator, run_algorithm):
+    run_algorithm(make_bode(oscilloscope, generator))
+    assert not bench.commands(":DIG")
+
+    bench.log.clear()
+    result = run_algorithm(make_bode(oscilloscope, generator, **{"frozen-frame": True}))
+    assert len(result) == 7
+
+    # The measurement queries of each point run between its digitize and the following run
+    frames, frame = [], None
+    for command in bench.log:
+        if command.startswith(":DIG"):
+            frame = []
+            frames.append(frame)
+        elif command == ":RUN":
+            frame = None
+        elif frame is not None:
+            frame.append(command.split(" ")[0])
+    for frame in frames:
+        assert frame.count(":MEAS:VRAT?") == 1 and frame.count(":MEAS:PHAS?") == 1
+    assert len(bench.commands(":DIG")) == 7
+
+
+def test_compute_average_count_meets_the_uncertainty_targets(oscilloscope, generator):
+    algorithm = make_bode(oscilloscope, generator)
+
+    assert algorithm.compute_average_count(0.005, 0.5) == 1
+    assert algorithm.compute_average_count(0.03, 0.5) == 16
+    assert algorithm.compute_average_count(0.01, 3.0) == 16
+    assert algorithm.compute_average_count(1.0, 0.5) == 256
+
+
+def test_adaptive_averaging_follows_the_noise_estimate(bench, oscilloscope, generator, run_algorithm):
+    preferences = {"measure-mode": MeasureMode.SineFit, "adaptive-averaging": True, "gain-uncertainty": 1e-3, "stop-frequency": 1e4}
+    result = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+    assert [measure["average-count"] for measure in result] == [1] * 7
+
+    # The noise is estimated at the first point and again after noise-interval points, each one
+    # from its own acquisition, and the averaging grows as the output of the low pass falls
+    bench.noise = 0.01
+    bench.log.clear()
+    result = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+    counts = [measure["average-count"] for measure in result]
+    assert counts[:5] == [counts[0]] * 5 and counts[5:] == [counts[5]] * 2
+    assert 1 < counts[0] < counts[5]
+    assert len(bench.commands(":DIG")) == 7 + 2
+    assert bench.commands(":ACQuire:COUNt")
+
+
+def test_autoscale_cache_skips_the_range_search(bench, oscilloscope, generator, run_algorithm, tmp_path):
+    preferences = {"autoscale-cache": str(tmp_path / "cache.json")}
+    first = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+    assert bench.commands(":MEAS:VMAX?")
+    assert (tmp_path / "cache.json").exists()
+
+    # The cached ranges of the same setup are verified and kept, without searching them again
+    bench.log.clear()
+    second = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+    assert not bench.commands(":MEAS:VMAX?")
+    assert [measure["bode-module"] for measure in second] == pytest.approx([measure["bode-module"] for measure in first])
+
+    # Ranges that do not fit the system anymore are searched again
+    bench.cutoff = 1e4
+    bench.log.clear()
+    run_algorithm(make_bode(oscilloscope, generator, **preferences))
+    assert bench.commands(":MEAS:VMAX?")
+
+
+def test_invalid_points_are_measured_again_in_place(bench, oscilloscope, generator, run_algorithm):
+    # The first ratio measured at 1 kHz is the invalid value of the oscilloscope
+    resource = oscilloscope.resource.resource
+    measure = resource.measure
+    failures = []
+
+    def failing_measure(kind, channels):
+        if kind == "VRATio" and bench.frequency == pytest.approx(1e3) and not failures:
+            failures.append(bench.frequency)
+            return INVALID_VALUE
+        return measure(kind, channels)
+    resource.measure = failing_measure
+
+    result = run_algorithm(make_bode(oscilloscope, generator))
+
+    expected = [abs(bench.response(2, frequency)) for frequency in numpy.logspace(2, 5, 7)]
+    assert [measure["bode-module"] for measure in result] == pytest.approx(expected)
+    assert len(bench.commands(":MEAS:VRAT?")) == 8
+
+    # The point is measured again before moving to the next frequency
+    frequencies = [float(command.split(" ")[1]) for command in bench.commands("FREQuency ")]
+    assert frequencies == sorted(frequencies)
+
+
+def test_statistics_are_fetched_in_groups_of_the_oscilloscope_measurements(bench, oscilloscope, generator, run_algorithm):
+    preferences = {"statistics-count": 100}
+    result = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+
+    # A single output channel needs three measurements, which fit the oscilloscope at once
+    assert len(bench.commands(":MEASure:RESults?")) == 7
+    assert [measure["gain-noise"] for measure in result] == pytest.approx([0.01 * numpy.sqrt(2)] * 7)
+    assert [measure["phase-noise"] for measure in result] == pytest.approx([0.01 * abs(measure["bode-phase"]) for measure in result])
+
+    # Two output channels need five measurements, fetched in two groups
+    bench.log.clear()
+    requirements = {"input-channel": Sources.Channel_1, "output-channels": [Sources.Channel_2, Sources.Channel_3]}
+    result = run_algorithm(make_bode(oscilloscope, generator, requirements, **preferences))
+    assert len(bench.commands(":MEASure:RESults?")) == 2 * 7
+    expected = [abs(bench.response(3, frequency)) for frequency in numpy.logspace(2, 5, 7)]
+    assert [measure["bode-module-ch3"] for measure in result] == pytest.approx(expected, rel=1e-6)
+
+
+def test_incomplete_statistics_are_flagged_invalid(bench, oscilloscope, generator):
+    algorithm = make_bode(oscilloscope, generator)
+    algorithm.timebase_range = 1e-3
+    bench.statistics_count = 10
+
+    measurements = [(Measure.Vpp, Sources.Channel_1, None), (Measure.Vpp, Sources.Channel_2, None)]
+    results = algorithm.fetch_statistics(measurements, 100)
+    assert [result["mean"] for result in results] == [float("inf")] * 2
+
+
+def test_burst_gated_points_are_fitted_from_single_acquisitions(bench, oscilloscope, generator, run_algorithm):
+    preferences = {"measure-mode": MeasureMode.SineFit, "burst-cycles": 6, "stop-frequency": 1e4}
+    result = run_algorithm(make_bode(oscilloscope, generator, **preferences))
+
+    expected = [bench.response(2, frequency) for frequency in numpy.logspace(2, 4, 7)]
+    assert [measure["bode-module"] for measure in result] == pytest.approx(numpy.abs(expected), rel=1e-2)
+    assert [measure["bode-phase"] for measure in result] == pytest.approx(numpy.degrees(numpy.angle(expected)), abs=0.5)
+
+    # Each burst is fired once the oscilloscope is armed, bursts not fitting the ranges are acquired again
+    assert len(bench.commands("*TRG")) == len(bench.commands(":SINGle")) >= 7
+    assert not bench.burst_state
+
+
+def test_burst_raises_when_the_oscilloscope_is_not_armed(bench, oscilloscope, generator):
+    preferences = {"measure-mode": MeasureMode.SineFit, "burst-cycles": 6, "adaptive-timing": True}
+    algorithm = make_bode(oscilloscope, generator, **preferences)
+    bench.arm = False
+    with pytest.raises(BurstAcquisitionError):
+        for _ in range(10):
+            algorithm()
+
+    # No burst is fired unless armed, and the continuous output and timeout are restored
+    assert len(bench.commands(":SINGle")) == algorithm.arm_attempts
+    assert not bench.commands("*TRG")
+    assert not bench.burst_state
+    assert oscilloscope.get_timeout() == pytest.approx(2)
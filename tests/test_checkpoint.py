@@ -0,0 +1,61 @@
+# python native modules
+from enum import Enum
+
+# third-party modules
+import numpy
+
+# labtool project modules
+from labtool.algorithm.base.checkpoint import Checkpoint
+
+
+class Setting(Enum):
+    A = "a"
+    B = "b"
+
+
+def test_make_hash_depends_on_setup():
+    first = Checkpoint.make_hash({"samples": 10, "mode": Setting.A}, {"amplitude": numpy.float64(1)})
+
+    assert first == Checkpoint.make_hash({"mode": Setting.A, "samples": 10}, {"amplitude": 1.0})
+    assert first != Checkpoint.make_hash({"samples": 10, "mode": Setting.B}, {"amplitude": 1.0})
+
+
+def test_load_missing_file(tmp_path):
+    assert Checkpoint(str(tmp_path / "checkpoint.jsonl")).load("hash") == []
+
+
+def test_resume_unfinished_run(tmp_path):
+    filepath = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(filepath)
+    checkpoint.start("hash")
+    checkpoint.append({"frequency": 10, "bode-module": numpy.float64(0.5)})
+    checkpoint.close()
+
+    records = Checkpoint(filepath).load("hash")
+
+    assert records == [{"frequency": 10, "bode-module": 0.5}]
+    assert Checkpoint(filepath).load("other") == []
+
+    checkpoint = Checkpoint(filepath)
+    checkpoint.start("hash", resume=True)
+    checkpoint.append({"frequency": 20, "bode-module": 0.25})
+    checkpoint.close()
+
+    assert [record["frequency"] for record in Checkpoint(filepath).load("hash")] == [10, 20]
+
+
+def test_finished_run_is_not_resumed(tmp_path):
+    filepath = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(filepath)
+    checkpoint.start("hash")
+    checkpoint.append({"frequency": 10})
+    checkpoint.finish()
+
+    assert Checkpoint(filepath).load("hash") == []
+
+
+def test_partial_line_is_ignored(tmp_path):
+    filepath = tmp_path / "checkpoint.jsonl"
+    filepath.write_text('{"setup-hash": "hash"}\n{"frequency": 10}\n{"freque')
+
+    assert Checkpoint(str(filepath)).load("hash") == [{"frequency": 10}]
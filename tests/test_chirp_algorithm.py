@@ -0,0 +1,46 @@
+# python native modules
+
+# third-party modules
+import pytest
+
+# labtool project modules
+from labtool.algorithm.chirp_algorithm import ChirpAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import BodeScale
+
+
+def make_chirp(oscilloscope, generator, **preferences):
+    """ Returns a chirp algorithm measuring channel 2 against channel 1, with the given preferences """
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "scale": BodeScale.Log,
+        "start-frequency": 10,
+        "stop-frequency": 1e6,
+        "samples": 5,
+        "chirp-captures": 1,
+        **preferences
+    }
+    requirements = {"input-channel": Sources.Channel_1, "output-channel": Sources.Channel_2}
+    return ChirpAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def test_wide_sweep_is_shortened_to_fit_the_record(bench, oscilloscope, generator):
+    algorithm = make_chirp(oscilloscope, generator)
+
+    # Ten periods of 10 Hz would need 2.5 million points to sample 1 MHz
+    sweep_time = oscilloscope.max_waveform_points / (ChirpAlgorithm.min_oversampling * 1e6)
+    assert algorithm.compute_sweep_time() == pytest.approx(sweep_time)
+    assert algorithm.compute_points() >= 2 * 1e6 * sweep_time
+
+    algorithm()
+    assert float(bench.commands("SWEep:TIME ")[-1].split(" ")[1]) == pytest.approx(sweep_time)
+
+
+def test_chirp_restores_the_timeout(bench, oscilloscope, generator, run_algorithm):
+    algorithm = make_chirp(oscilloscope, generator, **{"start-frequency": 100, "stop-frequency": 1e4})
+    run_algorithm(algorithm)
+
+    assert oscilloscope.get_timeout() == pytest.approx(2)
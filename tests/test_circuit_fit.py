@@ -0,0 +1,67 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.circuit_fit import CircuitModel
+from labtool.analysis.circuit_fit import circuit_fit
+from labtool.analysis.circuit_fit import model_impedance
+
+
+def rlc_impedance(model: CircuitModel, frequency, resistance, inductance, capacitance):
+    """ Returns the impedance of a known RLC circuit, computed apart from the fitted models """
+    omega = 2 * numpy.pi * frequency
+    if model is CircuitModel.SeriesRLC:
+        return resistance + 1j * omega * inductance + 1 / (1j * omega * capacitance)
+    return 1 / (1 / resistance + 1 / (1j * omega * inductance) + 1j * omega * capacitance)
+
+
+@pytest.mark.parametrize("model", [CircuitModel.SeriesRLC, CircuitModel.ParallelRLC])
+def test_model_impedance_matches_rlc(model):
+    frequency = numpy.logspace(2, 6, 20)
+
+    impedance = model_impedance(model, [50, 1e-3, 1e-7], frequency)[0]
+
+    assert impedance == pytest.approx(rlc_impedance(model, frequency, 50, 1e-3, 1e-7))
+
+
+def test_model_impedance_jacobian():
+    frequency = numpy.logspace(2, 6, 5)
+    values = numpy.array([50, 1e-3, 1e-7])
+    impedance, jacobian = model_impedance(CircuitModel.ParallelRLC, values, frequency)
+
+    for index in range(len(values)):
+        shifted = values.copy()
+        shifted[index] *= numpy.exp(1e-7)
+        numeric = (model_impedance(CircuitModel.ParallelRLC, shifted, frequency)[0] - impedance) / 1e-7
+        assert jacobian[:, index] == pytest.approx(numeric, rel=1e-4)
+
+
+@pytest.mark.parametrize("model", [CircuitModel.SeriesRLC, CircuitModel.ParallelRLC])
+def test_circuit_fit_known_rlc(model):
+    frequency = numpy.logspace(2, 6, 50)
+    impedance = rlc_impedance(model, frequency, 10, 2e-3, 4.7e-8)
+
+    fit = circuit_fit(model, frequency, impedance)
+
+    assert fit["model"] is model
+    assert fit["resistance"] == pytest.approx(10, rel=1e-6)
+    assert fit["inductance"] == pytest.approx(2e-3, rel=1e-6)
+    assert fit["capacitance"] == pytest.approx(4.7e-8, rel=1e-6)
+    assert fit["rms-error"] < 1e-6
+
+
+def test_circuit_fit_noisy_rc():
+    generator = numpy.random.default_rng(6)
+    frequency = numpy.logspace(1, 5, 40)
+    impedance = 1e3 + 1 / (2j * numpy.pi * frequency * 1e-6)
+    impedance *= 1 + generator.normal(0, 1e-3, len(frequency))
+
+    fit = circuit_fit(CircuitModel.SeriesRC, frequency, impedance)
+
+    assert set(fit.keys()) == {"model", "resistance", "capacitance", "residuals", "rms-error", "iterations"}
+    assert fit["resistance"] == pytest.approx(1e3, rel=1e-2)
+    assert fit["capacitance"] == pytest.approx(1e-6, rel=1e-2)
+    assert fit["rms-error"] == pytest.approx(1e-3, rel=0.3)
@@ -0,0 +1,76 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.distortion import harmonic_analysis
+from labtool.analysis.distortion import peak_harmonics
+from labtool.analysis.distortion import power_spectra
+
+
+def make_distorted_sine(time, frequency, harmonics):
+    """ Returns a unit amplitude sine with the given relative amplitudes of its harmonics 2 to n """
+    samples = numpy.sin(2 * numpy.pi * frequency * time)
+    for order, level in enumerate(harmonics, 2):
+        samples = samples + level * numpy.sin(2 * numpy.pi * order * frequency * time + order)
+    return samples
+
+
+def test_power_spectra_sum_is_mean_square():
+    time = numpy.arange(4096) * 1e-5
+    samples = 2 * numpy.sin(2 * numpy.pi * 1234.5 * time)
+
+    assert numpy.sum(power_spectra(samples)) == pytest.approx(2, rel=1e-3)
+
+
+def test_harmonic_analysis_known_thd():
+    time = numpy.arange(8192) * 1e-5
+    samples = make_distorted_sine(time, 1037.3, [0.01, 0.003])
+
+    result = harmonic_analysis(time, samples, 1037.3, harmonics=5)
+
+    assert result["fundamental"] == pytest.approx(1 / numpy.sqrt(2), rel=1e-3)
+    assert result["harmonics"][:2] == pytest.approx([0.01, 0.003], rel=1e-2)
+    assert result["harmonics"][2:] == pytest.approx(0, abs=1e-5)
+    assert result["thd"] == pytest.approx(numpy.hypot(0.01, 0.003), rel=1e-2)
+    assert result["thd-n"] == pytest.approx(result["thd"], rel=1e-2)
+
+
+def test_harmonic_analysis_noise():
+    generator = numpy.random.default_rng(4)
+    time = numpy.arange(8192) * 1e-5
+    samples = numpy.sin(2 * numpy.pi * 1037.3 * time) + generator.normal(0, 0.01, (16, len(time)))
+
+    result = harmonic_analysis(time, samples, 1037.3)
+
+    # The noise rms relative to the fundamental rms
+    assert result["thd-n"] == pytest.approx(0.01 * numpy.sqrt(2), rel=0.05)
+    assert result["thd"] < result["thd-n"]
+
+
+def test_harmonic_analysis_channels():
+    time = numpy.arange(4096) * 1e-5
+    samples = numpy.array([
+        [make_distorted_sine(time, 2e3, [0.1])],
+        [make_distorted_sine(time, 2e3, [0.02])]
+    ])
+
+    result = harmonic_analysis(time, samples, 2e3, harmonics=3)
+
+    assert result["thd"] == pytest.approx([0.1, 0.02], rel=1e-2)
+
+
+def test_peak_harmonics():
+    frequency = numpy.arange(1000) * 10.0
+    power = numpy.full(len(frequency), 1e-12)
+    power[100] = 0.5
+    power[200] = 0.5e-4
+    power[301] = 0.5e-6
+
+    result = peak_harmonics(frequency, power, 1000, harmonics=4)
+
+    assert result["fundamental"] == pytest.approx(numpy.sqrt(0.5))
+    assert result["harmonics"][:2] == pytest.approx([1e-2, 1e-3])
+    assert result["thd"] == pytest.approx(numpy.hypot(1e-2, 1e-3), rel=1e-3)
@@ -0,0 +1,64 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.algorithm.impedance_algorithm import ImpedanceAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import BodeScale
+
+
+def make_impedance(oscilloscope, generator, requirements: dict):
+    """ Returns an impedance algorithm with the generator measured by channel 1 and the given requirements """
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "scale": BodeScale.Log,
+        "start-frequency": 100,
+        "stop-frequency": 1e4,
+        "samples": 5
+    }
+    requirements = {"generator-channel": Sources.Channel_1, **requirements}
+    return ImpedanceAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def resistor(resistance: float):
+    return lambda frequency: resistance
+
+
+def capacitor(capacitance: float):
+    return lambda frequency: 1 / (2j * numpy.pi * frequency * capacitance)
+
+
+def test_each_dut_uses_its_own_series_resistance(bench, oscilloscope, generator, run_algorithm):
+    duts = {2: (resistor(470), 1e3), 3: (capacitor(1e-6), 100)}
+    for channel, (impedance, resistance) in duts.items():
+        bench.responses[channel] = lambda frequency, impedance=impedance, resistance=resistance: (
+            impedance(frequency) / (impedance(frequency) + resistance)
+        )
+
+    requirements = {"input-channels": [Sources.Channel_2, Sources.Channel_3], "resistances": [1e3, 100]}
+    algorithm = make_impedance(oscilloscope, generator, requirements)
+    result = run_algorithm(algorithm)
+
+    frequencies = numpy.logspace(2, 4, 5)
+    capacitance = capacitor(1e-6)(frequencies)
+    assert [measure["impedance-module"] for measure in result] == pytest.approx([470] * 5, rel=1e-6)
+    assert [measure["impedance-module-ch3"] for measure in result] == pytest.approx(numpy.abs(capacitance), rel=1e-6)
+    assert [measure["impedance-phase-ch3"] for measure in result] == pytest.approx([-90] * 5, abs=1e-6)
+
+    # Each DUT is also returned with the fields of a single DUT measurement
+    dut_result = algorithm.get_dut_result(Sources.Channel_3)
+    assert [measure["impedance-module"] for measure in dut_result] == pytest.approx(numpy.abs(capacitance), rel=1e-6)
+    with pytest.raises(ValueError):
+        algorithm.get_dut_result(Sources.Channel_4)
+
+
+def test_a_resistance_is_expected_for_each_dut(oscilloscope, generator):
+    requirements = {"input-channels": [Sources.Channel_2, Sources.Channel_3], "resistances": [1e3]}
+    with pytest.raises(ValueError):
+        make_impedance(oscilloscope, generator, requirements)
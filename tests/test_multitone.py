@@ -0,0 +1,66 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.multitone import crest_factor
+from labtool.analysis.multitone import multitone_waveform
+from labtool.analysis.multitone import tone_harmonics
+from labtool.analysis.multitone import tone_phasors
+
+
+def test_tone_harmonics_unique_and_bounded():
+    harmonics = tone_harmonics(20, 100)
+
+    assert harmonics[0] == 1
+    assert harmonics[-1] == 100
+    assert numpy.all(numpy.diff(harmonics) > 0)
+
+
+def test_crest_factor_of_sine():
+    waveform = numpy.sin(2 * numpy.pi * numpy.arange(1000) / 1000)
+
+    assert crest_factor(waveform) == pytest.approx(numpy.sqrt(2))
+
+
+def test_multitone_waveform_keeps_equal_tones():
+    harmonics = tone_harmonics(10, 50)
+    waveform = multitone_waveform(harmonics, 1024)
+    spectrum = numpy.abs(numpy.fft.rfft(waveform))
+
+    assert numpy.max(numpy.abs(waveform)) == pytest.approx(1)
+    assert spectrum[harmonics] == pytest.approx(spectrum[harmonics[0]])
+    assert numpy.delete(spectrum, harmonics) == pytest.approx(0, abs=1e-9)
+    assert crest_factor(waveform) < numpy.sqrt(2 * len(harmonics))
+
+
+def test_tone_phasors_known_tones():
+    fundamental = 1e3
+    harmonics = numpy.array([1, 3, 10])
+    amplitudes = numpy.array([1, 0.5, 0.2])
+    phases = numpy.array([0.1, -1, 2])
+    # 5.5 periods, only the first 5 are used
+    time = numpy.arange(5500) * 1e-6
+    samples = sum(
+        amplitude * numpy.cos(2 * numpy.pi * harmonic * fundamental * time + phase)
+        for harmonic, amplitude, phase in zip(harmonics, amplitudes, phases)
+    )
+
+    phasors = tone_phasors(time, samples, fundamental, harmonics)
+
+    assert numpy.abs(phasors[0]) == pytest.approx(amplitudes)
+    assert numpy.angle(phasors[0]) == pytest.approx(phases)
+
+
+def test_tone_phasors_short_record():
+    time = numpy.arange(500) * 1e-6
+    with pytest.raises(ValueError):
+        tone_phasors(time, numpy.zeros(len(time)), 1e3, [1])
+
+
+def test_tone_phasors_undersampled_harmonic():
+    time = numpy.arange(1000) * 1e-6
+    with pytest.raises(ValueError):
+        tone_phasors(time, numpy.zeros(len(time)), 1e3, [1, 600])
@@ -0,0 +1,57 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.algorithm.multitone_algorithm import MultitoneAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import BodeScale
+
+
+def make_multitone(oscilloscope, generator, **preferences):
+    """ Returns a multi-tone algorithm measuring channels 2 and 3 against channel 1, with the given preferences """
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "scale": BodeScale.Log,
+        "start-frequency": 100,
+        "stop-frequency": 1e4,
+        "samples": 5,
+        **preferences
+    }
+    requirements = {"input-channel": Sources.Channel_1, "output-channels": [Sources.Channel_2, Sources.Channel_3]}
+    return MultitoneAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def test_multitone_measures_every_output_channel(bench, oscilloscope, generator):
+    algorithm = make_multitone(oscilloscope, generator)
+    for _ in range(3):
+        algorithm()
+
+    # The bench only outputs the fundamental tone of the record
+    bode_measure = algorithm.bode_measures[0]
+    assert bode_measure["frequency"] == pytest.approx(100)
+    assert bode_measure["bode-module"] == pytest.approx(abs(bench.response(2, 100)), rel=1e-3)
+    assert bode_measure["bode-module-ch3"] == pytest.approx(abs(bench.response(3, 100)), rel=1e-3)
+    assert bode_measure["bode-phase-ch3"] == pytest.approx(numpy.degrees(numpy.angle(bench.response(3, 100))), abs=0.1)
+
+
+def test_short_record_is_acquired_again_with_more_periods(bench, oscilloscope, generator):
+    algorithm = make_multitone(oscilloscope, generator, **{"multitone-periods": 0.75})
+    for _ in range(4):
+        algorithm()
+
+    assert len(bench.commands(":DIG")) == 2
+    assert algorithm.bode_retries == 0
+    assert algorithm.bode_measures[0]["bode-module"] == pytest.approx(abs(bench.response(2, 100)), rel=1e-3)
+
+
+def test_short_record_raises_when_the_retry_budget_is_spent(bench, oscilloscope, generator):
+    algorithm = make_multitone(oscilloscope, generator, **{"multitone-periods": 0.75, "retry-budget": 0})
+    with pytest.raises(ValueError):
+        for _ in range(3):
+            algorithm()
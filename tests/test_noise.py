@@ -0,0 +1,49 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.noise import WelchAccumulator
+
+
+def test_white_noise_density():
+    generator = numpy.random.default_rng(5)
+    sample_interval = 1e-5
+    accumulator = WelchAccumulator(1024, sample_interval)
+    for _ in range(20):
+        accumulator.add(generator.normal(0, 0.1, 10000))
+
+    psd = accumulator.psd()[1:-1]
+
+    # One sided density of white noise, its variance spread up to the Nyquist frequency
+    assert numpy.mean(psd) == pytest.approx(0.1 ** 2 * 2 * sample_interval, rel=0.02)
+    assert accumulator.frequency()[-1] == pytest.approx(0.5 / sample_interval)
+
+
+def test_tone_power():
+    sample_interval = 1e-4
+    accumulator = WelchAccumulator(1000, sample_interval)
+    time = numpy.arange(5000) * sample_interval
+    accumulator.add(numpy.sin(2 * numpy.pi * 500 * time) + 3)
+
+    psd = accumulator.psd()
+    resolution = accumulator.frequency()[1]
+
+    # The mean is removed, and the power of the tone is its mean square value
+    assert psd[0] == pytest.approx(0, abs=1e-12)
+    assert numpy.sum(psd) * resolution == pytest.approx(0.5, rel=1e-6)
+
+
+def test_records_of_any_length():
+    accumulator = WelchAccumulator(100, 1e-3)
+    accumulator.add(numpy.ones(50))
+    assert accumulator.segments == 0
+
+    accumulator.add(numpy.ones(260))
+    assert accumulator.segments == 4
+
+    accumulator.reset()
+    assert accumulator.segments == 0
+    assert numpy.all(accumulator.psd() == 0)
@@ -0,0 +1,49 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.algorithm.noise_algorithm import NoiseAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+
+def make_algorithm(oscilloscope, generator, **preferences):
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "start-frequency": 100,
+        "stop-frequency": 10e3,
+        "samples": 10,
+        "noise-captures": 4,
+        **preferences
+    }
+    return NoiseAlgorithm(oscilloscope, generator, {"channel": Sources.Channel_2}, {}, {}, {}, {}, {}, preferences_setup)
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_scope_fft_white_noise_density(bench, oscilloscope, generator, run_algorithm, pipelined):
+    bench.noise_density = 1e-12
+    algorithm = make_algorithm(oscilloscope, generator, **{"scope-fft": True, "spectrum-points": 500, "pipelined": pipelined})
+
+    result = run_algorithm(algorithm)
+
+    # The bins are spread over the span, twice the stop frequency, whatever the points downloaded
+    assert algorithm.spectrum_resolution == pytest.approx(2 * 10e3 / oscilloscope.fft_points)
+    frequency, psd = algorithm.get_psd()
+    assert psd == pytest.approx(numpy.full(len(psd), 1e-12), rel=0.01)
+    assert [measure["noise-density"] for measure in result] == pytest.approx(numpy.full(10, 1e-6), rel=0.01)
+
+
+def test_waveform_white_noise_density(bench, oscilloscope, generator, run_algorithm):
+    bench.noise = 1e-3
+    algorithm = make_algorithm(oscilloscope, generator, **{"noise-captures": 16, "pipelined": False})
+
+    result = run_algorithm(algorithm)
+
+    # One sided density of the white noise, spread up to half the sample rate of the downloaded records
+    sample_rate = algorithm.compute_points() / algorithm.compute_window()
+    expected = numpy.sqrt(2 * 1e-3 ** 2 / sample_rate)
+    assert [measure["noise-density"] for measure in result] == pytest.approx(numpy.full(10, expected), rel=0.1)
@@ -0,0 +1,54 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.phase import group_delay
+from labtool.analysis.phase import refine_frequencies
+from labtool.analysis.phase import unwrap_phase
+from labtool.analysis.sine_fit import wrap_phase
+
+
+def test_unwrap_phase_of_delay():
+    frequency = numpy.linspace(1e3, 1e5, 200)
+    delay = 20e-6
+    phase = -360 * frequency * delay
+
+    unwrapped, ambiguous = unwrap_phase(wrap_phase(phase))
+
+    assert unwrapped == pytest.approx(phase - phase[0] + wrap_phase(phase[0]))
+    assert not numpy.any(ambiguous)
+
+
+def test_unwrap_phase_empty():
+    unwrapped, ambiguous = unwrap_phase([])
+
+    assert len(unwrapped) == 0
+    assert len(ambiguous) == 0
+
+
+def test_unwrap_phase_ambiguous_steps():
+    phase = [0, -30, -150, -200]
+
+    ambiguous = unwrap_phase(phase)[1]
+    assert list(ambiguous) == [False, True, False]
+
+    # A large uncertainty of the last point makes its step ambiguous
+    ambiguous = unwrap_phase(phase, uncertainty=[1, 1, 1, 20])[1]
+    assert list(ambiguous) == [False, True, True]
+
+
+def test_group_delay_of_delay():
+    frequency = numpy.logspace(3, 5, 50)
+    phase = -360 * frequency * 20e-6
+
+    assert group_delay(frequency, phase) == pytest.approx(numpy.full(50, 20e-6))
+    assert list(group_delay([1e3], [0])) == [0]
+
+
+def test_refine_frequencies():
+    frequency = [10, 1000, 10000]
+
+    assert refine_frequencies(frequency, numpy.array([True, False])) == pytest.approx([100])
@@ -0,0 +1,55 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.algorithm.bode_algorithm import BurstAcquisitionError
+from labtool.algorithm.segmented_bode_algorithm import SegmentedBodeAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import BodeScale
+
+
+def make_segmented_bode(oscilloscope, generator, **preferences):
+    """ Returns a segmented bode algorithm measuring channel 2 against channel 1, with the given preferences """
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "scale": BodeScale.Log,
+        "start-frequency": 100,
+        "stop-frequency": 1e4,
+        "samples": 5,
+        **preferences
+    }
+    requirements = {"input-channel": Sources.Channel_1, "output-channel": Sources.Channel_2}
+    return SegmentedBodeAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def test_segmented_bode_measures_each_group(bench, oscilloscope, generator, run_algorithm):
+    result = run_algorithm(make_segmented_bode(oscilloscope, generator))
+
+    frequencies = numpy.logspace(2, 4, 5)
+    expected = [bench.response(2, frequency) for frequency in frequencies]
+    assert [measure["frequency"] for measure in result] == pytest.approx(frequencies)
+    assert [measure["bode-module"] for measure in result] == pytest.approx(numpy.abs(expected), rel=1e-2)
+    assert [measure["bode-phase"] for measure in result] == pytest.approx(numpy.degrees(numpy.angle(expected)), abs=0.5)
+
+    # Each group of frequencies within the segment ratio is captured by a single acquisition
+    assert len(bench.commands(":SINGle")) == 2
+
+
+def test_segmented_bode_raises_when_not_armed(bench, oscilloscope, generator):
+    algorithm = make_segmented_bode(oscilloscope, generator, **{"adaptive-timing": True})
+    bench.arm = False
+    with pytest.raises(BurstAcquisitionError):
+        for _ in range(10):
+            algorithm()
+
+    # No burst is fired unless armed, and the oscilloscope is left running with its own timeout
+    assert len(bench.commands(":SINGle")) == algorithm.arm_attempts
+    assert not bench.commands("*TRG")
+    assert bench.commands(":RUN")
+    assert oscilloscope.get_timeout() == pytest.approx(2)
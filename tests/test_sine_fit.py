@@ -0,0 +1,99 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.sine_fit import sine_fit
+from labtool.analysis.sine_fit import sine_fit_segments
+from labtool.analysis.sine_fit import sine_fit_uncertainty
+from labtool.analysis.sine_fit import single_bin_dft
+from labtool.analysis.sine_fit import wrap_phase
+
+
+def make_sine(time, amplitude, frequency, phase, offset=0):
+    return amplitude * numpy.cos(2 * numpy.pi * frequency * time + phase) + offset
+
+
+def test_sine_fit_known_sine():
+    time = numpy.arange(1000) * 1e-5
+    samples = make_sine(time, 1.5, 1234.5, 0.7, offset=0.2)
+
+    amplitude, phase, offset, residual = sine_fit(time, samples, 1234.5)
+
+    assert amplitude[0] == pytest.approx(1.5)
+    assert phase[0] == pytest.approx(0.7)
+    assert offset[0] == pytest.approx(0.2)
+    assert residual[0] == pytest.approx(0, abs=1e-9)
+
+
+def test_sine_fit_fits_each_row():
+    time = numpy.arange(2000) * 1e-6
+    samples = numpy.array([make_sine(time, 1, 3e3, 0), make_sine(time, 0.5, 3e3, -1.2)])
+
+    amplitude, phase = sine_fit(time, samples, 3e3)[:2]
+
+    assert amplitude == pytest.approx([1, 0.5])
+    assert phase == pytest.approx([0, -1.2])
+
+
+def test_sine_fit_uncertainty_matches_noise():
+    generator = numpy.random.default_rng(0)
+    time = numpy.arange(10000) * 1e-5
+    clean = make_sine(time, 1, 500, 0.3)
+    samples = clean + generator.normal(0, 0.05, (200, len(time)))
+
+    amplitude, phase, _, residual = sine_fit(time, samples, 500)
+    uncertainty = sine_fit_uncertainty(amplitude, residual, len(time))
+
+    assert numpy.std(amplitude) == pytest.approx(numpy.mean(uncertainty), rel=0.2)
+    assert numpy.std(phase) == pytest.approx(numpy.mean(uncertainty), rel=0.2)
+
+
+def test_sine_fit_segments_matches_sine_fit():
+    time = numpy.arange(1000) * 1e-6
+    frequencies = numpy.array([1e3, 2.5e3, 7e3])
+    amplitudes = numpy.array([[1, 0.5, 0.2], [0.3, 0.1, 0.05]])
+    phases = numpy.array([[0.1, -0.5, 2], [1, -2, 0.3]])
+    samples = make_sine(time, amplitudes[..., numpy.newaxis], frequencies[:, numpy.newaxis], phases[..., numpy.newaxis], 0.1)
+
+    amplitude, phase, offset, residual = sine_fit_segments(time, samples, frequencies)
+
+    assert amplitude.shape == (2, 3)
+    assert amplitude == pytest.approx(amplitudes)
+    assert phase == pytest.approx(phases)
+    assert offset == pytest.approx(numpy.full((2, 3), 0.1))
+    for segment, frequency in enumerate(frequencies):
+        assert amplitude[:, segment] == pytest.approx(sine_fit(time, samples[:, segment], frequency)[0])
+
+
+def test_sine_fit_segments_window():
+    time = numpy.arange(1000) * 1e-6
+    frequencies = [2e3, 5e3]
+    samples = numpy.array([make_sine(time, 1, frequency, 0.5) for frequency in frequencies])
+    # The start of each segment is corrupted, and left out by the window
+    samples[:, :200] += 3
+    weights = numpy.broadcast_to(time >= 200e-6, samples.shape)
+
+    amplitude, phase, offset, residual = sine_fit_segments(time, samples, frequencies, weights)
+
+    assert amplitude == pytest.approx([1, 1])
+    assert phase == pytest.approx([0.5, 0.5])
+    assert offset == pytest.approx([0, 0], abs=1e-9)
+    assert residual == pytest.approx([0, 0], abs=1e-9)
+
+
+def test_single_bin_dft_integer_periods():
+    time = numpy.arange(1000) * 1e-5
+    samples = make_sine(time, 2, 1e3, -0.4, offset=1)
+
+    amplitude, phase = single_bin_dft(time, samples, 1e3)
+
+    assert amplitude[0] == pytest.approx(2)
+    assert phase[0] == pytest.approx(-0.4)
+
+
+@pytest.mark.parametrize("phase, expected", [(0, 0), (180, -180), (-180, -180), (270, -90), (-190, 170), (720, 0)])
+def test_wrap_phase(phase, expected):
+    assert wrap_phase(phase) == pytest.approx(expected)
@@ -0,0 +1,72 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.spectrum import band_coherence
+from labtool.analysis.spectrum import band_edges
+from labtool.analysis.spectrum import band_sum
+from labtool.analysis.spectrum import band_transfer
+from labtool.analysis.spectrum import cross_spectra
+
+
+def test_band_edges_geometric():
+    edges = band_edges([10, 100, 1000])
+
+    assert edges == pytest.approx([10 / numpy.sqrt(10), numpy.sqrt(1000), numpy.sqrt(1e5), 1000 * numpy.sqrt(10)])
+
+
+def test_band_sum_splits_bins():
+    frequency = numpy.arange(100, dtype=float)
+    spectrum = numpy.ones(100)
+
+    # Edges at 5, 20 and 80
+    sums = band_sum(frequency, spectrum, [10, 40])
+
+    assert sums == pytest.approx([15, 60])
+
+
+def test_band_transfer_known_gain():
+    generator = numpy.random.default_rng(1)
+    points = 4096
+    sample_interval = 1e-4
+    reference = generator.normal(size=points)
+    # Gain of 0.5 with a constant phase shift of -30 degrees, applied in the frequency domain
+    frequency = numpy.fft.rfftfreq(points, sample_interval)
+    gain = 0.5 * numpy.exp(-1j * numpy.pi / 6)
+    target = numpy.fft.irfft(numpy.fft.rfft(reference) * gain, points)
+
+    transfer, coherence = band_transfer(frequency, *cross_spectra(reference, target), [50, 200, 1000])
+
+    assert transfer == pytest.approx(numpy.full(3, gain))
+    assert coherence == pytest.approx(1)
+
+
+def test_band_coherence_drops_with_noise():
+    generator = numpy.random.default_rng(2)
+    points = 1024
+    frequency = numpy.fft.rfftfreq(points, 1e-3)
+    spectra = [numpy.zeros(len(frequency)), numpy.zeros(len(frequency), dtype=complex), numpy.zeros(len(frequency))]
+    for _ in range(50):
+        reference = generator.normal(size=points)
+        target = 2 * reference + generator.normal(scale=2, size=points)
+        for total, spectrum in zip(spectra, cross_spectra(reference, target)):
+            total += spectrum
+
+    coherence = band_coherence(frequency, *spectra, [20, 100, 300])
+
+    # Expected coherence is 4 / (4 + 4)
+    assert coherence == pytest.approx(0.5, abs=0.1)
+
+
+def test_band_coherence_single_capture():
+    generator = numpy.random.default_rng(3)
+    reference = generator.normal(size=256)
+    target = generator.normal(size=256)
+    frequency = numpy.fft.rfftfreq(256, 1e-3)
+
+    coherence = band_coherence(frequency, *cross_spectra(reference, target), [50, 200])
+
+    assert coherence == pytest.approx(1)
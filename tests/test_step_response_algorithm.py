@@ -0,0 +1,41 @@
+# python native modules
+
+# third-party modules
+import pytest
+
+# labtool project modules
+from labtool.algorithm.step_response_algorithm import StepResponseAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import BodeScale
+
+
+def make_step_response(oscilloscope, generator, **preferences):
+    """ Returns a step response algorithm measuring channel 2 against channel 1, with the given preferences """
+    preferences_setup = {
+        "delay": 0,
+        "stable-time": 0,
+        "scale": BodeScale.Log,
+        "start-frequency": 100,
+        "stop-frequency": 1e4,
+        "samples": 5,
+        "step-captures": 1,
+        **preferences
+    }
+    requirements = {"input-channel": Sources.Channel_1, "output-channel": Sources.Channel_2}
+    return StepResponseAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def test_points_are_limited_by_the_record(bench, oscilloscope, generator):
+    algorithm = make_step_response(oscilloscope, generator, **{"stop-frequency": 1e8})
+    assert algorithm.compute_points() == oscilloscope.max_waveform_points
+
+    algorithm = make_step_response(oscilloscope, generator)
+    assert algorithm.compute_points() == 4 * 1e4 * 4 / 100
+
+
+def test_step_response_restores_the_timeout(bench, oscilloscope, generator, run_algorithm):
+    run_algorithm(make_step_response(oscilloscope, generator, **{"step-window": 1}))
+
+    assert oscilloscope.get_timeout() == pytest.approx(2)
@@ -0,0 +1,60 @@
+# python native modules
+
+# third-party modules
+import pytest
+
+# labtool project modules
+from labtool.algorithm.sweep_algorithm import SweepAlgorithm
+
+from labtool.oscilloscope.base.oscilloscope import Measure
+from labtool.oscilloscope.base.oscilloscope import Sources
+
+from labtool.tool import SweepParameter
+
+
+def make_sweep(oscilloscope, generator, sweeps: list, measures: list, **preferences):
+    """ Returns a sweep algorithm with the given sweeps and measures, and preferences """
+    preferences_setup = {"delay": 0, "stable-time": 0, **preferences}
+    requirements = {"sweeps": sweeps, "measures": measures}
+    return SweepAlgorithm(oscilloscope, generator, requirements, {}, {}, {}, {}, {"amplitude": 1.0}, preferences_setup)
+
+
+def test_nested_sweeps_measure_every_combination(bench, oscilloscope, generator, run_algorithm):
+    sweeps = [
+        {"parameter": SweepParameter.Amplitude, "values": [0.5, 1.0]},
+        {"parameter": SweepParameter.Frequency, "values": [100, 1e3, 1e4]}
+    ]
+    measures = [(Measure.Vpp, Sources.Channel_2, None), (Measure.VRatio, Sources.Channel_2, Sources.Channel_1)]
+    result = run_algorithm(make_sweep(oscilloscope, generator, sweeps, measures))
+
+    assert [(measure["amplitude"], measure["frequency"]) for measure in result] == [
+        (amplitude, frequency) for amplitude in [0.5, 1.0] for frequency in [100, 1e3, 1e4]
+    ]
+    for measure in result:
+        response = abs(bench.response(2, measure["frequency"]))
+        assert measure["vpp-ch2"] == pytest.approx(measure["amplitude"] * response)
+        assert measure["vratio-ch2-ch1"] == pytest.approx(response)
+
+    # Only the parameters changing between points are sent, the outer sweep changes once
+    assert len(bench.commands("VOLTage ")) == 1 + 2
+    assert len(bench.commands("FREQuency ")) == 1 + 6
+
+
+def test_offset_sweep_centers_the_channels(bench, oscilloscope, generator, run_algorithm):
+    sweeps = [{"parameter": SweepParameter.Offset, "start": -2, "stop": 2, "samples": 3}]
+    measures = [(Measure.Vmax, Sources.Channel_1, None), (Measure.Vmin, Sources.Channel_1, None)]
+    result = run_algorithm(make_sweep(oscilloscope, generator, sweeps, measures))
+
+    # The DC level of each point is measured without clipping
+    assert [measure["vmax-ch1"] for measure in result] == pytest.approx([-1.5, 0.5, 2.5])
+    assert [measure["vmin-ch1"] for measure in result] == pytest.approx([-2.5, -0.5, 1.5])
+
+
+def test_statistics_add_the_standard_deviation(bench, oscilloscope, generator, run_algorithm):
+    sweeps = [{"parameter": SweepParameter.Frequency, "values": [1e3]}]
+    measures = [(Measure.Vpp, Sources.Channel_2, None)]
+    result = run_algorithm(make_sweep(oscilloscope, generator, sweeps, measures, **{"statistics-count": 100}))
+
+    vpp = abs(bench.response(2, 1e3))
+    assert result[0]["vpp-ch2"] == pytest.approx(vpp)
+    assert result[0]["vpp-ch2-std-dev"] == pytest.approx(0.01 * vpp)
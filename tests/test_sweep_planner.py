@@ -0,0 +1,70 @@
+# python native modules
+
+# third-party modules
+import pytest
+
+# labtool project modules
+from labtool.algorithm.base.sweep_planner import SweepPlanner
+from labtool.algorithm.base.sweep_planner import coarse_to_fine
+
+from labtool.tool import SweepOrder
+
+
+@pytest.mark.parametrize("time_range, expected", [(1e-3, 1e-3), (1.1e-3, 2e-3), (3e-6, 5e-6), (6, 10), (0.2, 0.2)])
+def test_quantize_timebase(time_range, expected):
+    assert SweepPlanner.quantize_timebase(time_range) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 3, 9, 10, 100])
+def test_coarse_to_fine_is_permutation(count):
+    order = coarse_to_fine(count)
+
+    assert sorted(order) == list(range(count))
+
+
+def test_coarse_to_fine_halves_spacing():
+    assert coarse_to_fine(9) == [0, 8, 4, 2, 6, 1, 3, 5, 7]
+
+
+def test_plan_sequential():
+    planner = SweepPlanner({})
+
+    assert planner.plan([1, 10, 100]) == [0, 1, 2]
+
+
+def test_plan_minimum_cost_groups_settings():
+    planner = SweepPlanner({"sweep-order": SweepOrder.MinimumCost})
+    # Every point shares the timebase range, while the vertical range changes back and forth
+    frequencies = [100, 110, 120, 130]
+    predicted_ranges = [(1,), (2,), (1,), (2,)]
+
+    order = planner.plan(frequencies, predicted_ranges=predicted_ranges)
+
+    assert order == [0, 2, 1, 3]
+
+
+def test_plan_minimum_cost_keeps_sequential_when_cheapest():
+    planner = SweepPlanner({"sweep-order": SweepOrder.MinimumCost})
+
+    assert planner.plan([10, 100, 1000], predicted_ranges=[(1,), (1,), (1,)]) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("channel_range, expected", [(0.8, 0.8), (0.9, 1.6), (1.1, 1.6), (2.2, 4), (4.1, 8)])
+def test_quantize_range(channel_range, expected):
+    assert SweepPlanner.quantize_range(channel_range) == pytest.approx(expected)
+
+
+def test_plan_minimum_cost_shares_close_ranges():
+    planner = SweepPlanner({"sweep-order": SweepOrder.MinimumCost})
+    # Ranges found by the autoscale, 10% over the signal, never exactly the same
+    frequencies = [100, 105, 110, 115, 120, 125]
+    predicted_ranges = [(1.10,), (2.31,), (1.13,), (2.29,), (1.08,), (2.35,)]
+
+    order = planner.plan(frequencies, predicted_ranges=predicted_ranges)
+
+    def range_changes(plan):
+        ranges = [SweepPlanner.quantize_range(predicted_ranges[index][0]) for index in plan]
+        return sum([a != b for a, b in zip(ranges[:-1], ranges[1:])])
+
+    assert range_changes(order) == 1
+    assert range_changes(list(range(len(frequencies)))) == 5
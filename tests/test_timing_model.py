@@ -0,0 +1,47 @@
+# python native modules
+
+# third-party modules
+import pytest
+
+# labtool project modules
+from labtool.algorithm.base.timing_model import TimingModel
+
+
+def test_settle_time_disabled():
+    model = TimingModel({"stable-time": 0.5})
+
+    assert model.settle_time(10) == 0.5
+    assert model.settle_time(1e6) == 0.5
+
+
+def test_settle_time_default():
+    model = TimingModel({})
+
+    assert model.settle_time(10) == pytest.approx(0.1)
+
+
+def test_settle_time_periods():
+    model = TimingModel({"stable-time": 0.5, "adaptive-timing": True})
+
+    assert model.settle_time(100) == pytest.approx(0.1)
+    assert model.settle_time(1e6) == pytest.approx(1e-5)
+
+
+def test_settle_time_constant_hint():
+    model = TimingModel({"stable-time": 0.5, "adaptive-timing": True, "dut-time-constant": 1e-3})
+
+    assert model.settle_time(1e6) == pytest.approx(5e-3)
+    assert model.settle_time(10) == pytest.approx(1)
+
+
+def test_acquisition_time():
+    model = TimingModel({"stable-time": 0.5, "rearm-time": 0.01})
+
+    assert model.acquisition_time(1e3, 1e-2) == pytest.approx(0.02)
+    assert model.acquisition_time(10, 1e-2, average_count=4) == pytest.approx(4 * 0.11)
+
+
+def test_timeout_exceeds_acquisition_time():
+    model = TimingModel({"stable-time": 0.5})
+
+    assert model.timeout(10, 1, average_count=8) > model.acquisition_time(10, 1, average_count=8)
@@ -0,0 +1,103 @@
+# python native modules
+
+# third-party modules
+import numpy
+import pytest
+
+# labtool project modules
+from labtool.analysis.vector_fitting import LiveVectorFit
+from labtool.analysis.vector_fitting import model_response
+from labtool.analysis.vector_fitting import required_points
+from labtool.analysis.vector_fitting import sort_poles
+from labtool.analysis.vector_fitting import vector_fit
+
+
+# Band-pass response of the voltage on the resistance of a series RLC circuit
+RESISTANCE = 100
+INDUCTANCE = 10e-3
+CAPACITANCE = 100e-9
+
+
+def rlc_response(frequency):
+    s = 2j * numpy.pi * frequency
+    return s * RESISTANCE * CAPACITANCE / (s ** 2 * INDUCTANCE * CAPACITANCE + s * RESISTANCE * CAPACITANCE + 1)
+
+
+def rlc_poles():
+    return numpy.roots([INDUCTANCE * CAPACITANCE, RESISTANCE * CAPACITANCE, 1])
+
+
+def test_sort_poles_flips_unstable():
+    poles = sort_poles(numpy.array([1 - 2j, -3 + 0j, 1 + 2j]))
+
+    assert poles == pytest.approx([-3, -1 + 2j, -1 - 2j])
+
+
+def test_vector_fit_known_rlc():
+    frequency = numpy.logspace(2, 6, 60)
+    response = rlc_response(frequency)
+
+    fit = vector_fit(frequency, response, 2, constant=False)
+
+    assert numpy.sort_complex(fit["poles"]) == pytest.approx(numpy.sort_complex(rlc_poles()), rel=1e-6)
+    assert fit["zeros"] == pytest.approx([0], abs=1e-3)
+    assert fit["gain"] == pytest.approx(RESISTANCE / INDUCTANCE, rel=1e-6)
+    assert fit["fit-error"] < 1e-8
+    assert model_response(fit, frequency) == pytest.approx(response, rel=1e-6)
+
+
+def test_vector_fit_noisy_response():
+    generator = numpy.random.default_rng(7)
+    frequency = numpy.logspace(2, 6, 60)
+    response = rlc_response(frequency) * (1 + generator.normal(0, 1e-3, len(frequency)))
+
+    fit = vector_fit(frequency, response, 2, constant=False)
+
+    assert numpy.sort_complex(fit["poles"]) == pytest.approx(numpy.sort_complex(rlc_poles()), rel=1e-2)
+    assert fit["fit-error"] == pytest.approx(1e-3, rel=0.3)
+
+
+def test_required_points():
+    frequency = numpy.logspace(2, 6, 60)
+
+    count = required_points(frequency, rlc_response(frequency), 2, 1e-6, constant=False)
+
+    assert count is not None
+    assert count < len(frequency)
+
+
+def test_required_points_with_too_few_points():
+    frequency = numpy.logspace(2, 6, 3)
+
+    assert required_points(frequency, rlc_response(frequency), 2, 1e-6, constant=False) is None
+
+
+def test_live_vector_fit_updates_every_interval():
+    frequency = numpy.logspace(2, 6, 12)
+    live = LiveVectorFit(2, constant=False, interval=4)
+    updates = []
+    for value, response in zip(frequency, rlc_response(frequency)):
+        live.add(value, response)
+        updates.append(live.pending == 0)
+
+    # The first fit is made with the fourth point, and then every four points
+    assert numpy.flatnonzero(updates).tolist() == [3, 7, 11]
+    live.flush()
+    assert live.pending == 0
+
+
+def test_live_vector_fit():
+    frequency = numpy.logspace(2, 6, 30)
+    live = LiveVectorFit(2, constant=False)
+    for value, response in zip(frequency[:3], rlc_response(frequency[:3])):
+        live.add(value, response)
+    assert live.fit is None
+
+    for value, response in zip(frequency[3:], rlc_response(frequency[3:])):
+        live.add(value, response)
+    live.flush()
+    assert numpy.sort_complex(live.fit["poles"]) == pytest.approx(numpy.sort_complex(rlc_poles()), rel=1e-6)
+
+    live.reset()
+    assert live.fit is None
+    assert live.frequency == []